@@ -1,14 +1,21 @@
+import json
 import threading
+import time
 from pathlib import Path
 from typing import Optional, Dict, List, Any, Tuple
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from app import schemas
 from app.core.config import settings
 from app.core.event import eventmanager, Event
 from app.log import logger
 from app.plugins import _PluginBase
 from app.schemas.types import EventType, NotificationType
+from app.plugins.mqttclient.payload import ENCODERS, MqttTextEncoder, build_encoder
+from app.plugins.mqttclient.publisher import MqttPublishQueue, MqttTopicAliases
+from app.plugins.mqttclient.subscriber import MqttSubscribeRule, MqttSubscriber
+from app.plugins.mqttclient.supervisor import MqttSupervisor
 
 import paho.mqtt.client as mqtt
 from paho.mqtt.enums import CallbackAPIVersion
@@ -26,7 +33,7 @@ class MqttClient(_PluginBase):
     # 插件图标
     plugin_icon = "Ha_A.png"
     # 插件版本
-    plugin_version = "0.3"
+    plugin_version = "0.7"
     # 插件作者
     plugin_author = "Aqr-K"
     # 作者主页
@@ -38,15 +45,9 @@ class MqttClient(_PluginBase):
     # 可使用的用户级别
     auth_level = 1
 
-    # 回调函数状态
-    connect_type = ""
-    connect_success = None
-
     # client
     mqtt_client = None
-    now_client_loop_thread_ident = None
-    now_client_loop_thread_name = None
-    now_client_id: Optional[str] = None
+    supervisor: Optional[MqttSupervisor] = None
 
     # 插件配置项
     _enabled: bool = False
@@ -64,6 +65,9 @@ class MqttClient(_PluginBase):
     _broker_username: Optional[str] = ''  # 用户名
     _broker_password: Optional[str] = ''  # 密码
 
+    _reconnect_min_delay: int = 1  # 首次重连间隔
+    _reconnect_max_delay: int = 120  # 最大重连间隔
+
     # Publisher 发布者
 
     _publisher_enabled: bool = False  # 发布端开关
@@ -72,12 +76,33 @@ class MqttClient(_PluginBase):
     _publisher_msgtypes = []  # 接受的消息类型
     _publisher_topic: str = None  # 主题名前缀
     _publisher_qos: int = 2  # 消息质量
+    _publisher_encoding: str = "text"  # 消息内容格式
+    _publisher_topic_alias: bool = True  # MQTTv5 主题别名
+    _publisher_queue_size: int = 1000  # 发布队列容量
+    _publisher_queue_policy: str = "drop_oldest"  # 发布队列已满时的处理策略
+    _publisher_max_inflight: int = 20  # Qos 1/2 在途消息数量上限
+    _publisher_max_queued: int = 100  # 客户端排队消息数量上限，0 为不限制
 
     # _publisher_send_image: bool = False  # 发送图片
 
     # Subscriber 订阅者
     _subscriber_enabled: bool = False
     _subscriber_onlyonce: bool = False
+    _subscriber_workers: int = 4  # 规则处理线程数量
+    _subscriber_rules: Optional[str] = "[]"  # 订阅规则
+
+    # 订阅规则示例，只在说明中展示，默认不启用任何规则
+    example_subscriber_rules = json.dumps([
+        {"name": "查询站点", "topic": "MoviePilot/command/sites", "action": "command", "command": "/sites"},
+        {"name": "执行命令", "topic": "MoviePilot/command", "action": "command", "allow": ["/sites", "/subscribes"]},
+    ], ensure_ascii=False)
+
+    # 发布队列
+    publish_queue: Optional[MqttPublishQueue] = None
+    # 订阅者
+    subscriber: Optional[MqttSubscriber] = None
+    # 消息内容编码器，按配置创建
+    _encoder: MqttTextEncoder = MqttTextEncoder()
 
     # log 日志
 
@@ -107,20 +132,34 @@ class MqttClient(_PluginBase):
             self._broker_transport = config.get("transport", "tcp")
             self._broker_username = config.get("username", None)
             self._broker_password = config.get("password", None)
+            self._reconnect_min_delay = self.__to_int(config.get("reconnect_min_delay"), 1, 1)
+            self._reconnect_max_delay = max(self.__to_int(config.get("reconnect_max_delay"), 120, 1),
+                                            self._reconnect_min_delay)
 
             self._publisher_enabled = config.get("published_enabled", False)
             self._publisher_topic = config.get("publisher_topic", "MoviePilot")
             self._publisher_qos = config.get("publisher_qos", 0)
             self._publisher_msgtypes = config.get("publisher_msgtypes", [])
+            self._publisher_encoding = config.get("publisher_encoding", "text")
+            self._publisher_topic_alias = config.get("publisher_topic_alias", True)
+            self._publisher_queue_size = self.__to_int(config.get("publisher_queue_size"), 1000, 1)
+            self._publisher_queue_policy = config.get("publisher_queue_policy", "drop_oldest")
+            self._publisher_max_inflight = self.__to_int(config.get("publisher_max_inflight"), 20, 1)
+            self._publisher_max_queued = self.__to_int(config.get("publisher_max_queued"), 100, 0)
 
             self._subscriber_enabled = config.get("subscriber_enabled", False)
             self._subscriber_onlyonce = config.get("subscriber_onlyonce", False)
+            self._subscriber_workers = self.__to_int(config.get("subscriber_workers"), 4, 1)
+            self._subscriber_rules = config.get("subscriber_rules", "[]")
 
             self._clean_all_log = config.get("clean_all_log", False)
             self._onlyonce_clean = config.get("onlyonce_clean", False)
             self._log_max_lines = config.get("log_max_lines", 100)
 
         self.client_stop()
+        self._init_encoder()
+        self._init_publish_queue()
+        self._init_subscriber()
 
         self._onlyonce_test()
 
@@ -150,10 +189,6 @@ class MqttClient(_PluginBase):
             "enabled": self._enabled,
             "log_clean_enabled": self._log_clean_enabled,
 
-            "now_client_loop_thread_name": self.now_client_loop_thread_name,
-            "now_client_loop_thread_ident": self.now_client_loop_thread_ident,
-            "now_client_id": self.now_client_id,
-
             "anonymous": self._broker_anonymous,
             "client_id": self._broker_client_id,
             "protocol": self._broker_protocol,
@@ -162,6 +197,8 @@ class MqttClient(_PluginBase):
             "transport": self._broker_transport,
             "username": self._broker_username,
             "password": self._broker_password,
+            "reconnect_min_delay": self._reconnect_min_delay,
+            "reconnect_max_delay": self._reconnect_max_delay,
 
             "published_enabled": self._publisher_enabled,
             "publisher_onlyonce": self._publisher_onlyonce,
@@ -169,9 +206,17 @@ class MqttClient(_PluginBase):
             "publisher_topic": self._publisher_topic,
             "publisher_qos": self._publisher_qos,
             "publisher_msgtypes": self._publisher_msgtypes,
+            "publisher_encoding": self._publisher_encoding,
+            "publisher_topic_alias": self._publisher_topic_alias,
+            "publisher_queue_size": self._publisher_queue_size,
+            "publisher_queue_policy": self._publisher_queue_policy,
+            "publisher_max_inflight": self._publisher_max_inflight,
+            "publisher_max_queued": self._publisher_max_queued,
 
             "subscriber_enabled": self._subscriber_enabled,
             "subscriber_onlyonce": self._subscriber_onlyonce,
+            "subscriber_workers": self._subscriber_workers,
+            "subscriber_rules": self._subscriber_rules,
 
             "clean_all_log": self._clean_all_log,
             "onlyonce_clean": self._onlyonce_clean,
@@ -183,6 +228,70 @@ class MqttClient(_PluginBase):
     def get_state(self):
         return self._enabled
 
+    @staticmethod
+    def __to_int(value, default: int, minimum: int) -> int:
+        """
+        数值配置转换，无效时使用默认值
+        """
+        try:
+            return max(int(value), minimum)
+        except (TypeError, ValueError):
+            return default
+
+    def _init_encoder(self):
+        """
+        按配置创建消息内容编码器，依赖未安装时使用 JSON 格式
+        """
+        if self._publisher_encoding not in ENCODERS:
+            self._publisher_encoding = "text"
+        try:
+            self._encoder = build_encoder(self._publisher_encoding)
+        except ImportError as e:
+            logger.warning(f"消息内容格式 {self._publisher_encoding} 不可用，改为使用 JSON 格式 - {e}")
+            self._encoder = build_encoder("json")
+
+    def _init_publish_queue(self):
+        """
+        初始化发布队列，旧队列中未发布的消息随旧队列丢弃
+        """
+        if self.publish_queue:
+            self.publish_queue.stop()
+        aliases = MqttTopicAliases() if self._publisher_topic_alias and self._is_mqttv5() else None
+        self.publish_queue = MqttPublishQueue(get_client=lambda: self.mqtt_client,
+                                              size=self._publisher_queue_size,
+                                              policy=self._publisher_queue_policy,
+                                              aliases=aliases)
+        self.publish_queue.start()
+
+    def _init_subscriber(self):
+        """
+        初始化订阅者，规则无效时不订阅
+        """
+        if self.subscriber:
+            self.subscriber.shutdown()
+            self.subscriber = None
+        if not self._subscriber_enabled:
+            return
+        try:
+            try:
+                rules = json.loads(self._subscriber_rules or "[]")
+            except ValueError as e:
+                raise Exception(f"订阅规则不是有效的JSON - {e}")
+            try:
+                subscriber = MqttSubscriber(rules=rules, handler=self._handle_subscribe,
+                                            max_workers=self._subscriber_workers)
+            except ValueError as e:
+                raise Exception(e)
+            for rule in subscriber.rules:
+                if rule.action == "event" and rule.event not in EventType.__members__:
+                    subscriber.shutdown()
+                    raise Exception(f"订阅规则【{rule.name}】的事件 {rule.event} 不存在")
+            self.subscriber = subscriber
+            logger.info(f"已加载{len(subscriber.rules)}条订阅规则")
+        except Exception as e:
+            logger.error(f"订阅规则加载失败，不订阅任何主题 - 原因 - {e}")
+            self.systemmessage.put(f"MQTT 订阅规则加载失败 - {e}")
+
     @staticmethod
     def get_command() -> List[Dict[str, Any]]:
         pass
@@ -201,7 +310,69 @@ class MqttClient(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        """
+        注册插件API
+        [{
+            "path": "/xx",
+            "endpoint": self.xxx,
+            "methods": ["GET", "POST"],
+            "summary": "API名称",
+            "description": "API说明"
+        }]
+        """
+        return [
+            {
+                "path": "/publisher",
+                "endpoint": self.api_publisher_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 发布队列状态",
+                "description": "查询发布队列的排队数量、在途数量、丢弃数量与发布到确认的延迟"
+            },
+            {
+                "path": "/connection",
+                "endpoint": self.api_connection_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 连接状态",
+                "description": "查询与 MQTT 服务器的连接状态、重连次数、下次重连间隔与最近错误"
+            },
+            {
+                "path": "/subscriber",
+                "endpoint": self.api_subscriber_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 订阅状态",
+                "description": "查询各主题的订阅结果、各订阅规则的命中次数与消息处理统计"
+            },
+        ]
+
+    def api_publisher_stats(self, apikey: str):
+        """
+        API - 发布队列状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self.publish_queue:
+            return schemas.Response(success=False, message="发布队列未启动")
+        return schemas.Response(success=True, data=self.publish_queue.stats())
+
+    def api_connection_stats(self, apikey: str):
+        """
+        API - 连接状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self.supervisor:
+            return schemas.Response(success=False, message="客户端未启动")
+        return schemas.Response(success=True, data=self.supervisor.stats())
+
+    def api_subscriber_stats(self, apikey: str):
+        """
+        API - 订阅状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self.subscriber:
+            return schemas.Response(success=False, message="未启用消息订阅")
+        return schemas.Response(success=True, data=self.subscriber.stats())
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         """
@@ -261,77 +432,6 @@ class MqttClient(_PluginBase):
                             },
                         ]
                     },
-                    {
-                        'component': 'VRow',
-                        'props': {
-                            'align': 'center'
-                        },
-                        'content': [
-                            {
-                                'component': 'VCol',
-                                'props': {
-                                    'cols': 12,
-                                    'md': 4,
-                                },
-                                'content': [
-                                    {
-                                        'component': 'VTextField',
-                                        'props': {
-                                            'model': 'now_client_loop_thread_name',
-                                            'label': '当前客户端保活线程名',
-                                            'placeholder': '未获取到客户端保活线程名',
-                                            'hint': '显示连接后的客户端的保活线程名',
-                                            'persistent-hint': True,
-                                            'readonly': True,
-                                            'active': True,
-                                        },
-                                    },
-                                ]
-                            },
-                            {
-                                'component': 'VCol',
-                                'props': {
-                                    'cols': 12,
-                                    'md': 4,
-                                },
-                                'content': [
-                                    {
-                                        'component': 'VTextField',
-                                        'props': {
-                                            'model': 'now_client_loop_thread_ident',
-                                            'label': '当前客户端保活线程唯一ID',
-                                            'placeholder': '未获取到客户端保活线程唯一ID',
-                                            'hint': '显示连接后的客户端的保活线程唯一ID',
-                                            'persistent-hint': True,
-                                            'readonly': True,
-                                            'active': True,
-                                        },
-                                    },
-                                ]
-                            },
-                            {
-                                'component': 'VCol',
-                                'props': {
-                                    'cols': 12,
-                                    'md': 4,
-                                },
-                                'content': [
-                                    {
-                                        'component': 'VTextField',
-                                        'props': {
-                                            'model': 'now_client_id',
-                                            'label': '当前客户端ID',
-                                            'placeholder': '未获取到客户端ID',
-                                            'hint': '显示连接后的客户端ID',
-                                            'persistent-hint': True,
-                                            'readonly': True,
-                                            'active': True,
-                                        },
-                                    },
-                                ]
-                            },
-                        ]
-                    },
                     {
                         'component': 'VRow',
                         'props': {
@@ -637,6 +737,56 @@ class MqttClient(_PluginBase):
                                             },
                                         ]
                                     },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 6,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'reconnect_min_delay',
+                                                            'label': '首次重连间隔（秒）',
+                                                            'type': 'number',
+                                                            'placeholder': '1',
+                                                            'hint': '断线后首次重连的等待时间，之后每次失败翻倍并加入随机抖动',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 6,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'reconnect_max_delay',
+                                                            'label': '最大重连间隔（秒）',
+                                                            'type': 'number',
+                                                            'placeholder': '120',
+                                                            'hint': '重连等待时间的上限；服务器频繁断开时暂停重连的时间不低于该值',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
                                     {
                                         'component': 'VRow',
                                         'props': {
@@ -792,6 +942,151 @@ class MqttClient(_PluginBase):
                                             },
                                         ]
                                     },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 6
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSelect',
+                                                        'props': {
+                                                            'model': 'publisher_encoding',
+                                                            'label': '消息内容格式',
+                                                            'items': [
+                                                                {'title': '文本', 'value': 'text'},
+                                                                {'title': 'JSON', 'value': 'json'},
+                                                                {'title': 'MessagePack', 'value': 'msgpack'},
+                                                            ],
+                                                            'hint': 'JSON 与 MessagePack 格式便于 HomeAssistant 等设备直接解析',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 6
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'publisher_topic_alias',
+                                                            'label': '主题别名',
+                                                            'hint': '仅 MQTT v5.0 且 Qos 0 时生效；重复的主题只发送 2 字节的别名',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'publisher_queue_size',
+                                                            'label': '发布队列容量',
+                                                            'type': 'number',
+                                                            'placeholder': '1000',
+                                                            'hint': '等待发布的消息数量上限',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSelect',
+                                                        'props': {
+                                                            'model': 'publisher_queue_policy',
+                                                            'label': '队列已满时',
+                                                            'items': [
+                                                                {'title': '丢弃最早的消息', 'value': 'drop_oldest'},
+                                                                {'title': '丢弃新消息', 'value': 'drop_new'},
+                                                                {'title': '等待5秒后丢弃新消息', 'value': 'wait'},
+                                                            ],
+                                                            'hint': '发布队列已满时新消息的处理方式',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'publisher_max_inflight',
+                                                            'label': '在途消息上限',
+                                                            'type': 'number',
+                                                            'placeholder': '20',
+                                                            'hint': 'Qos 1/2 已发出未确认的消息数量上限',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'publisher_max_queued',
+                                                            'label': '客户端排队上限',
+                                                            'type': 'number',
+                                                            'placeholder': '100',
+                                                            'hint': '超出在途上限后在客户端排队的数量上限，0 为不限制',
+                                                            'persistent-hint': True,
+                                                            'active': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
                                     {
                                         'component': 'VRow',
                                         'props': {
@@ -844,7 +1139,9 @@ class MqttClient(_PluginBase):
                                                             'text': '订阅方式：主题名（一级分类）/消息类型（二级分类）\n'
                                                                     '不启动中文模式时，消息订阅："MoviePilot/Plugin"；启动中文模式时，消息订阅："MoviePilot/插件通知"。\n'
                                                                     '"主题名（一级分类）"留空时，根据"中文消息类型名称"状态，填写对应的消息类型即可：如 "插件通知"、"Plugin"。\n'
-                                                                    '注意：每个消息类型都视为单独的订阅渠道，如 ”MoviePilot/插件消息"、"MoviePilot/手动订阅通知" 。\n',
+                                                                    '注意：每个消息类型都视为单独的订阅渠道，如 ”MoviePilot/插件消息"、"MoviePilot/手动订阅通知" 。\n'
+                                                                    'JSON 格式：{"title", "text", "type", "userid", "image", "timestamp"}，type 为消息类型英文名称。\n'
+                                                                    'MessagePack 格式：按顺序编码为数组 [timestamp, type, title, text, userid, image]。\n',
                                                             'style': 'white-space: pre-line;',
                                                         }
                                                     }
@@ -897,11 +1194,127 @@ class MqttClient(_PluginBase):
                                         'component': 'VForm',
                                         'content': [
                                             {
-                                                'component': 'div',
-                                                'text': '预留项，待更新',
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                            'md': 4
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VSwitch',
+                                                                'props': {
+                                                                    'model': 'subscriber_enabled',
+                                                                    'label': '启用消息订阅',
+                                                                    'hint': '订阅主题，按订阅规则执行命令或发送事件',
+                                                                    'persistent-hint': True,
+                                                                }
+                                                            }
+                                                        ]
+                                                    },
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                            'md': 4
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VSwitch',
+                                                                'props': {
+                                                                    'model': 'subscriber_onlyonce',
+                                                                    'label': '订阅测试',
+                                                                    'hint': '保存后输出各主题的订阅结果',
+                                                                    'persistent-hint': True,
+                                                                }
+                                                            }
+                                                        ]
+                                                    },
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                            'md': 4
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VTextField',
+                                                                'props': {
+                                                                    'model': 'subscriber_workers',
+                                                                    'label': '处理线程数量',
+                                                                    'type': 'number',
+                                                                    'placeholder': '4',
+                                                                    'hint': '同时执行订阅规则的线程数量',
+                                                                    'persistent-hint': True,
+                                                                    'active': True,
+                                                                }
+                                                            }
+                                                        ]
+                                                    },
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VAceEditor',
+                                                                'props': {
+                                                                    'modelvalue': 'subscriber_rules',
+                                                                    'lang': 'json',
+                                                                    'theme': 'monokai',
+                                                                    'style': 'height: 20rem; font-size: 14px;',
+                                                                }
+                                                            }
+                                                        ]
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
                                                 'props': {
-                                                    'class': 'text-center',
-                                                }
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VAlert',
+                                                                'props': {
+                                                                    'type': 'info',
+                                                                    'variant': 'tonal',
+                                                                    'text': '订阅规则为JSON数组，每条规则包含：name（名称）、topic（订阅主题，'
+                                                                            '+ 匹配一级，# 匹配之后的全部层级）、qos（0、1、2，默认 0）、action（command 或 event）。\n'
+                                                                            'command：执行 MoviePilot 命令，command 为固定执行的命令（如 /sites），此时忽略消息内容；'
+                                                                            'command 留空时使用消息内容作为命令，命令必须在 allow（允许的命令数组）中且已在 MoviePilot 注册；'
+                                                                            'userid 为执行命令的用户ID，可留空。\n'
+                                                                            'event：发送 MoviePilot 事件，event 为事件名称（如 PluginAction），事件数据为 data，'
+                                                                            '消息内容放在 text 中，JSON 格式的消息内容同时放在 payload 中，并附带收到消息的主题 topic。\n'
+                                                                            '注意：能连接 MQTT 服务器的设备都可以触发规则，请只在可信的服务器上使用。\n'
+                                                                            f'示例：{self.example_subscriber_rules}',
+                                                                    'style': 'white-space: pre-line;',
+                                                                }
+                                                            }
+                                                        ]
+                                                    }
+                                                ]
                                             },
                                         ]
                                     },
@@ -1032,6 +1445,8 @@ class MqttClient(_PluginBase):
             "broker_transport": "tcp",
             "broker_username": None,
             "broker_password": None,
+            "reconnect_min_delay": 1,
+            "reconnect_max_delay": 120,
 
             "published_enabled": False,
             "publish_onlyonce": False,
@@ -1039,6 +1454,17 @@ class MqttClient(_PluginBase):
             "publisher_topic": "MoviePilot",
             "publisher_qos": 2,
             "publisher_msgtypes": [],
+            "publisher_encoding": "text",
+            "publisher_topic_alias": True,
+            "publisher_queue_size": 1000,
+            "publisher_queue_policy": "drop_oldest",
+            "publisher_max_inflight": 20,
+            "publisher_max_queued": 100,
+
+            "subscriber_enabled": False,
+            "subscriber_onlyonce": False,
+            "subscriber_workers": 4,
+            "subscriber_rules": "[]",
 
             "clean_all_log": False,
             "onlyonce_clean": False,
@@ -1047,7 +1473,100 @@ class MqttClient(_PluginBase):
         }
 
     def get_page(self) -> List[dict]:
-        pass
+        """
+        拼装插件详情页面，展示连接状态与发布队列状态
+        """
+        if not self.supervisor:
+            return [
+                {
+                    'component': 'div',
+                    'text': '客户端未启动',
+                    'props': {
+                        'class': 'text-center',
+                    }
+                }
+            ]
+        states = {
+            MqttSupervisor.CONNECTING: "连接中",
+            MqttSupervisor.CONNECTED: "已连接",
+            MqttSupervisor.RECONNECTING: "等待重连",
+            MqttSupervisor.FLAPPING: "频繁断开，暂停重连",
+            MqttSupervisor.STOPPED: "已停止",
+        }
+        connection = self.supervisor.stats()
+        items = [
+            {'name': '连接状态', 'value': states.get(connection["state"], connection["state"])},
+            {'name': '客户端ID', 'value': connection["client_id"]},
+            {'name': '服务器', 'value': connection["broker"]},
+            {'name': '已连接时长（秒）', 'value': connection["connected_for_s"] or '-'},
+            {'name': '连接次数 / 断开次数 / 连接失败次数',
+             'value': f'{connection["connects"]} / {connection["disconnects"]} / {connection["connect_failures"]}'},
+            {'name': '下次重连间隔（秒）', 'value': connection["next_delay_s"] or '-'},
+            {'name': '最近错误', 'value': connection["last_error"] or '-'},
+        ]
+        if self.publish_queue:
+            publisher = self.publish_queue.stats()
+            latency = publisher["ack_latency_ms"]
+            items += [
+                {'name': '发布队列排队 / 容量', 'value': f'{publisher["depth"]} / {publisher["size"]}'},
+                {'name': '在途消息', 'value': publisher["inflight"]},
+                {'name': '已发布 / 已确认 / 丢弃 / 失败',
+                 'value': f'{publisher["published"]} / {publisher["acked"]} / '
+                          f'{publisher["dropped"]} / {publisher["failed"]}'},
+                {'name': '发布到确认延迟 p50 / p99（毫秒）',
+                 'value': f'{latency["p50"] if latency["p50"] is not None else "-"} / '
+                          f'{latency["p99"] if latency["p99"] is not None else "-"}'},
+            ]
+        if self.subscriber:
+            subscriber = self.subscriber.stats()
+            items += [
+                {'name': '订阅消息 收到 / 未匹配 / 已处理 / 失败 / 丢弃',
+                 'value': f'{subscriber["received"]} / {subscriber["unmatched"]} / {subscriber["handled"]} / '
+                          f'{subscriber["failed"]} / {subscriber["dropped"]}'},
+            ]
+            items += [{'name': f'订阅规则【{rule["name"]}】 {rule["topic"]}', 'value': f'命中 {rule["hits"]} 次'}
+                      for rule in subscriber["rules"]]
+        return [
+            {
+                'component': 'VRow',
+                'content': [
+                    {
+                        'component': 'VCol',
+                        'props': {
+                            'cols': 12,
+                        },
+                        'content': [
+                            {
+                                'component': 'VTable',
+                                'props': {
+                                    'hover': True,
+                                },
+                                'content': [
+                                    {
+                                        'component': 'tbody',
+                                        'content': [
+                                            {
+                                                'component': 'tr',
+                                                'content': [
+                                                    {
+                                                        'component': 'td',
+                                                        'text': item['name'],
+                                                    },
+                                                    {
+                                                        'component': 'td',
+                                                        'text': str(item['value']),
+                                                    },
+                                                ]
+                                            } for item in items
+                                        ]
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                ]
+            }
+        ]
 
     def stop_service(self):
         """
@@ -1055,6 +1574,12 @@ class MqttClient(_PluginBase):
         """
         try:
             self.client_stop()
+            if self.publish_queue:
+                self.publish_queue.stop()
+                self.publish_queue = None
+            if self.subscriber:
+                self.subscriber.shutdown()
+                self.subscriber = None
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
                 if self._scheduler.running:
@@ -1165,28 +1690,27 @@ class MqttClient(_PluginBase):
 
     def client_start(self):
         """
-        连接服务器
+        连接服务器，连接与断线重连由连接守护负责
         """
         try:
+            if self.supervisor:
+                self.client_stop()
             broker_address, broker_port, client_id = self.data_validation()
-            self.mqtt_client = mqtt.Client(callback_api_version=CallbackAPIVersion.VERSION2,
-                                           client_id=str(client_id),
-                                           protocol=self._broker_protocol,
-                                           transport=self._broker_transport)
-            if self._broker_username:
-                self.mqtt_client.username_pw_set(username=str(self._broker_username), password=str(self._broker_password))
-            self.mqtt_client.on_connect = self.on_connect
-            self.mqtt_client.connect(host=str(broker_address), port=int(broker_port))
-
-            if self.mqtt_client:
-                self.client_loop_start(client_id=client_id)
-                if self.connect_success:
-                    logger.info(self.connect_type)
-                else:
-                    self.client_stop()
-                    self.mqtt_client = None
-                    raise Exception(self.connect_type)
-            self.__update_config()
+            self.mqtt_client = self._create_client(client_id=client_id)
+            self.supervisor = MqttSupervisor(client=self.mqtt_client, host=str(broker_address), port=int(broker_port),
+                                             client_id=str(client_id),
+                                             min_delay=self._reconnect_min_delay,
+                                             max_delay=self._reconnect_max_delay,
+                                             on_connected=self._on_connected,
+                                             on_disconnected=self._on_disconnected)
+            self.supervisor.start()
+            result = self.supervisor.wait(timeout=10)
+            if result is False:
+                error = self.supervisor.last_error
+                self.client_stop()
+                raise Exception(error)
+            if result is None:
+                logger.warning("暂未连接到 MQTT 服务器，将在后台按重连间隔继续连接")
             return True
         except Exception as e:
             logger.error(f"客户端启动失败 - {e}")
@@ -1194,71 +1718,54 @@ class MqttClient(_PluginBase):
         finally:
             self._clean_log()
 
-    def on_connect(self, _client, _userdata, _connect_flags, _reason_code, _properties):
+    def _create_client(self, client_id):
         """
-        连接回调函数 - API v2.0
+        创建客户端
         """
-        if _reason_code == 0:
-            self.connect_success = True
-            self.connect_type = f"连接成功"
-        else:
-            self.connect_success = False
-            self.connect_type = f"连接失败 - {_reason_code}"
-        logger.debug(self.connect_type)
+        client = mqtt.Client(callback_api_version=CallbackAPIVersion.VERSION2,
+                             client_id=str(client_id),
+                             protocol=self._broker_protocol,
+                             transport=self._broker_transport)
+        if self._broker_username:
+            client.username_pw_set(username=str(self._broker_username), password=str(self._broker_password))
+        client.max_inflight_messages_set(int(self._publisher_max_inflight))
+        client.max_queued_messages_set(int(self._publisher_max_queued))
+        if self.publish_queue:
+            self.publish_queue.forget()
+            client.on_publish = self.publish_queue.on_publish
+        if self.subscriber:
+            client.on_message = self.subscriber.on_message
+            client.on_subscribe = self.subscriber.on_subscribe
+        return client
+
+    def _on_connected(self, properties):
+        """
+        连接建立回调，按服务器允许的数量重置主题别名，并重新订阅主题
+        """
+        if self.publish_queue and self.publish_queue.aliases:
+            self.publish_queue.aliases.reset(properties)
+        if self.subscriber and self.mqtt_client:
+            self.subscriber.subscribe(self.mqtt_client)
 
-    def client_loop_start(self, client_id):
+    def _on_disconnected(self):
         """
-        启动循环进行服务器保活
+        连接断开回调，主题别名只在当前连接内有效
         """
-        try:
-            if self.mqtt_client:
-                self.mqtt_client.loop_start()
-                for thread in threading.enumerate():
-                    if thread.name == f'paho-mqtt-client-{client_id}':
-                        self.now_client_loop_thread_ident = thread.ident
-                        self.now_client_loop_thread_name = thread.name
-                        self.now_client_id = client_id
-                        self.__update_config()
-                        logger.info(f"成功启动保活线程 - 线程名：【 {thread.name} 】 - 线程ID:【 {thread.ident} 】")
-                        break
-            else:
-                raise Exception("未找到客户端对象，无法启动保活线程")
-        except Exception as e:
-            raise Exception(f"保活线程启动失败 - {e}")
+        if self.publish_queue and self.publish_queue.aliases:
+            self.publish_queue.aliases.reset()
 
     def client_stop(self):
         """
         断开服务器
         """
         try:
-            if self.mqtt_client:
-                self.mqtt_client.disconnect()
-            self.client_loop_stop()
-            if self.now_client_id and self.now_client_loop_thread_ident and self.now_client_loop_thread_name:
-                logger.info(f"已终止 【 {self.now_client_id} 】 客户端的保活线程 - "
-                            f"线程名：【 {self.now_client_loop_thread_name} 】 - "
-                            f"线程ID：【 {self.now_client_loop_thread_ident} 】")
-            self.now_client_id = None
-            self.now_client_loop_thread_ident = None
-            self.now_client_loop_thread_name = None
-            self.__update_config()
+            if self.supervisor:
+                self.supervisor.stop()
         except Exception as e:
             logger.error(f"断开 MQTT 服务器连接失败 - {e}")
-
-    def client_loop_stop(self):
-        """
-        断开循环
-        """
-        try:
-            if self.now_client_loop_thread_ident and self.now_client_loop_thread_name:
-                for thread in threading.enumerate():
-                    if (thread.ident == self.now_client_loop_thread_ident and
-                            thread.name == self.now_client_loop_thread_name):
-                        # 设置线程终止标志
-                        thread._thread_terminate = True
-                        break
-        except Exception as e:
-            logger.error(f"后台线程终止失败 - {e}")
+        finally:
+            self.supervisor = None
+            self.mqtt_client = None
 
     # Publisher 发布者
 
@@ -1293,118 +1800,118 @@ class MqttClient(_PluginBase):
 
     def start_publisher(self, msg_type, title, text, image=None, userid=None):
         """
-        发布消息
+        发布消息，消息放入发布队列后立即返回，由发布线程等待连接并发布
         """
-        with Lock:
-            try:
-                if (not self.now_client_id or
-                        not self.mqtt_client or
-                        not self.now_client_loop_thread_ident or
-                        not self.now_client_loop_thread_name):
-                    self.client_stop()
-                    self.client_start()
-                    self.__update_config()
-
-                topic_value, userid_value, title_value, text_value, image_value = (
-                    self._publish_data_check(_msg_type=msg_type, _title=title, _text=text, _image=image,
-                                             _userid=userid, _topic_type=str(self._publisher_topic)))
-                topic, payload = self._publisher_data_build(_topic_value=topic_value, _userid_value=userid_value,
-                                                            _title_value=title_value, _text_value=text_value,
-                                                            _image_value=None)
-                self._publish_message(topic=topic, payload=payload)
-                self.mqtt_client.on_publish = self.on_publish
-                logger.info(f"发布消息成功 - {topic}")
-            except Exception as e:
-                logger.error(f"发布消息失败 - {e}")
-                raise Exception(e)
-            finally:
-                self._clean_log()
+        try:
+            topic = self._publish_topic(msg_type=msg_type)
+            type_name = msg_type.name if isinstance(msg_type, NotificationType) else str(msg_type)
+            payload = self._encoder.encode(topic=topic, msg_type=type_name, title=title, text=text,
+                                           userid=str(userid) if userid else None, image=image)
+            logger.debug(f"发布消息\n{topic}\n{payload}")
+            properties = self._encoder.properties if self._is_mqttv5() else None
+            if self._publish_message(topic=topic, payload=payload, properties=properties):
+                logger.debug(f"消息已加入发布队列 - {topic}")
+        except Exception as e:
+            logger.error(f"发布消息失败 - {e}")
+            raise Exception(e)
+        finally:
+            self._clean_log()
 
-    # TODO: 后续增加图片传送，现在暂时不支持
-    def _publish_data_check(self, _msg_type, _title, _text, _image=None, _userid=None, _topic_type=None):
+    def _publish_topic(self, msg_type) -> str:
         """
-        发布通知校验
+        发布主题：主题名/消息类型
         """
-        if _msg_type:
-            if self._publisher_msgtypes_cn_enabled:
-                if _topic_type:
-                    topic_value = f"{_topic_type}/{_msg_type.value}"
-                else:
-                    topic_value = f"{_msg_type.value}"
-            else:
-                if _topic_type:
-                    topic_value = f"{_topic_type}/{_msg_type.name}"
-                else:
-                    topic_value = f"{_msg_type.name}"
-        else:
+        if not msg_type:
             raise Exception("消息类型不能为空，无法生成主题")
-        if _userid:
-            userid_value = f"用户 {_userid} 的 "
+        if isinstance(msg_type, NotificationType):
+            type_value = msg_type.value if self._publisher_msgtypes_cn_enabled else msg_type.name
         else:
-            userid_value = ""
-        if _title:
-            title_value = f"{_title}"
-        else:
-            title_value = ""
-        if _text:
-            text_value = f"{_text}"
-        else:
-            text_value = ""
-        # TODO: 图片预留
-        # if image and self._send_image:
-        #     image_value = f"图片：{image}"
-        # else:
-        #     image_value = ""
-        # Todo: 暂时不支持图片
-        image_value = None
+            type_value = str(msg_type)
+        if self._publisher_topic:
+            return f"{self._publisher_topic}/{type_value}"
+        return type_value
 
-        return topic_value, userid_value, title_value, text_value, image_value
+    def _is_mqttv5(self) -> bool:
+        try:
+            return int(self._broker_protocol) == mqtt.MQTTv5
+        except (TypeError, ValueError):
+            return False
 
-    @staticmethod
-    def _publisher_data_build(_topic_value, _userid_value, _title_value, _text_value, _image_value=None):
+    def _publish_message(self, topic, payload=None, retain=False, properties=None):
         """
-        消息数据
+        消息放入发布队列
+        :param topic: 消息名，string类型
+        :param payload: 消息内容，string或bytes类型
+        :param properties: MQTTv5 发布属性名与值
+        :return: 是否入队，队列已满被丢弃时为 False
         """
-        topic = f"{_topic_value}"
-        payload = (f"收到 {_userid_value}{_topic_value} 消息"
-                   f"\n "
-                   f"{_title_value}"
-                   f"\n"
-                   f"{_text_value}"
-                   # f"\n"
-                   # f"{_image_value}"
-                   )
-        logger.debug(f"发布消息\n{topic}\n{payload}")
+        if not self.publish_queue:
+            raise Exception("发布队列未启动")
+        return self.publish_queue.put(topic=topic, payload=payload, qos=int(self._publisher_qos),
+                                      retain=retain, properties=properties)
 
-        return topic, payload
+    # Subscriber 订阅者
 
-    def _publish_message(self, topic, payload=None, retain=False, properties=None):
+    def _handle_subscribe(self, rule: MqttSubscribeRule, topic: str, payload: bytes):
         """
-        发布消息
-        :param topic: 消息名，string类型
-        :param payload: 消息内容，string类型
+        执行订阅规则，在订阅者线程池中运行
         """
-        try:
-            if self.mqtt_client:
-                result = self.mqtt_client.publish(topic=topic, payload=payload,
-                                                  qos=self._publisher_qos, retain=retain, properties=properties)
-            else:
-                raise Exception("未连接到 MQTT 服务器")
-            return result
-        except Exception as e:
-            raise Exception(e)
+        content = payload.decode("utf-8", errors="replace").strip() if payload else ""
+        if rule.action == "command":
+            # 固定命令忽略消息内容，消息内容中的命令必须在允许列表中
+            cmd = rule.command or content
+            if not cmd.startswith("/"):
+                raise Exception(f"命令必须以 / 开头 - {cmd}")
+            if not rule.command and cmd.split()[0] not in rule.allow:
+                raise Exception(f"命令不在允许列表中 - {cmd}")
+            if not self._command_registered(cmd.split()[0]):
+                raise Exception(f"命令未注册 - {cmd}")
+            eventmanager.send_event(EventType.CommandExcute, {
+                "cmd": cmd,
+                "user": rule.userid,
+                "channel": None,
+                "source": None,
+            })
+            logger.info(f"收到订阅消息 - {topic} - 执行命令 {cmd}")
+            return
+        # 消息内容只放在 text 与 payload 中，不覆盖规则的 data
+        data = dict(rule.data)
+        if content:
+            data.setdefault("text", content)
+            try:
+                data.setdefault("payload", json.loads(content))
+            except ValueError:
+                pass
+        data["topic"] = topic
+        eventmanager.send_event(EventType[rule.event], data)
+        logger.info(f"收到订阅消息 - {topic} - 发送事件 {rule.event}")
 
     @staticmethod
-    def on_publish(_client, _userdata, mid, _reason_code, _properties=None):
+    def _command_registered(cmd: str) -> bool:
         """
-        MQTT 客户端发布消息回调函数
+        命令是否已在 MoviePilot 注册
+        """
+        # 延迟导入，避免插件加载时循环导入
+        from app.command import Command
+        return bool(Command().get(cmd))
 
-        Args:
-        - client: MQTT 客户端对象
-        - userdata: 用户数据
-        - mid: 消息 ID
+    def _subscriber_test(self):
+        """
+        订阅测试，等待连接与订阅结果并输出
         """
-        logger.info(f"消息 {mid} 已发布")
+        if not self.subscriber:
+            logger.warning("订阅测试 - 未启用消息订阅或订阅规则无效")
+            return
+        if not self.supervisor or not self.supervisor.wait(timeout=10):
+            logger.warning("订阅测试 - 未连接到 MQTT 服务器")
+            return
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if all(self.subscriber.stats()["subscriptions"].values()):
+                break
+            time.sleep(0.1)
+        for topic, result in self.subscriber.stats()["subscriptions"].items():
+            logger.info(f"订阅测试 - {topic} - {result or '未收到订阅结果'}")
 
     # logs 日志清理
 
@@ -1461,19 +1968,17 @@ class MqttClient(_PluginBase):
         with Lock:
             try:
                 if self._publisher_onlyonce or self._subscriber_onlyonce:
-                    if (not self.now_client_id or
-                            not self.mqtt_client or
-                            not self.now_client_loop_thread_ident or
-                            not self.now_client_loop_thread_name):
-                        self.client_stop()
+                    if not self.supervisor:
                         self.client_start()
 
                     if self._publisher_onlyonce:
                         self.start_publisher(msg_type="Test", title="插件测试", text="这是一条测试消息~~~", image=None,
                                              userid="测试用户")
-                    # todo: 订阅测试
+                        # 测试结束后可能断开或更换客户端，等待测试消息发布完成
+                        if not self.publish_queue.flush(timeout=10):
+                            logger.warning("测试消息等待发布超时")
                     if self._subscriber_onlyonce:
-                        pass
+                        self._subscriber_test()
 
                     if not self._enabled:
                         self.client_stop()
@@ -0,0 +1,74 @@
+import json
+import time
+from typing import Any, Dict, Optional, Union
+
+
+class MqttTextEncoder:
+    """
+    文本格式，与旧版本发布的内容一致
+    """
+    name = "text"
+    content_type = "text/plain"
+    # MQTTv5 发布属性
+    properties: Dict[str, Any] = {"PayloadFormatIndicator": 1, "ContentType": content_type}
+
+    def encode(self, topic: str, msg_type: str, title: Optional[str], text: Optional[str],
+               userid: Optional[str] = None, image: Optional[str] = None) -> Union[str, bytes]:
+        userid_value = f"用户 {userid} 的 " if userid else ""
+        return (f"收到 {userid_value}{topic} 消息"
+                f"\n "
+                f"{title or ''}"
+                f"\n"
+                f"{text or ''}")
+
+
+class MqttJsonEncoder(MqttTextEncoder):
+    """
+    JSON 格式：{"title", "text", "type", "userid", "image", "timestamp"}
+    """
+    name = "json"
+    content_type = "application/json"
+    properties = {"PayloadFormatIndicator": 1, "ContentType": content_type}
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def encode(self, topic, msg_type, title, text, userid=None, image=None):
+        return self._encoder.encode({
+            "title": title or "",
+            "text": text or "",
+            "type": msg_type,
+            "userid": userid,
+            "image": image,
+            "timestamp": int(time.time()),
+        })
+
+
+class MqttMsgpackEncoder(MqttTextEncoder):
+    """
+    MessagePack 紧凑格式，按固定顺序编码为数组：[timestamp, type, title, text, userid, image]
+    """
+    name = "msgpack"
+    content_type = "application/msgpack"
+    properties = {"PayloadFormatIndicator": 0, "ContentType": content_type}
+
+    def __init__(self):
+        """
+        :raise ImportError: 未安装 msgpack
+        """
+        import msgpack
+        self._packer = msgpack.Packer(use_bin_type=True)
+
+    def encode(self, topic, msg_type, title, text, userid=None, image=None):
+        return self._packer.pack([int(time.time()), msg_type, title or "", text or "", userid, image])
+
+
+ENCODERS = {encoder.name: encoder for encoder in (MqttTextEncoder, MqttJsonEncoder, MqttMsgpackEncoder)}
+
+
+def build_encoder(name: str) -> MqttTextEncoder:
+    """
+    按配置创建消息内容编码器
+    :raise ImportError: 编码需要的依赖未安装
+    """
+    return ENCODERS.get(name, MqttTextEncoder)()
@@ -0,0 +1,304 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from app.log import logger
+
+
+class MqttTopicAliases:
+    """
+    MQTTv5 主题别名，每个连接按服务器 CONNACK 中的 TopicAliasMaximum 分配，重连后重新分配
+    首次发布携带完整主题与别名，之后只发送别名，主题名只占 2 字节
+    只用于 Qos 0：Qos 1/2 的消息断线后由客户端在新连接上重发，只有别名的消息在新连接上无效
+    """
+
+    def __init__(self, maximum: int = 64):
+        """
+        :param maximum: 客户端使用的别名数量上限，实际数量不超过服务器允许的数量
+        """
+        self.maximum = max(int(maximum), 0)
+        self._lock = threading.Lock()
+        self._limit = 0
+        self._generation = 0
+        self._aliases: Dict[str, int] = {}
+        self._counters = {"aliased": 0, "saved_bytes": 0}
+
+    def reset(self, properties=None):
+        """
+        连接建立后按服务器允许的数量重置别名
+        :param properties: CONNACK 属性
+        """
+        broker_maximum = getattr(properties, "TopicAliasMaximum", 0) or 0
+        with self._lock:
+            self._generation += 1
+            self._aliases.clear()
+            self._limit = min(self.maximum, int(broker_maximum))
+
+    def lookup(self, topic: str, qos: int) -> Tuple[str, Optional[int], Optional[int]]:
+        """
+        :return: (发送的主题, 别名, 新分配别名时的连接代数)，不使用别名时别名为 None
+        """
+        with self._lock:
+            if qos > 0 or not self._limit:
+                return topic, None, None
+            alias = self._aliases.get(topic)
+            if alias:
+                return "", alias, None
+            if len(self._aliases) >= self._limit:
+                return topic, None, None
+            return topic, len(self._aliases) + 1, self._generation
+
+    def confirm(self, topic: str, alias: Optional[int], generation: Optional[int]):
+        """
+        发布成功后记录别名，期间已重连时放弃
+        """
+        if not alias:
+            return
+        with self._lock:
+            if generation is None:
+                self._counters["aliased"] += 1
+                self._counters["saved_bytes"] += len(topic.encode("utf-8"))
+            elif generation == self._generation:
+                self._aliases.setdefault(topic, alias)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"limit": self._limit, "topics": len(self._aliases), **self._counters}
+
+
+class MqttPublishQueue:
+    """
+    消息发布队列，事件处理只负责入队，由后台线程按顺序发布
+    Qos 1/2 的在途窗口与排队数量交给客户端的 max_inflight_messages / max_queued_messages 控制，
+    客户端排队已满或未连接时，消息留在队列中等待重试，队列已满时按策略处理新消息
+    """
+    # 队列已满时的处理策略
+    POLICIES = ("drop_oldest", "drop_new", "wait")
+
+    def __init__(self, get_client: Callable[[], Optional[mqtt.Client]], size: int = 1000,
+                 policy: str = "drop_oldest", wait_timeout: float = 5, retry_interval: float = 1,
+                 window: int = 200, aliases: Optional[MqttTopicAliases] = None):
+        """
+        :param get_client: 获取当前客户端，重连后客户端对象可能变化
+        :param size: 队列容量
+        :param policy: 队列已满时的处理策略，drop_oldest 丢弃最早的消息，drop_new 丢弃新消息，wait 等待 wait_timeout 秒后丢弃新消息
+        :param retry_interval: 未连接或客户端排队已满时的重试间隔（秒）
+        :param window: 延迟统计保存的最近样本数量
+        :param aliases: MQTTv5 主题别名，为 None 时不使用
+        """
+        self._get_client = get_client
+        self.aliases = aliases
+        self.size = max(int(size), 1)
+        self.policy = policy if policy in self.POLICIES else "drop_oldest"
+        self._wait_timeout = wait_timeout
+        self._retry_interval = retry_interval
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=self.size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # 已发布未确认的消息 mid -> 发布时间
+        self._pending: Dict[int, float] = {}
+        # 先于发布记录到达的确认 mid -> 确认时间
+        self._early: Dict[int, float] = {}
+        self._ack_latency: Deque[float] = deque(maxlen=window)
+        self._queue_wait: Deque[float] = deque(maxlen=window)
+        self._counters = {"enqueued": 0, "published": 0, "acked": 0, "dropped": 0, "failed": 0, "retried": 0}
+        self._max_depth = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, name="mqttclient-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def put(self, topic: str, payload: Any, qos: int = 0, retain: bool = False,
+            properties: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        消息入队，不等待发布
+        :param properties: MQTTv5 发布属性名与值，MQTTv3 连接时为 None
+        :return: 是否入队，被丢弃时为 False
+        """
+        item = {"topic": topic, "payload": payload, "qos": qos, "retain": retain,
+                "properties": properties, "time": time.time()}
+        try:
+            if self.policy == "wait":
+                self._queue.put(item, timeout=self._wait_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if self.policy != "drop_oldest":
+                self._count("dropped")
+                logger.warning(f"发布队列已满，丢弃消息 - {topic}")
+                return False
+            try:
+                dropped = self._queue.get_nowait()
+                self._queue.task_done()
+                self._count("dropped")
+                logger.warning(f"发布队列已满，丢弃最早的消息 - {dropped.get('topic')}")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._count("dropped")
+                logger.warning(f"发布队列已满，丢弃消息 - {topic}")
+                return False
+        with self._lock:
+            self._counters["enqueued"] += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+        return True
+
+    def flush(self, timeout: float = 10) -> bool:
+        """
+        等待队列中的消息全部发布并确认
+        :return: 超时前是否全部完成
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                pending = len(self._pending)
+            if not self._queue.unfinished_tasks and not pending:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def forget(self):
+        """
+        丢弃未确认的发布记录，更换客户端后旧客户端的 mid 不会再确认
+        """
+        with self._lock:
+            self._pending.clear()
+            self._early.clear()
+
+    def on_publish(self, _client, _userdata, mid, _reason_code, _properties=None):
+        """
+        发布确认回调，Qos 0 为消息写出时，Qos 1 为收到 PUBACK 时，Qos 2 为收到 PUBCOMP 时
+        """
+        now = time.time()
+        with self._lock:
+            published = self._pending.pop(mid, None)
+            if published is None:
+                self._early[mid] = now
+                return
+            self._ack(now - published)
+        logger.debug(f"消息 {mid} 已发布")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latency = sorted(self._ack_latency)
+            waiting = sorted(self._queue_wait)
+            return {
+                "depth": self._queue.qsize(),
+                "max_depth": self._max_depth,
+                "size": self.size,
+                "policy": self.policy,
+                "inflight": len(self._pending),
+                **self._counters,
+                "topic_alias": self.aliases.stats() if self.aliases else None,
+                "ack_latency_ms": self._percentiles(latency),
+                "queue_wait_ms": self._percentiles(waiting),
+            }
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._publish(item)
+            finally:
+                self._queue.task_done()
+
+    def _publish(self, item: Dict[str, Any]):
+        """
+        发布一条消息，未连接或客户端排队已满时等待重试，停止时放弃
+        """
+        while not self._stop.is_set():
+            client = self._get_client()
+            if not client or not client.is_connected():
+                self._retry()
+                continue
+            topic, alias, generation = item["topic"], None, None
+            if self.aliases and item["properties"] is not None:
+                topic, alias, generation = self.aliases.lookup(item["topic"], item["qos"])
+            started = time.time()
+            try:
+                info = client.publish(topic=topic, payload=item["payload"], qos=item["qos"], retain=item["retain"],
+                                      properties=self._properties(item["properties"], alias))
+            except Exception as e:
+                self._count("failed")
+                logger.error(f"发布消息失败 - {item['topic']} - {e}")
+                return
+            # Qos 1/2 未连接时客户端会保留消息，重连后重发
+            if info.rc == mqtt.MQTT_ERR_SUCCESS or (info.rc == mqtt.MQTT_ERR_NO_CONN and item["qos"] > 0):
+                self._published(info.mid, item, started)
+                if self.aliases:
+                    self.aliases.confirm(item["topic"], alias, generation)
+                logger.info(f"发布消息成功 - {item['topic']}")
+                return
+            if info.rc in (mqtt.MQTT_ERR_QUEUE_SIZE, mqtt.MQTT_ERR_NO_CONN):
+                self._retry()
+                continue
+            self._count("failed")
+            logger.error(f"发布消息失败 - {item['topic']} - {mqtt.error_string(info.rc)}")
+            return
+
+    @staticmethod
+    def _properties(values: Optional[Dict[str, Any]], alias: Optional[int]) -> Optional[Properties]:
+        """
+        MQTTv5 发布属性
+        """
+        if not values and not alias:
+            return None
+        properties = Properties(PacketTypes.PUBLISH)
+        for name, value in (values or {}).items():
+            setattr(properties, name, value)
+        if alias:
+            properties.TopicAlias = alias
+        return properties
+
+    def _published(self, mid: int, item: Dict[str, Any], started: float):
+        with self._lock:
+            self._counters["published"] += 1
+            self._queue_wait.append(started - item["time"])
+            acked = self._early.pop(mid, None)
+            if acked is None:
+                self._pending[mid] = started
+            else:
+                self._ack(max(acked - started, 0))
+
+    def _ack(self, latency: float):
+        self._counters["acked"] += 1
+        self._ack_latency.append(latency)
+
+    def _retry(self):
+        self._count("retried")
+        self._stop.wait(self._retry_interval)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def _percentiles(values) -> Dict[str, Optional[float]]:
+        if not values:
+            return {"p50": None, "p99": None, "max": None}
+        return {
+            "p50": round(values[len(values) // 2] * 1000, 2),
+            "p99": round(values[min(int(round(0.99 * (len(values) - 1))), len(values) - 1)] * 1000, 2),
+            "max": round(values[-1] * 1000, 2),
+        }
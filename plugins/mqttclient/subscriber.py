@@ -0,0 +1,221 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.log import logger
+
+
+class MqttSubscribeRule:
+    """
+    单条订阅规则，主题匹配时执行 action：
+    command 执行 MoviePilot 命令，命令为 command，留空时使用消息内容，消息内容中的命令必须在 allow 中；
+    event 发送 MoviePilot 事件，事件为 event，事件数据为 data，消息内容只放在 text 与 payload 中，不覆盖 data
+    """
+    ACTIONS = ("command", "event")
+
+    def __init__(self, data: Dict[str, Any], index: int):
+        """
+        :raise ValueError: 规则格式错误
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"第{index + 1}条订阅规则不是对象")
+        self.name = str(data.get("name") or f"规则{index + 1}")
+        self.topic = str(data.get("topic") or "")
+        MqttTopicTrie.validate(self.topic, self.name)
+        self.action = data.get("action") or "command"
+        if self.action not in self.ACTIONS:
+            raise ValueError(f"订阅规则【{self.name}】的 action 只能是 {' / '.join(self.ACTIONS)}")
+        self.command = str(data.get("command") or "")
+        allow = data.get("allow") or []
+        if isinstance(allow, str):
+            allow = [allow]
+        if not isinstance(allow, list) or not all(isinstance(cmd, str) and cmd.startswith("/") for cmd in allow):
+            raise ValueError(f"订阅规则【{self.name}】的 allow 必须是以 / 开头的命令数组")
+        self.allow = set(allow)
+        if self.action == "command" and not self.command and not self.allow:
+            raise ValueError(f"订阅规则【{self.name}】没有填写命令 command 或允许的命令 allow")
+        self.event = str(data.get("event") or "")
+        if self.action == "event" and not self.event:
+            raise ValueError(f"订阅规则【{self.name}】没有填写事件 event")
+        self.data = data.get("data") or {}
+        if not isinstance(self.data, dict):
+            raise ValueError(f"订阅规则【{self.name}】的 data 不是对象")
+        self.userid = str(data.get("userid") or "") or None
+        try:
+            self.qos = min(max(int(data.get("qos") or 0), 0), 2)
+        except (TypeError, ValueError):
+            raise ValueError(f"订阅规则【{self.name}】的 qos 只能是 0、1、2")
+        self.hits = 0
+
+
+class _TrieNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.rules: List[MqttSubscribeRule] = []
+
+
+class MqttTopicTrie:
+    """
+    主题树，按层级保存订阅规则，匹配耗时与主题层级数量相关，与规则数量无关
+    + 匹配一个层级，# 匹配当前及之后的全部层级；按 MQTT 规范，通配符不匹配以 $ 开头的一级主题
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    @staticmethod
+    def validate(pattern: str, name: str = ""):
+        """
+        :raise ValueError: 主题格式错误
+        """
+        if not pattern:
+            raise ValueError(f"订阅规则【{name}】没有填写主题 topic")
+        levels = pattern.split("/")
+        for index, level in enumerate(levels):
+            if "#" in level and (level != "#" or index != len(levels) - 1):
+                raise ValueError(f"订阅规则【{name}】的主题 {pattern} 中 # 只能单独作为最后一级")
+            if "+" in level and level != "+":
+                raise ValueError(f"订阅规则【{name}】的主题 {pattern} 中 + 只能单独作为一级")
+
+    def insert(self, pattern: str, rule: MqttSubscribeRule):
+        node = self._root
+        for level in pattern.split("/"):
+            node = node.children.setdefault(level, _TrieNode())
+        node.rules.append(rule)
+
+    def match(self, topic: str) -> List[MqttSubscribeRule]:
+        levels = topic.split("/")
+        system = topic.startswith("$")
+        matched = []
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            wildcard = not (depth == 0 and system)
+            multi = node.children.get("#")
+            if multi and wildcard:
+                matched.extend(multi.rules)
+            if depth == len(levels):
+                matched.extend(node.rules)
+                continue
+            child = node.children.get(levels[depth])
+            if child:
+                stack.append((child, depth + 1))
+            single = node.children.get("+")
+            if single and wildcard:
+                stack.append((single, depth + 1))
+        return matched
+
+
+class MqttSubscriber:
+    """
+    订阅者，连接建立后订阅全部规则的主题，收到消息后在主题树中匹配规则，
+    规则处理提交到线程池执行，不占用客户端的网络线程，处理缓慢也不会影响保活
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], handler: Callable[[MqttSubscribeRule, str, bytes], None],
+                 max_workers: int = 4, max_pending: int = 100):
+        """
+        :param handler: 规则处理函数，参数为 (规则, 主题, 消息内容)
+        :param max_pending: 等待处理的消息数量上限，超出时丢弃新消息
+        :raise ValueError: 规则格式错误
+        """
+        if not isinstance(rules, list):
+            raise ValueError("订阅规则必须是JSON数组")
+        self.rules = [MqttSubscribeRule(data, index) for index, data in enumerate(rules)]
+        self._trie = MqttTopicTrie()
+        for rule in self.rules:
+            self._trie.insert(rule.topic, rule)
+        self._handler = handler
+        self._max_pending = max(int(max_pending), 1)
+        self._executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1),
+                                            thread_name_prefix="mqttclient-subscriber")
+        self._lock = threading.Lock()
+        self._pending = 0
+        # mid -> 订阅的主题
+        self._subscribing: Dict[int, List[str]] = {}
+        self._granted: Dict[str, Optional[str]] = {}
+        self._counters = {"received": 0, "unmatched": 0, "handled": 0, "failed": 0, "dropped": 0}
+
+    def topics(self) -> List[tuple]:
+        """
+        需要订阅的主题与 Qos，同一主题取最高的 Qos
+        """
+        topics: Dict[str, int] = {}
+        for rule in self.rules:
+            topics[rule.topic] = max(topics.get(rule.topic, 0), rule.qos)
+        return list(topics.items())
+
+    def subscribe(self, client):
+        """
+        订阅全部主题，每次连接建立后调用
+        """
+        topics = self.topics()
+        if not topics:
+            return
+        result, mid = client.subscribe(topics)
+        with self._lock:
+            self._granted = {topic: None for topic, _ in topics}
+            if mid is not None:
+                self._subscribing[mid] = [topic for topic, _ in topics]
+        logger.info(f"订阅 {len(topics)} 个主题 - {result}")
+
+    def on_subscribe(self, _client, _userdata, mid, reason_code_list, _properties=None):
+        """
+        订阅结果回调
+        """
+        with self._lock:
+            topics = self._subscribing.pop(mid, [])
+            for topic, reason_code in zip(topics, reason_code_list):
+                self._granted[topic] = str(reason_code)
+                if reason_code.is_failure:
+                    logger.warning(f"订阅主题失败 - {topic} - {reason_code}")
+
+    def on_message(self, _client, _userdata, message):
+        """
+        消息回调，在客户端网络线程中执行，只做匹配与提交
+        """
+        rules = self._trie.match(message.topic)
+        with self._lock:
+            self._counters["received"] += 1
+            if not rules:
+                self._counters["unmatched"] += 1
+                return
+            if self._pending + len(rules) > self._max_pending:
+                self._counters["dropped"] += 1
+                logger.warning(f"订阅消息处理繁忙，丢弃消息 - {message.topic}")
+                return
+            self._pending += len(rules)
+            for rule in rules:
+                rule.hits += 1
+        for rule in rules:
+            self._executor.submit(self._handle, rule, message.topic, message.payload)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                **self._counters,
+                "subscriptions": dict(self._granted),
+                "rules": [{"name": rule.name, "topic": rule.topic, "action": rule.action, "hits": rule.hits}
+                          for rule in self.rules],
+            }
+
+    def _handle(self, rule: MqttSubscribeRule, topic: str, payload: bytes):
+        try:
+            self._handler(rule, topic, payload)
+            self._count("handled")
+        except Exception as e:
+            self._count("failed")
+            logger.error(f"订阅消息处理失败 - 【{rule.name}】 - {topic} - {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
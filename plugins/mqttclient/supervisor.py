@@ -0,0 +1,219 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import paho.mqtt.client as mqtt
+
+from app.log import logger
+
+
+class MqttSupervisor:
+    """
+    连接守护，负责客户端的连接、网络线程的启动与停止，以及断线重连
+    断线后由客户端网络线程自动重连，每次等待前按指数退避计算间隔并加入随机抖动，通过 reconnect_delay_set 设置给客户端
+    连接建立不足 stable_after 秒又断开时退避不重置；flap_window 秒内断开达到 flap_limit 次视为服务器抖动，
+    改为按 flap_cooldown 冷却后再重连，避免形成重连风暴
+    连接状态只保存在内存中，不写入插件配置
+    """
+    # 连接状态
+    STOPPED = "stopped"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    RECONNECTING = "reconnecting"
+    FLAPPING = "flapping"
+
+    def __init__(self, client: mqtt.Client, host: str, port: int, client_id: str, keepalive: int = 60,
+                 min_delay: float = 1, max_delay: float = 120, stable_after: float = 30,
+                 flap_window: float = 300, flap_limit: int = 5, flap_cooldown: float = 600,
+                 on_connected: Optional[Callable[[Any], None]] = None,
+                 on_disconnected: Optional[Callable[[], None]] = None):
+        """
+        :param client: 未连接的客户端，连接回调由守护接管
+        :param min_delay: 首次重连间隔（秒）
+        :param max_delay: 重连间隔上限（秒）
+        :param stable_after: 连接保持超过该时间（秒）后断开，重连间隔从 min_delay 重新开始
+        :param flap_window: 统计断开次数的时间窗口（秒）
+        :param flap_limit: 窗口内断开次数达到该值时进入冷却
+        :param flap_cooldown: 冷却时的重连间隔（秒）
+        :param on_connected: 连接建立后的回调，参数为 CONNACK 属性
+        :param on_disconnected: 连接断开后的回调
+        """
+        self.client = client
+        self.host = host
+        self.port = int(port)
+        self.client_id = client_id
+        self.keepalive = keepalive
+        self.min_delay = max(float(min_delay), 0.1)
+        self.max_delay = max(float(max_delay), self.min_delay)
+        self.stable_after = stable_after
+        self.flap_window = flap_window
+        self.flap_limit = max(int(flap_limit), 1)
+        self.flap_cooldown = max(float(flap_cooldown), self.max_delay)
+        self._on_connected = on_connected
+        self._on_disconnected = on_disconnected
+        self._lock = threading.Lock()
+        self._first_result = threading.Event()
+        self._refused = False
+        self._state = self.STOPPED
+        self._changed = time.time()
+        self._connected_at: Optional[float] = None
+        self._attempts = 0
+        self._next_delay: Optional[float] = None
+        self._disconnects: Deque[float] = deque()
+        self._last_error: Optional[str] = None
+        self._counters = {"connects": 0, "disconnects": 0, "connect_failures": 0, "cooldowns": 0}
+
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_connect_fail = self._on_connect_fail
+        client.reconnect_delay_set(min_delay=self.min_delay, max_delay=self.max_delay)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def last_error(self) -> Optional[str]:
+        return self._last_error
+
+    def start(self):
+        """
+        异步连接并启动网络线程，首次连接失败同样按退避间隔重试
+        """
+        self._set_state(self.CONNECTING)
+        self.client.connect_async(host=self.host, port=self.port, keepalive=self.keepalive)
+        self.client.loop_start()
+        logger.info(f"已启动 【 {self.client_id} 】 客户端的网络线程 - {self.host}:{self.port}")
+
+    def wait(self, timeout: float) -> Optional[bool]:
+        """
+        等待首次连接结果
+        :return: 连接成功为 True，服务器拒绝连接为 False，超时仍未收到服务器响应为 None
+        """
+        if not self._first_result.wait(timeout):
+            return None
+        return not self._refused
+
+    def stop(self):
+        """
+        断开连接并停止网络线程，停止后不再重连
+        """
+        self._set_state(self.STOPPED)
+        try:
+            self.client.disconnect()
+        except Exception as e:
+            logger.debug(f"断开连接失败 - {e}")
+        self.client.loop_stop()
+        logger.info(f"已停止 【 {self.client_id} 】 客户端的网络线程")
+
+    def is_connected(self) -> bool:
+        return self._state == self.CONNECTED and self.client.is_connected()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            return {
+                "state": self._state,
+                "client_id": self.client_id,
+                "broker": f"{self.host}:{self.port}",
+                "state_since": round(now - self._changed, 1),
+                "connected_for_s": round(now - self._connected_at, 1) if self._connected_at else None,
+                "attempts": self._attempts,
+                "next_delay_s": round(self._next_delay, 1) if self._next_delay is not None else None,
+                "recent_disconnects": len(self._disconnects),
+                "last_error": self._last_error,
+                **self._counters,
+            }
+
+    def _on_connect(self, _client, _userdata, _connect_flags, reason_code, properties):
+        """
+        连接回调，服务器拒绝连接时客户端随后会触发断开回调，重连间隔在断开回调中计算
+        """
+        if reason_code.is_failure:
+            with self._lock:
+                self._counters["connect_failures"] += 1
+                self._last_error = f"服务器拒绝连接 - {reason_code}"
+            if not self._first_result.is_set():
+                self._refused = True
+                self._first_result.set()
+            logger.warning(f"连接失败 - {reason_code}")
+            return
+        with self._lock:
+            self._counters["connects"] += 1
+            self._connected_at = time.time()
+            self._next_delay = None
+        if self._on_connected:
+            try:
+                self._on_connected(properties)
+            except Exception as e:
+                logger.error(f"连接建立回调失败 - {e}")
+        self._set_state(self.CONNECTED)
+        self._first_result.set()
+        logger.info(f"连接成功 - {self.host}:{self.port}")
+
+    def _on_disconnect(self, _client, _userdata, _disconnect_flags, reason_code, _properties):
+        if self._on_disconnected:
+            try:
+                self._on_disconnected()
+            except Exception as e:
+                logger.error(f"连接断开回调失败 - {e}")
+        if self._state == self.STOPPED:
+            return
+        now = time.time()
+        with self._lock:
+            if self._connected_at is not None:
+                self._counters["disconnects"] += 1
+                self._disconnects.append(now)
+                # 连接已稳定保持，重连间隔从头开始
+                if now - self._connected_at >= self.stable_after:
+                    self._attempts = 0
+                self._connected_at = None
+                self._last_error = f"连接断开 - {reason_code}"
+        delay = self._schedule(now)
+        logger.warning(f"与 MQTT 服务器的连接已断开 - {reason_code} - {round(delay, 1)} 秒后重连")
+
+    def _on_connect_fail(self, _client, _userdata):
+        if self._state == self.STOPPED:
+            return
+        with self._lock:
+            self._counters["connect_failures"] += 1
+            self._last_error = "无法连接到服务器"
+        delay = self._schedule(time.time())
+        logger.warning(f"无法连接到 MQTT 服务器 {self.host}:{self.port} - {round(delay, 1)} 秒后重连")
+
+    def _schedule(self, now: float) -> float:
+        """
+        计算下次重连间隔并设置给客户端
+        """
+        with self._lock:
+            self._trim(now)
+            self._attempts += 1
+            flapping = len(self._disconnects) >= self.flap_limit
+            if flapping:
+                delay = random.uniform(self.flap_cooldown / 2, self.flap_cooldown)
+                self._counters["cooldowns"] += 1
+            else:
+                delay = min(self.min_delay * 2 ** (self._attempts - 1), self.max_delay)
+                delay = random.uniform(delay / 2, delay)
+            delay = max(delay, 0.1)
+            self._next_delay = delay
+        if flapping and self._state != self.FLAPPING:
+            logger.warning(f"{round(self.flap_window / 60)} 分钟内连接断开 {len(self._disconnects)} 次，"
+                           f"暂停重连 {round(delay)} 秒")
+        self._set_state(self.FLAPPING if flapping else self.RECONNECTING)
+        # 重新设置后客户端的退避从最小值开始，即本次计算的间隔
+        self.client.reconnect_delay_set(min_delay=delay, max_delay=max(delay, self.flap_cooldown))
+        return delay
+
+    def _trim(self, now: float):
+        while self._disconnects and now - self._disconnects[0] > self.flap_window:
+            self._disconnects.popleft()
+
+    def _set_state(self, state: str):
+        with self._lock:
+            if self._state != state:
+                self._state = state
+                self._changed = time.time()
@@ -1,11 +1,17 @@
+import json
+import pytz
+import re
 import shutil
 import socket
+import time
 import requests
 import threading
 import urllib.parse
 
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
 from email.errors import HeaderParseError
-from functools import wraps
+from functools import wraps, partial
 from pathlib import Path
 from typing import Any, List, Dict, Tuple, Union, Optional
 
@@ -13,16 +19,35 @@ import smtplib
 from email.mime.text import MIMEText
 from email.header import Header
 from email.mime.multipart import MIMEMultipart
-from email.mime.image import MIMEImage
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from app import schemas
 from app.core.config import settings
 from app.core.event import eventmanager, Event
 from app.log import logger
 from app.plugins import _PluginBase
 from app.schemas.types import EventType, NotificationType
 
+from app.plugins.smtpmsg.accounts import SmtpAccount, SmtpAccountBalancer
+from app.plugins.smtpmsg.connect import SmtpClient, SmtpConnector, SmtpResolver
+from app.plugins.smtpmsg.dedup import SmtpDedup
+from app.plugins.smtpmsg.digest import SmtpDigest
+from app.plugins.smtpmsg.health import SmtpHealthTracker
+from app.plugins.smtpmsg.imagecache import SmtpImageCache
+from app.plugins.smtpmsg.imageproc import SmtpImageProcessor
+from app.plugins.smtpmsg.mime import SmtpEncodedMessage, SmtpMimePartCache
+from app.plugins.smtpmsg.outbox import SmtpOutbox
+from app.plugins.smtpmsg.pool import SmtpSessionPool
+from app.plugins.smtpmsg.quota import SmtpQuota
+from app.plugins.smtpmsg.recipients import SmtpRecipientStats, SmtpShardSender
+from app.plugins.smtpmsg.routing import SmtpRecipientRouter
+from app.plugins.smtpmsg.rules import SmtpMsgRuleEngine
+from app.plugins.smtpmsg.spool import SmtpSpool
+from app.plugins.smtpmsg.template import SmtpTemplateCache
+from app.plugins.smtpmsg.timeouts import SmtpAdaptiveTimeout
+from app.plugins.smtpmsg.tracing import SmtpTracer
+
 SmtpMsgLock = threading.Lock()
 
 
@@ -34,6 +59,8 @@ class SmtpMsgDecorator:
     log_more = False
     max_lines = 0
     log_path = None
+    # 各阶段耗时统计
+    tracer = SmtpTracer()
 
     @classmethod
     def set(cls, enabled_max_lines, max_lines, log_more, log_path):
@@ -46,14 +73,19 @@ class SmtpMsgDecorator:
         cls.enabled_max_lines = enabled_max_lines
 
     @classmethod
-    def log(cls, mode_name):
+    def log(cls, mode_name, stage=None):
         """
-        日志装饰器
+        日志装饰器，同时记录模块耗时
+        日志内容可以是返回字符串的函数，只在需要输出时才格式化，未开启详细日志时跳过汇报级别日志的格式化
+        :param stage: 耗时统计中的阶段名称，默认与模块名称一致
         """
+        stage = stage or mode_name
+
         def log_decorator(func):
             @wraps(func)
             def log_wrapper(*args, **kwargs):
                 logs = {'msg': "没有日志", 'level': 1}
+                start = cls.tracer.begin()
                 try:
                     if cls.log_more:
                         logger.info(f"日志汇报 - 状态 - {mode_name}模块 - 开始运行")
@@ -66,6 +98,9 @@ class SmtpMsgDecorator:
                 finally:
                     level = logs['level']
                     msg = logs['msg']
+                    cls.tracer.end(stage, start, success=level != -1)
+                    if callable(msg) and (level != 1 or cls.log_more):
+                        msg = msg()
                     if level == 0:
                         logger.info(f"日志汇报 - 状态 - {msg}")
                     elif level == 1:
@@ -79,7 +114,7 @@ class SmtpMsgDecorator:
                         logger.error(f"日志汇报 - 错误 - {msg}")
                     else:
                         logger.warning(f"日志汇报 - 未知 - {msg}")
-                    if level == (0 or 1 or 2):
+                    if cls.log_more and level in (0, 1, 2):
                         logger.info(f"日志汇报 - 状态 - {mode_name}模块 - 运行完成")
             return log_wrapper
         return log_decorator
@@ -121,7 +156,7 @@ class SmtpMsg(_PluginBase):
     # 插件图标
     plugin_icon = "Synomail_A.png"
     # 插件版本
-    plugin_version = "3.0"
+    plugin_version = "3.21"
     # 插件作者
     plugin_author = "Aqr-K"
     # 作者主页
@@ -141,31 +176,57 @@ class SmtpMsg(_PluginBase):
     custom_template_dir: Path = settings.PLUGIN_DATA_PATH / "smtpmsg" / "template"
     custom_template: Path = custom_template_dir / "custom.html"
     _test_image: Path = settings.CONFIG_PATH / ".." / "app" / "plugins" / "smtpmsg" / "Synomail_A.png"
+    # 单条消息最多嵌入的图片数量
+    gallery_max_images: int = 6
     log_path: Path = settings.LOG_PATH / "plugins" / "smtpmsg.log"
+    # 模板缓存，文件变化时自动重新编译
+    _template_cache: SmtpTemplateCache = SmtpTemplateCache(
+        fields=("text", "image", "title", "userid", "msg_type", "digest", "gallery"))
+    image_cache_dir: Path = settings.PLUGIN_DATA_PATH / "smtpmsg" / "image_cache"
+    spool_path: Path = settings.PLUGIN_DATA_PATH / "smtpmsg" / "spool.db"
+    custom_rules: Path = settings.PLUGIN_DATA_PATH / "smtpmsg" / "rules.json"
+    # 过滤规则示例，只在说明中展示，默认不启用任何规则
+    example_msg_rules = json.dumps([{
+        "name": "夜间不发送站点消息", "action": "exclude", "match": "keyword",
+        "msg_type": ["SiteMessage"], "time": ["23:00-07:00"]
+    }], ensure_ascii=False)
+    # 收件人路由示例，只在说明中展示，默认不启用任何路由
+    example_recipient_routes = json.dumps([{
+        "name": "用户1的下载消息", "userid": ["1"], "msg_type": ["Download"], "mail": ["user1@example.com"]
+    }], ensure_ascii=False)
+    # Github官方域名，使用Github加速站获取
+    _github_domains = ['github.com', 'githubapp.com', 'githubengineering.com', 'githubstatus.com',
+                       'github.blog', 'githubusercontent.com', 'github.dev', 'githubtraining.com',
+                       'github.io', 'githubcloud.com', 'githubpages.com']
+
+    # 默认账号列表
+    default_smtp_accounts = json.dumps([{
+        "name": "默认账号", "host": "", "port": 465, "encryption": "ssl", "mail": "", "password": "",
+        "enabled": True, "weight": 1, "minute_limit": 0, "hourly_limit": 0, "daily_limit": 0
+    }], ensure_ascii=False, indent=2)
 
     # 私有属性
     _enabled: bool = False
     _test: bool = False
     _server_timeout: Union[float, int, None] = 10
 
-    _main: bool = True
-    _main_smtp_host: Optional[str] = None
-    _main_smtp_port: Optional[int] = None
-    _main_smtp_encryption: Optional[str] = "not_encrypted"
-    _main_sender_mail: Optional[str] = None
-    _main_sender_password: Optional[str] = None
-
-    _secondary: bool = False
-    _secondary_smtp_host: Optional[str] = None
-    _secondary_smtp_port: Optional[int] = None
-    _secondary_smtp_encryption: Optional[str] = "not_encrypted"
-    _secondary_sender_mail: Optional[str] = None
-    _secondary_sender_password: Optional[str] = None
+    # SMTP账号列表，JSON格式
+    _smtp_accounts: Optional[str] = "[]"
+    _balance_mode: Optional[str] = "failover"
+    _quota_merge: bool = True
 
     _send_image: bool = False
     _enabled_proxy_image: bool = True
     _enabled_github_proxy_image: bool = True
     _image_timeout: Union[float, int, None] = 10
+    _enabled_image_cache: bool = True
+    _enabled_image_disk_cache: bool = False
+    _image_cache_size: Optional[int] = 32
+    _image_cache_ttl: Optional[int] = 3600
+    _enabled_image_process: bool = False
+    _image_max_size: Optional[int] = 800
+    _image_format: Optional[str] = "jpeg"
+    _image_quality: Optional[int] = 80
     _sender_name: Optional[str] = None
     _receiver_mail: Optional[str] = None
     _msgtypes: List[str] = []
@@ -178,6 +239,37 @@ class SmtpMsg(_PluginBase):
 
     _enabled_msg_rules: bool = False
     _enabled_customizable_msg_rules: bool = False
+    _msg_rules: Optional[str] = "[]"
+    _enabled_recipient_routes: bool = False
+    _recipient_routes: Optional[str] = "[]"
+
+    _enabled_smtp_pool: bool = True
+    _smtp_pool_idle_timeout: Union[float, int, None] = 60
+    _enabled_pipeline: bool = True
+    _enabled_circuit_breaker: bool = True
+    _circuit_failure_threshold: Optional[int] = 3
+    _circuit_open_seconds: Union[float, int, None] = 60
+    _enabled_hedged: bool = False
+    _hedge_delay: Union[float, int, None] = 2
+    _enabled_adaptive_timeout: bool = True
+    _adaptive_timeout_factor: Union[float, int, None] = 3
+    _adaptive_timeout_min: Union[float, int, None] = 2
+    _adaptive_timeout_max: Union[float, int, None] = 30
+    _enabled_outbox: bool = True
+    _outbox_size: Optional[int] = 100
+    _outbox_workers: Optional[int] = 1
+    _outbox_policy: Optional[str] = "drop_oldest"
+    _enabled_digest: bool = False
+    _digest_window: Union[float, int, None] = 60
+    _digest_max_count: Optional[int] = 20
+    _recipient_chunk_size: Optional[int] = 50
+    _recipient_concurrency: Optional[int] = 2
+    _enabled_dedup: bool = True
+    _dedup_window: Union[float, int, None] = 60
+    _enabled_spool: bool = True
+    _spool_max_count: Optional[int] = 500
+    _spool_max_age: Union[float, int, None] = 24
+    _spool_drain_rate: Optional[int] = 10
 
     _log_more: bool = False
     _clean_all_log: bool = False
@@ -187,36 +279,67 @@ class SmtpMsg(_PluginBase):
 
     _scheduler: Optional[BackgroundScheduler] = BackgroundScheduler(timezone=settings.TZ)
     _event = threading.Event()
+    # 后台任务线程，用于邮件预构建与对冲连接
+    _prepare_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="SmtpMsgPrepare")
+    # 图片获取在邮件构建线程中提交，单独使用线程池，避免与邮件构建互相等待
+    _image_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="SmtpMsgImage")
+    _health: Optional[SmtpHealthTracker] = None
+    # 解析后的超时时间配置，自适应超时样本不足时使用
+    _server_timeout_value: float = 10
+    _image_timeout_value: float = 10
+    _server_timeouts: Optional[SmtpAdaptiveTimeout] = None
+    _image_timeouts: Optional[SmtpAdaptiveTimeout] = None
+    # 编码后的图片附件，按图片内容复用
+    _mime_part_cache: SmtpMimePartCache = SmtpMimePartCache()
+    # 各收件人的发送结果
+    _recipient_stats: SmtpRecipientStats = SmtpRecipientStats()
+    _balancer: Optional[SmtpAccountBalancer] = None
+    _resolver: SmtpResolver = SmtpResolver(ttl=300)
+    _connectors: Dict[tuple, SmtpConnector] = {}
+    _connector_lock = threading.Lock()
+    _rule_engine: Optional[SmtpMsgRuleEngine] = None
+    _quota: Optional[SmtpQuota] = None
+    _router: Optional[SmtpRecipientRouter] = None
+    _smtp_pool: Optional[SmtpSessionPool] = None
+    _outbox: Optional[SmtpOutbox] = None
+    _digest: Optional[SmtpDigest] = None
+    _spool: Optional[SmtpSpool] = None
+    _dedup: Optional[SmtpDedup] = None
+    _image_cache: Optional[SmtpImageCache] = None
+    _image_processor: Optional[SmtpImageProcessor] = None
 
     def init_plugin(self, config: dict = None):
         """
         初始化插件
         """
         logger.info(f"日志汇报 - 初始化插件 - {self.plugin_name}")
+        # 先停止旧的发件队列，避免旧发送线程在读取新配置或测试期间继续发送
+        self._stop_outbox()
         # 读取配置
         if config:
             self._enabled = config.get("enabled", False)
             self._test = config.get("test", False)
             self._server_timeout = config.get("server_timeout")
 
-            self._main = config.get("main", True)
-            self._main_smtp_host = config.get("main_smtp_host", )
-            self._main_smtp_port = config.get("main_smtp_port", )
-            self._main_smtp_encryption = config.get("main_smtp_encryption", "not_encrypted")
-            self._main_sender_mail = config.get("main_sender_mail", )
-            self._main_sender_password = config.get("main_sender_password", )
-
-            self._secondary = config.get("secondary", False)
-            self._secondary_smtp_host = config.get("secondary_smtp_host", )
-            self._secondary_smtp_port = config.get("secondary_smtp_port", )
-            self._secondary_smtp_encryption = config.get("secondary_smtp_encryption", "not_encrypted")
-            self._secondary_sender_mail = config.get("secondary_sender_mail", )
-            self._secondary_sender_password = config.get("secondary_sender_password", )
+            # 旧版主服务器与备用服务器配置，自动迁移为账号列表
+            migrated = "smtp_accounts" not in config
+            self._smtp_accounts = (config.get("smtp_accounts") if not migrated
+                                   else self._migrate_smtp_accounts(config))
+            self._balance_mode = config.get("balance_mode", "failover")
+            self._quota_merge = config.get("quota_merge", True)
 
             self._send_image = config.get("enabled_image_send", False)
             self._enabled_proxy_image = config.get("enabled_proxy_image", True)
             self._enabled_github_proxy_image = config.get("enabled_github_proxy_image", True)
             self._image_timeout = config.get("image_timeout")
+            self._enabled_image_cache = config.get("enabled_image_cache", True)
+            self._enabled_image_disk_cache = config.get("enabled_image_disk_cache", False)
+            self._image_cache_size = config.get("image_cache_size", 32)
+            self._image_cache_ttl = config.get("image_cache_ttl", 3600)
+            self._enabled_image_process = config.get("enabled_image_process", False)
+            self._image_max_size = config.get("image_max_size", 800)
+            self._image_format = config.get("image_format", "jpeg")
+            self._image_quality = config.get("image_quality", 80)
             self._sender_name = config.get("sender_name", )
             self._receiver_mail = config.get("receiver_mail", "")
             self._msgtypes = config.get("msgtypes", [])
@@ -225,10 +348,42 @@ class SmtpMsg(_PluginBase):
             self._enabled_customizable_mail_template = config.get("enabled_customizable_mail_template", False)
             self._save = config.get("save", False)
             self._reset = config.get("reset", False)
-            self._content = config.get("content", self.custom_template.read_text(encoding="utf-8"))
+            self._content = (config.get("content") if "content" in config
+                             else self._template_cache.read_text(self.custom_template))
 
             self._enabled_msg_rules = config.get("enabled_msg_rules", False)
             self._enabled_customizable_msg_rules = config.get("enabled_customizable_msg_rules", False)
+            self._msg_rules = config.get("msg_rules", "[]")
+            self._enabled_recipient_routes = config.get("enabled_recipient_routes", False)
+            self._recipient_routes = config.get("recipient_routes", "[]")
+
+            self._enabled_smtp_pool = config.get("enabled_smtp_pool", True)
+            self._smtp_pool_idle_timeout = config.get("smtp_pool_idle_timeout", 60)
+            self._enabled_pipeline = config.get("enabled_pipeline", True)
+            self._enabled_circuit_breaker = config.get("enabled_circuit_breaker", True)
+            self._circuit_failure_threshold = config.get("circuit_failure_threshold", 3)
+            self._circuit_open_seconds = config.get("circuit_open_seconds", 60)
+            self._enabled_hedged = config.get("enabled_hedged", False)
+            self._hedge_delay = config.get("hedge_delay", 2)
+            self._enabled_adaptive_timeout = config.get("enabled_adaptive_timeout", True)
+            self._adaptive_timeout_factor = config.get("adaptive_timeout_factor", 3)
+            self._adaptive_timeout_min = config.get("adaptive_timeout_min", 2)
+            self._adaptive_timeout_max = config.get("adaptive_timeout_max", 30)
+            self._enabled_outbox = config.get("enabled_outbox", True)
+            self._outbox_size = config.get("outbox_size", 100)
+            self._outbox_workers = config.get("outbox_workers", 1)
+            self._outbox_policy = config.get("outbox_policy", "drop_oldest")
+            self._enabled_digest = config.get("enabled_digest", False)
+            self._digest_window = config.get("digest_window", 60)
+            self._digest_max_count = config.get("digest_max_count", 20)
+            self._recipient_chunk_size = config.get("recipient_chunk_size", 50)
+            self._recipient_concurrency = config.get("recipient_concurrency", 2)
+            self._enabled_dedup = config.get("enabled_dedup", True)
+            self._dedup_window = config.get("dedup_window", 60)
+            self._enabled_spool = config.get("enabled_spool", True)
+            self._spool_max_count = config.get("spool_max_count", 500)
+            self._spool_max_age = config.get("spool_max_age", 24)
+            self._spool_drain_rate = config.get("spool_drain_rate", 10)
 
             self._log_more = config.get("log_more", False)
             self._clean_all_log = config.get("clean_all_log", False)
@@ -239,7 +394,24 @@ class SmtpMsg(_PluginBase):
                              log_path=self.log_path, enabled_max_lines=self._enabled_max_lines)
         self._check_path()
         self._template_settings()
+        self._compile_template()
+        self._rule_engine = self.__read_json_filter() if self._enabled_msg_rules else None
+        self._router = self.__read_recipient_routes() if self._enabled_recipient_routes else None
+        self._init_image_cache()
+        self._init_image_processor()
+        self._init_smtp_pool()
+        self._init_health()
+        self._init_timeouts()
+        self._init_accounts()
+        self._init_quota()
+        self._init_connectors()
+        self._init_spool()
+        if config and migrated:
+            self.__update_config()
         self._run_plugin()
+        self._init_outbox()
+        self._init_digest()
+        self._init_dedup()
         self._onlyonce_clean_logs()
 
     def __update_config(self):
@@ -251,24 +423,22 @@ class SmtpMsg(_PluginBase):
             'test': self._test,
             'server_timeout': self._server_timeout,
 
-            'main': self._main,
-            'main_smtp_host': self._main_smtp_host,
-            'main_smtp_port': self._main_smtp_port,
-            'main_smtp_encryption': self._main_smtp_encryption,
-            'main_sender_mail': self._main_sender_mail,
-            'main_sender_password': self._main_sender_password,
-
-            'secondary': self._secondary,
-            'secondary_smtp_host': self._secondary_smtp_host,
-            'secondary_smtp_port': self._secondary_smtp_port,
-            'secondary_smtp_encryption': self._secondary_smtp_encryption,
-            'secondary_sender_mail': self._secondary_sender_mail,
-            'secondary_sender_password': self._secondary_sender_password,
+            'smtp_accounts': self._smtp_accounts,
+            'balance_mode': self._balance_mode,
+            'quota_merge': self._quota_merge,
 
             'enabled_image_send': self._send_image,
             'enabled_proxy_image': self._enabled_proxy_image,
             'enabled_github_proxy_image': self._enabled_github_proxy_image,
             'image_timeout': self._image_timeout,
+            'enabled_image_cache': self._enabled_image_cache,
+            'enabled_image_disk_cache': self._enabled_image_disk_cache,
+            'image_cache_size': self._image_cache_size,
+            'image_cache_ttl': self._image_cache_ttl,
+            'enabled_image_process': self._enabled_image_process,
+            'image_max_size': self._image_max_size,
+            'image_format': self._image_format,
+            'image_quality': self._image_quality,
             'sender_name': self._sender_name,
             'receiver_mail': self._receiver_mail,
             'msgtypes': self._msgtypes,
@@ -277,10 +447,41 @@ class SmtpMsg(_PluginBase):
             'enabled_customizable_mail_template': self._enabled_customizable_mail_template,
             'save': self._save,
             'reset': self._reset,
-            'content': self.custom_template.read_text(encoding="utf-8"),
+            'content': self._template_cache.read_text(self.custom_template),
 
             'enabled_msg_rules': self._enabled_msg_rules,
             'enabled_customizable_msg_rules': self._enabled_customizable_msg_rules,
+            'msg_rules': self._msg_rules,
+            'enabled_recipient_routes': self._enabled_recipient_routes,
+            'recipient_routes': self._recipient_routes,
+
+            'enabled_smtp_pool': self._enabled_smtp_pool,
+            'smtp_pool_idle_timeout': self._smtp_pool_idle_timeout,
+            'enabled_pipeline': self._enabled_pipeline,
+            'enabled_circuit_breaker': self._enabled_circuit_breaker,
+            'circuit_failure_threshold': self._circuit_failure_threshold,
+            'circuit_open_seconds': self._circuit_open_seconds,
+            'enabled_hedged': self._enabled_hedged,
+            'hedge_delay': self._hedge_delay,
+            'enabled_adaptive_timeout': self._enabled_adaptive_timeout,
+            'adaptive_timeout_factor': self._adaptive_timeout_factor,
+            'adaptive_timeout_min': self._adaptive_timeout_min,
+            'adaptive_timeout_max': self._adaptive_timeout_max,
+            'enabled_outbox': self._enabled_outbox,
+            'outbox_size': self._outbox_size,
+            'outbox_workers': self._outbox_workers,
+            'outbox_policy': self._outbox_policy,
+            'enabled_digest': self._enabled_digest,
+            'digest_window': self._digest_window,
+            'digest_max_count': self._digest_max_count,
+            'recipient_chunk_size': self._recipient_chunk_size,
+            'recipient_concurrency': self._recipient_concurrency,
+            'enabled_dedup': self._enabled_dedup,
+            'dedup_window': self._dedup_window,
+            'enabled_spool': self._enabled_spool,
+            'spool_max_count': self._spool_max_count,
+            'spool_max_age': self._spool_max_age,
+            'spool_drain_rate': self._spool_drain_rate,
 
             'log_more': self._log_more,
             'clean_all_log': self._clean_all_log,
@@ -298,7 +499,102 @@ class SmtpMsg(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        """
+        注册插件API
+        [{
+            "path": "/xx",
+            "endpoint": self.xxx,
+            "methods": ["GET", "POST"],
+            "summary": "API名称",
+            "description": "API说明"
+        }]
+        """
+        return [
+            {
+                "path": "/outbox",
+                "endpoint": self.api_outbox_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 发件队列状态",
+                "description": "查询发件队列的排队数量、等待时间与处理统计"
+            },
+            {
+                "path": "/image_cache",
+                "endpoint": self.api_image_cache_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 图片缓存状态",
+                "description": "查询图片缓存的占用与命中统计"
+            },
+            {
+                "path": "/health",
+                "endpoint": self.api_health_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 服务器健康状态",
+                "description": "查询各SMTP账号的熔断状态、连续失败次数、最近错误与平均耗时"
+            },
+            {
+                "path": "/accounts",
+                "endpoint": self.api_account_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 账号负载",
+                "description": "查询各SMTP账号的进行中数量、最近一小时与一天的发送数量、发送上限与剩余发送额度"
+            },
+            {
+                "path": "/recipients",
+                "endpoint": self.api_recipient_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 收件人发送结果",
+                "description": "查询各收件人的发送成功次数、失败次数与最近的错误"
+            },
+            {
+                "path": "/dedup",
+                "endpoint": self.api_dedup_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 消息去重",
+                "description": "查询去重记录数量与被去重的消息数量"
+            },
+            {
+                "path": "/rules",
+                "endpoint": self.api_rule_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 过滤规则",
+                "description": "查询已加载的过滤规则与命中次数"
+            },
+            {
+                "path": "/routes",
+                "endpoint": self.api_route_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 收件人路由",
+                "description": "查询已加载的收件人路由与命中次数"
+            },
+            {
+                "path": "/spool",
+                "endpoint": self.api_spool_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 重试队列状态",
+                "description": "查询重试队列中的消息数量、最早消息时间与下次重试时间"
+            },
+            {
+                "path": "/connect",
+                "endpoint": self.api_connect_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 连接建立",
+                "description": "查询DNS缓存命中情况与各服务器的TLS握手、会话恢复次数"
+            },
+            {
+                "path": "/timeouts",
+                "endpoint": self.api_timeout_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 自适应超时",
+                "description": "查询各服务器与图片域名的耗时样本数量、超时次数、p99耗时与当前超时时间"
+            },
+            {
+                "path": "/trace",
+                "endpoint": self.api_trace_stats,
+                "methods": ["GET"],
+                "summary": f"{self.plugin_name} - 阶段耗时",
+                "description": "查询各发送阶段的耗时分位数（p50/p95/p99）与最近的发送记录"
+            }
+        ]
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         MsgTypeOptions = []
@@ -378,7 +674,7 @@ class SmtpMsg(_PluginBase):
                                             'model': 'server_timeout',
                                             'label': '超时时间（秒）',
                                             'placeholder': '10',
-                                            'hint': '连接时的超时时间，默认10秒',
+                                            'hint': '连接时的超时时间，默认10秒，启用自适应超时时用于样本不足的服务器',
                                             'persistent-hint': True,
                                             # 'suffix': '秒',
                                             'clearable': True,
@@ -403,50 +699,50 @@ class SmtpMsg(_PluginBase):
                             {
                                 'component': 'VTab',
                                 'props': {
-                                    'value': 'main_smtp',
+                                    'value': 'smtp_accounts',
                                     'style': {
                                         'padding-top': '10px',
                                         'padding-bottom': '10px',
                                         'font-size': '16px'
                                     },
                                 },
-                                'text': '主SMTP服务器'
+                                'text': 'SMTP账号'
                             },
                             {
                                 'component': 'VTab',
                                 'props': {
-                                    'value': 'secondary_smtp',
+                                    'value': 'email_setting',
                                     'style': {
                                         'padding-top': '10px',
                                         'padding-bottom': '10px',
                                         'font-size': '16px'
                                     },
                                 },
-                                'text': '备用SMTP服务器'
+                                'text': '邮件设置'
                             },
                             {
                                 'component': 'VTab',
                                 'props': {
-                                    'value': 'email_setting',
+                                    'value': 'custom_template',
                                     'style': {
                                         'padding-top': '10px',
                                         'padding-bottom': '10px',
                                         'font-size': '16px'
                                     },
                                 },
-                                'text': '邮件设置'
+                                'text': '自定义邮件模板'
                             },
                             {
                                 'component': 'VTab',
                                 'props': {
-                                    'value': 'custom_template',
+                                    'value': 'advanced_setting',
                                     'style': {
                                         'padding-top': '10px',
                                         'padding-bottom': '10px',
                                         'font-size': '16px'
                                     },
                                 },
-                                'text': '自定义邮件模板'
+                                'text': '高级设置'
                             },
                             {
                                 'component': 'VTab',
@@ -460,20 +756,30 @@ class SmtpMsg(_PluginBase):
                                 },
                                 'text': '日志设置'
                             },
-                            # Todo: 未完成，暂时不显示
-                            # {
-                            #     'component': 'VTab',
-                            #     'disabled': "true",
-                            #     'props': {
-                            #         'value': 'msg_rules',
-                            #         'style': {
-                            #             'padding-top': '10px',
-                            #             'padding-bottom': '10px',
-                            #             'font-size': '16px'
-                            #         },
-                            #     },
-                            #     'text': '消息过滤'
-                            # },
+                            {
+                                'component': 'VTab',
+                                'props': {
+                                    'value': 'msg_rules',
+                                    'style': {
+                                        'padding-top': '10px',
+                                        'padding-bottom': '10px',
+                                        'font-size': '16px'
+                                    },
+                                },
+                                'text': '消息过滤'
+                            },
+                            {
+                                'component': 'VTab',
+                                'props': {
+                                    'value': 'recipient_routes',
+                                    'style': {
+                                        'padding-top': '10px',
+                                        'padding-bottom': '10px',
+                                        'font-size': '16px'
+                                    },
+                                },
+                                'text': '收件人路由'
+                            },
                         ]
                     },
                     {
@@ -485,7 +791,7 @@ class SmtpMsg(_PluginBase):
                             {
                                 'component': 'VWindowItem',
                                 'props': {
-                                    'value': 'main_smtp',
+                                    'value': 'smtp_accounts',
                                     'style': {
                                         'padding-top': '20px',
                                         'padding-bottom': '20px'
@@ -509,11 +815,16 @@ class SmtpMsg(_PluginBase):
                                                         },
                                                         'content': [
                                                             {
-                                                                'component': 'VSwitch',
+                                                                'component': 'VSelect',
                                                                 'props': {
-                                                                    'model': 'main',
-                                                                    'label': '启用主服务器',
-                                                                    'hint': '允许使用主服务器发送消息',
+                                                                    'model': 'balance_mode',
+                                                                    'label': '账号选择方式',
+                                                                    'items': [
+                                                                        {'title': '按顺序', 'value': 'failover'},
+                                                                        {'title': '加权轮询', 'value': 'weighted'},
+                                                                        {'title': '最少负载', 'value': 'least_loaded'},
+                                                                    ],
+                                                                    'hint': '多个账号之间分配发送的方式',
                                                                     'persistent-hint': True,
                                                                 }
                                                             }
@@ -523,42 +834,15 @@ class SmtpMsg(_PluginBase):
                                                         'component': 'VCol',
                                                         'props': {
                                                             'cols': 12,
-                                                            'md': 9
-                                                        },
-                                                        'content': [
-                                                            {
-                                                                'component': 'VAlert',
-                                                                'props': {
-                                                                    'type': 'info',
-                                                                    'variant': 'tonal',
-                                                                    'text': '主服务器发送成功时，不使用备用服务器发送消息（两个服务器至少启用一个）'
-                                                                }
-                                                            }
-                                                        ]
-                                                    },
-                                                ]
-                                            },
-                                            {
-                                                'component': 'VRow',
-                                                'props': {
-                                                    'align': 'center'
-                                                },
-                                                'content': [
-                                                    {
-                                                        'component': 'VCol',
-                                                        'props': {
-                                                            'cols': '12',
-                                                            'md': 6
+                                                            'md': 3
                                                         },
                                                         'content': [
                                                             {
-                                                                'component': 'VTextField',
+                                                                'component': 'VSwitch',
                                                                 'props': {
-                                                                    'model': 'main_smtp_host',
-                                                                    'label': 'SMTP服务器地址',
-                                                                    'placeholder': 'smtp.example.com',
-                                                                    'clearable': True,
-                                                                    'hint': '服务器的地址，不需要加任何协议头',
+                                                                    'model': 'quota_merge',
+                                                                    'label': '额度不足时合并发送',
+                                                                    'hint': '额度用完时暂存的消息，额度不足以逐条发送时合并为一封邮件',
                                                                     'persistent-hint': True,
                                                                 }
                                                             }
@@ -567,48 +851,47 @@ class SmtpMsg(_PluginBase):
                                                     {
                                                         'component': 'VCol',
                                                         'props': {
-                                                            'cols': '12',
-                                                            'md': 4
+                                                            'cols': 12,
+                                                            'md': 6
                                                         },
                                                         'content': [
                                                             {
-                                                                'component': 'VTextField',
+                                                                'component': 'VAlert',
                                                                 'props': {
-                                                                    'model': 'main_smtp_port',
-                                                                    'label': 'SMTP服务器端口',
-                                                                    'placeholder': '常见：25、465、587、995……',
-                                                                    'clearable': True,
-                                                                    'hint': '服务器地址的端口号：1~65535',
-                                                                    'persistent-hint': True,
-                                                                    'maxlength': 5,
-                                                                    'type': 'number',
+                                                                    'type': 'info',
+                                                                    'variant': 'tonal',
+                                                                    'text': '首选账号发送失败时，依次使用其余账号发送；'
+                                                                            '发送额度用完的账号会被自动跳过，全部账号额度用完时'
+                                                                            '消息保存到重试队列，额度恢复后发送'
                                                                 }
                                                             }
                                                         ]
                                                     },
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
                                                     {
                                                         'component': 'VCol',
                                                         'props': {
-                                                            'cols': '12',
-                                                            'md': 2
+                                                            'cols': 12,
                                                         },
                                                         'content': [
                                                             {
-                                                                'component': 'VSelect',
+                                                                'component': 'VAceEditor',
                                                                 'props': {
-                                                                    'model': 'main_smtp_encryption',
-                                                                    'label': '加密方式',
-                                                                    'items': [
-                                                                        {'title': '不加密', 'value': 'not_encrypted'},
-                                                                        {'title': 'SSL', 'value': 'ssl'},
-                                                                        {'title': 'TLS', 'value': 'tls'},
-                                                                    ],
-                                                                    'hint': '服务器的加密方式',
-                                                                    'persistent-hint': True,
+                                                                    'modelvalue': 'smtp_accounts',
+                                                                    'lang': 'json',
+                                                                    'theme': 'monokai',
+                                                                    'style': 'height: 20rem; font-size: 14px;',
                                                                 }
                                                             }
                                                         ]
-                                                    },
+                                                    }
                                                 ]
                                             },
                                             {
@@ -620,53 +903,34 @@ class SmtpMsg(_PluginBase):
                                                     {
                                                         'component': 'VCol',
                                                         'props': {
-                                                            'cols': '12',
-                                                            'md': 6
-                                                        },
-                                                        'content': [
-                                                            {
-                                                                'component': 'VTextField',
-                                                                'props': {
-                                                                    'model': 'main_sender_mail',
-                                                                    'label': 'SMTP邮箱账号',
-                                                                    'placeholder': 'example@example.com',
-                                                                    'clearable': True,
-                                                                    'hint': '登录时使用的邮箱账号，一般为完整的邮箱地址',
-                                                                    'persistent-hint': True,
-                                                                }
-                                                            },
-                                                        ]
-                                                    },
-                                                    {
-                                                        'component': 'VCol',
-                                                        'props': {
-                                                            'cols': '12',
-                                                            'md': 6
+                                                            'cols': 12,
                                                         },
                                                         'content': [
                                                             {
-                                                                'component': 'VTextField',
+                                                                'component': 'VAlert',
                                                                 'props': {
-                                                                    'model': 'main_sender_password',
-                                                                    'label': 'SMTP邮箱密码/Token',
-                                                                    'placeholder': 'Passwd or Token',
-                                                                    'clearable': True,
-                                                                    'hint': '邮箱账号的密码，或者从服务器获取到的token值',
-                                                                    'persistent-hint': True,
+                                                                    'type': 'info',
+                                                                    'variant': 'tonal',
+                                                                    'text': '账号列表为JSON数组，每个账号包含：name（名称）、host（服务器地址）、'
+                                                                            'port（端口）、encryption（not_encrypted / ssl / tls）、'
+                                                                            'mail（邮箱账号）、password（密码或token）；'
+                                                                            '可选：enabled（是否启用）、weight（权重，默认1）、'
+                                                                            'minute_limit / hourly_limit / daily_limit'
+                                                                            '（每分钟 / 每小时 / 每天发送上限，0为不限制）'
                                                                 }
-                                                            },
+                                                            }
                                                         ]
-                                                    },
+                                                    }
                                                 ]
                                             },
                                         ]
-                                    }
+                                    },
                                 ]
                             },
                             {
                                 'component': 'VWindowItem',
                                 'props': {
-                                    'value': 'secondary_smtp',
+                                    'value': 'email_setting',
                                     'style': {
                                         'padding-top': '20px',
                                         'padding-bottom': '20px'
@@ -689,9 +953,9 @@ class SmtpMsg(_PluginBase):
                                                     {
                                                         'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'secondary',
-                                                            'label': '启用备用服务器',
-                                                            'hint': '允许启用备用服务器发送消息',
+                                                            'model': 'enabled_image_send',
+                                                            'label': '发送图片',
+                                                            'hint': '嵌入图片到邮件模板中',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -701,42 +965,33 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 9
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VAlert',
+                                                        'component': 'VSwitch',
                                                         'props': {
-                                                            'type': 'info',
-                                                            'variant': 'tonal',
-                                                            'text': '主服务器发送失败时，会使用备用服务器发送消息（两个服务器至少启用一个）'
+                                                            'model': 'enabled_proxy_image',
+                                                            'label': '全局代理获取图片',
+                                                            'hint': '使用代理服务器获取图片数据',
+                                                            'persistent-hint': True,
                                                         }
                                                     }
                                                 ]
                                             },
-                                        ]
-                                    },
-                                    {
-                                        'component': 'VRow',
-                                        'props': {
-                                            'align': 'center'
-                                        },
-                                        'content': [
                                             {
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 6
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VTextField',
+                                                        'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'secondary_smtp_host',
-                                                            'label': '备用SMTP服务器地址',
-                                                            'placeholder': 'smtp.example.com',
-                                                            'clearable': True,
-                                                            'hint': '服务器的地址，不需要加任何协议头',
+                                                            'model': 'enabled_github_proxy_image',
+                                                            'label': 'Github加速站代理',
+                                                            'hint': '用Github加速站获取图片数据',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -746,46 +1001,24 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 4
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
                                                         'component': 'VTextField',
                                                         'props': {
-                                                            'model': 'secondary_smtp_port',
-                                                            'label': '备用SMTP服务器端口',
-                                                            'placeholder': '常见：25、465、587、995',
+                                                            'model': 'image_timeout',
+                                                            'label': '获取图片超时时间（秒）',
+                                                            'placeholder': '10',
                                                             'clearable': True,
-                                                            'hint': '服务器地址的端口号：1~65535',
+                                                            'hint': '获取图片的超时时间，默认10秒，启用自适应超时时用于样本不足的域名',
                                                             'persistent-hint': True,
-                                                            'maxlength': 5,
                                                             'type': 'number',
+                                                            # 'suffix': '秒',
                                                         }
                                                     }
                                                 ]
                                             },
-                                            {
-                                                'component': 'VCol',
-                                                'props': {
-                                                    'cols': 12,
-                                                    'md': 2
-                                                },
-                                                'content': [
-                                                    {
-                                                        'component': 'VSelect',
-                                                        'props': {
-                                                            'model': 'secondary_smtp_encryption',
-                                                            'label': '加密方式',
-                                                            'items': [{'title': '不加密', 'value': 'not_encrypted'},
-                                                                      {'title': 'SSL', 'value': 'ssl'},
-                                                                      {'title': 'TLS', 'value': 'tls'},
-                                                                      ],
-                                                            'hint': '服务器的加密方式',
-                                                            'persistent-hint': True,
-                                                        }
-                                                    }
-                                                ]
-                                            }
                                         ]
                                     },
                                     {
@@ -798,56 +1031,30 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 6
+                                                    'md': 12,
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VTextField',
+                                                        'component': 'VAlert',
                                                         'props': {
-                                                            'model': 'secondary_sender_mail',
-                                                            'label': '备用SMTP邮箱账号',
-                                                            'placeholder': 'example@example.com',
-                                                            'clearable': True,
-                                                            'hint': '登录时使用的邮箱账号，一般为完整的邮箱地址',
-                                                            'persistent-hint': True,
+                                                            'type': 'warning',
+                                                            'variant': 'tonal',
+                                                            'text': '同时启用全局与Github加速站时，'
+                                                                    'Github官方域名的URL会优先使用加速站获取，'
+                                                                    '失败时自动使用全局代理再次获取。\n'
+                                                                    '\n'
+                                                                    'Github加速站代理功能，只代理Github官方的域名的URL，'
+                                                                    '此功能依赖于 "GITHUB_PROXY" 变量。\n'
+                                                                    '\n'
+                                                                    '非Github官方域名的URL，不使用Github加速站代理，'
+                                                                    '而是直接使用全局代理，此功能依赖于 "PROXY_HOST" 变量。',
+                                                            'style': 'white-space: pre-line;'
                                                         }
                                                     }
                                                 ]
                                             },
-                                            {
-                                                'component': 'VCol',
-                                                'props': {
-                                                    'cols': 12,
-                                                    'md': 6
-                                                },
-                                                'content': [
-                                                    {
-                                                        'component': 'VTextField',
-                                                        'props': {
-                                                            'model': 'secondary_sender_password',
-                                                            'label': '备用SMTP邮箱密码/Token',
-                                                            'placeholder': 'Passwd or Token',
-                                                            "clearable": True,
-                                                            'hint': '邮箱账号的密码，或者从服务器获取到的token值',
-                                                            'persistent-hint': True,
-                                                        }
-                                                    }
-                                                ]
-                                            }
                                         ]
                                     },
-                                ]
-                            },
-                            {
-                                'component': 'VWindowItem',
-                                'props': {
-                                    'value': 'email_setting',
-                                    'style': {
-                                        'padding-top': '20px',
-                                        'padding-bottom': '20px'
-                                    },
-                                },
-                                'content': [
                                     {
                                         'component': 'VRow',
                                         'props': {
@@ -864,9 +1071,9 @@ class SmtpMsg(_PluginBase):
                                                     {
                                                         'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'enabled_image_send',
-                                                            'label': '发送图片',
-                                                            'hint': '嵌入图片到邮件模板中',
+                                                            'model': 'enabled_image_cache',
+                                                            'label': '图片缓存',
+                                                            'hint': '相同地址的图片只获取一次',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -882,9 +1089,9 @@ class SmtpMsg(_PluginBase):
                                                     {
                                                         'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'enabled_proxy_image',
-                                                            'label': '全局代理获取图片',
-                                                            'hint': '使用代理服务器获取图片数据',
+                                                            'model': 'enabled_image_disk_cache',
+                                                            'label': '图片磁盘缓存',
+                                                            'hint': '缓存同时保存到插件数据目录，重启后仍然有效',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -898,12 +1105,15 @@ class SmtpMsg(_PluginBase):
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VSwitch',
+                                                        'component': 'VTextField',
                                                         'props': {
-                                                            'model': 'enabled_github_proxy_image',
-                                                            'label': 'Github加速站代理',
-                                                            'hint': '用Github加速站获取图片数据',
+                                                            'model': 'image_cache_size',
+                                                            'label': '图片内存缓存上限（MB）',
+                                                            'placeholder': '32',
+                                                            'clearable': True,
+                                                            'hint': '超过上限时清除最久未使用的图片，默认32MB',
                                                             'persistent-hint': True,
+                                                            'type': 'number',
                                                         }
                                                     }
                                                 ]
@@ -918,14 +1128,13 @@ class SmtpMsg(_PluginBase):
                                                     {
                                                         'component': 'VTextField',
                                                         'props': {
-                                                            'model': 'image_timeout',
-                                                            'label': '获取图片超时时间（秒）',
-                                                            'placeholder': '10',
+                                                            'model': 'image_cache_ttl',
+                                                            'label': '图片缓存有效期（秒）',
+                                                            'placeholder': '3600',
                                                             'clearable': True,
-                                                            'hint': '获取图片的超时时间，默认10秒',
+                                                            'hint': '获取失败的地址5分钟内不再重试，默认3600秒',
                                                             'persistent-hint': True,
                                                             'type': 'number',
-                                                            # 'suffix': '秒',
                                                         }
                                                     }
                                                 ]
@@ -942,24 +1151,80 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 12,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VAlert',
+                                                        'component': 'VSwitch',
                                                         'props': {
-                                                            'type': 'warning',
-                                                            'variant': 'tonal',
-                                                            'text': '同时启用全局与Github加速站时，'
-                                                                    'Github官方域名的URL会优先使用加速站获取，'
-                                                                    '失败时自动使用全局代理再次获取。\n'
-                                                                    '\n'
-                                                                    'Github加速站代理功能，只代理Github官方的域名的URL，'
-                                                                    '此功能依赖于 "GITHUB_PROXY" 变量。\n'
-                                                                    '\n'
-                                                                    '非Github官方域名的URL，不使用Github加速站代理，'
-                                                                    '而是直接使用全局代理，此功能依赖于 "PROXY_HOST" 变量。',
-                                                            'style': 'white-space: pre-line;'
+                                                            'model': 'enabled_image_process',
+                                                            'label': '图片压缩',
+                                                            'hint': '缩小图片并重新编码，减小邮件体积',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'image_max_size',
+                                                            'label': '图片最大边长（像素）',
+                                                            'placeholder': '800',
+                                                            'clearable': True,
+                                                            'hint': '超过该尺寸的图片会等比缩小，默认800',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSelect',
+                                                        'props': {
+                                                            'model': 'image_format',
+                                                            'label': '图片编码格式',
+                                                            'items': [
+                                                                {'title': 'JPEG', 'value': 'jpeg'},
+                                                                {'title': 'WebP', 'value': 'webp'},
+                                                            ],
+                                                            'hint': '部分邮件客户端不支持WebP',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'image_quality',
+                                                            'label': '图片编码质量',
+                                                            'placeholder': '80',
+                                                            'clearable': True,
+                                                            'hint': '1~95，数值越小体积越小，默认80',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
                                                         }
                                                     }
                                                 ]
@@ -1244,7 +1509,9 @@ class SmtpMsg(_PluginBase):
                                                             'style': 'white-space: pre-line;',
                                                             'text': '支持的变量：'
                                                                     '类型：{msg_type}、用户ID：{userid}、标题：{title}、'
-                                                                    '内容：{text}、图片：cid:image\n'
+                                                                    '内容：{text}、汇总列表：{digest}、'
+                                                                    '图片：cid:image0、cid:image1...（按图片来源顺序编号）、'
+                                                                    '第二张起的图片列表：{gallery}\n'
                                                                     '\n'
                                                                     '电脑端可用 "ctrl" + "/" '
                                                                     '快捷键来快速打开/关闭需要注释的内容。'
@@ -1259,7 +1526,7 @@ class SmtpMsg(_PluginBase):
                             {
                                 'component': 'VWindowItem',
                                 'props': {
-                                    'value': 'log_setting',
+                                    'value': 'advanced_setting',
                                     'style': {
                                         'padding-top': '20px',
                                         'padding-bottom': '20px'
@@ -1276,15 +1543,54 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 3,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
                                                         'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'log_more',
-                                                            'label': '记录更多日志',
-                                                            'hint': '记录细节，排查问题',
+                                                            'model': 'enabled_smtp_pool',
+                                                            'label': '复用SMTP连接',
+                                                            'hint': '保持已登录的连接，连续发送时不再重复握手',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'smtp_pool_idle_timeout',
+                                                            'label': '连接空闲保持时间（秒）',
+                                                            'placeholder': '60',
+                                                            'clearable': True,
+                                                            'hint': '空闲超过该时间的连接会被关闭，默认60秒',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'enabled_pipeline',
+                                                            'label': '并行构建邮件',
+                                                            'hint': '连接服务器的同时获取图片与渲染模板',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -1302,15 +1608,15 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 3,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
                                                         'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'clean_all_log',
-                                                            'label': '立刻清空所有日志',
-                                                            'hint': '一次性任务，运行后自动关闭',
+                                                            'model': 'enabled_outbox',
+                                                            'label': '后台发送队列',
+                                                            'hint': '消息先进入队列，由后台线程发送，不阻塞系统事件',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -1320,16 +1626,19 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 3,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VSwitch',
+                                                        'component': 'VTextField',
                                                         'props': {
-                                                            'model': 'onlyonce_clean',
-                                                            'label': '立刻整理日志',
-                                                            'hint': '一次性任务，依赖于日志记录最大数量',
+                                                            'model': 'outbox_size',
+                                                            'label': '队列最大长度',
+                                                            'placeholder': '100',
+                                                            'clearable': True,
+                                                            'hint': '最多可排队的消息数量，默认100',
                                                             'persistent-hint': True,
+                                                            'type': 'number',
                                                         }
                                                     }
                                                 ]
@@ -1338,15 +1647,67 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 3,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'outbox_workers',
+                                                            'label': '发送线程数量',
+                                                            'placeholder': '1',
+                                                            'clearable': True,
+                                                            'hint': '同时发送消息的线程数量，默认1',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSelect',
+                                                        'props': {
+                                                            'model': 'outbox_policy',
+                                                            'label': '队列已满时',
+                                                            'items': [
+                                                                {'title': '等待空位', 'value': 'block'},
+                                                                {'title': '丢弃最早消息', 'value': 'drop_oldest'},
+                                                                {'title': '丢弃最新消息', 'value': 'drop_newest'},
+                                                            ],
+                                                            'hint': '等待空位最多1秒，超时后丢弃最新消息',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
                                                         'component': 'VSwitch',
                                                         'props': {
-                                                            'model': 'enabled_max_lines',
-                                                            'label': '启用最大记录数量',
-                                                            'hint': '激活日志记录最大数量',
+                                                            'model': 'enabled_digest',
+                                                            'label': '消息汇总',
+                                                            'hint': '同类型的连续消息合并为一封邮件发送',
                                                             'persistent-hint': True,
                                                         }
                                                     }
@@ -1356,19 +1717,40 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
-                                                    'md': 3,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
                                                         'component': 'VTextField',
                                                         'props': {
-                                                            'model': 'max_lines',
-                                                            'label': '日志记录最大数量',
-                                                            'placeholder': '不能低于等于0',
-                                                            'hint': '保存的最近的记录的最大数量',
+                                                            'model': 'digest_window',
+                                                            'label': '汇总窗口时间（秒）',
+                                                            'placeholder': '60',
+                                                            'clearable': True,
+                                                            'hint': '第一条消息发送后，窗口内的消息合并发送，默认60秒',
                                                             'persistent-hint': True,
                                                             'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'digest_max_count',
+                                                            'label': '汇总最大数量',
+                                                            'placeholder': '20',
                                                             'clearable': True,
+                                                            'hint': '缓存达到该数量时立即合并发送，默认20',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
                                                         }
                                                     }
                                                 ]
@@ -1385,378 +1767,900 @@ class SmtpMsg(_PluginBase):
                                                 'component': 'VCol',
                                                 'props': {
                                                     'cols': 12,
+                                                    'md': 3
                                                 },
                                                 'content': [
                                                     {
-                                                        'component': 'VAlert',
+                                                        'component': 'VSwitch',
                                                         'props': {
-                                                            'type': 'info',
-                                                            'variant': 'tonal',
-                                                            'text': '启用最大记录数量后，每次发送任务结束，不管是否发送成功，'
-                                                                    '都将进行整理，该功能处理方式为删除文件内记录！\n'
-                                                                    "\n"
-                                                                    '清空所有日志记录功能不需要依赖于启用最大记录数量。\n'
-                                                                    '\n'
-                                                                    '同时启用立刻清空所有日志与立刻整理日志时，'
-                                                                    '优先运行立刻整理日志，且自动关闭清空所有日志开关，'
-                                                                    '避免误操作！',
-                                                            'style': 'white-space: pre-line;',
+                                                            'model': 'enabled_circuit_breaker',
+                                                            'label': '服务器熔断',
+                                                            'hint': '连续失败的账号暂停使用，定时探测恢复',
+                                                            'persistent-hint': True,
                                                         }
                                                     }
                                                 ]
-                                            }
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'circuit_failure_threshold',
+                                                            'label': '熔断失败次数',
+                                                            'placeholder': '3',
+                                                            'clearable': True,
+                                                            'hint': '连续失败达到该次数后熔断，默认3次',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'circuit_open_seconds',
+                                                            'label': '熔断探测间隔（秒）',
+                                                            'placeholder': '60',
+                                                            'clearable': True,
+                                                            'hint': '熔断后等待该时间再探测，默认60秒',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
                                         ]
                                     },
-                                ]
-                            },
-                            #         {
-                            #             'component': 'VWindowItem',
-                            #             'props': {
-                            #                 'value': 'msg_rules',
-                            #                 'style': {
-                            #                     'padding-top': '20px',
-                            #                     'padding-bottom': '20px'
-                            #                 },
-                            #             },
-                            #             'content': [
-                            #                 {
-                            #                     'component': 'VRow',
-                            #                     'props': {
-                            #                         'align': 'center'
-                            #                     },
-                            #                     'content': [
-                            #                         {
-                            #                             'component': 'VCol',
-                            #                             'props': {
-                            #                                 'cols': 12,
-                            #                                 'md': 3
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VSwitch',
-                            #                                     'props': {
-                            #                                         'model': 'enabled_msg_rules',
-                            #                                         'label': '启用消息过滤',
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                         {
-                            #                             'component': 'VCol',
-                            #                             'props': {
-                            #                                 'cols': 12,
-                            #                                 'md': 3
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VSwitch',
-                            #                                     'props': {
-                            #                                         'model': 'enabled_customizable_msg_rules',
-                            #                                         'label': '启用自定义过滤规则',
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                         {
-                            #                             "component": "VCol",
-                            #                             "props": {
-                            #                                 "cols": 12,
-                            #                                 "md": 4
-                            #                             },
-                            #                             "content": [
-                            #                                 {
-                            #                                     "component": "VSwitch",
-                            #                                     "props": {
-                            #                                         "model": "dialog_closed",
-                            #                                         "label": "打开自定义过滤规则设置窗口"
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                     ]
-                            #                 },
-                            #                 {
-                            #                     'component': 'VRow',
-                            #                     'props': {
-                            #                             'align': 'center'
-                            #                     },
-                            #                     'content': [
-                            #                         {
-                            #                             'component': 'VCol',
-                            #                             'props': {
-                            #                                 'cols': 12,
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VAlert',
-                            #                                     'props': {
-                            #                                         'type': 'info',
-                            #                                         'variant': 'tonal',
-                            #                                         'text': '该功能为结合已安装插件的插件名，对消息内容进行二次过滤；'
-                            #                                                 '不启用自定义过滤规则时，默认屏蔽整个插件的消息'
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         }
-                            #                     ]
-                            #                 },
-                            #                 {
-                            #                     'component': 'VRow',
-                            #                     'props': {
-                            #                             'align': 'center'
-                            #                     },
-                            #                     'content': [
-                            #                         {
-                            #                             'component': 'VCol',
-                            #                             'props': {
-                            #                                 'cols': 12,
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VAutocomplete',
-                            #                                     'props': {
-                            #                                         'multiple': True,
-                            #                                         'chips': True,
-                            #                                         'model': 'allow_plugins',
-                            #                                         'label': '需要管理的插件',
-                            #                                         'placeholder': '留空，则默认选择所有插件',
-                            #                                         'items': PluginTypeOptions,
-                            #                                         "clearable": True,
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                     ]
-                            #                 },
-                            #                 {
-                            #                     'component': 'VRow',
-                            #                     'props': {
-                            #                             'align': 'center'
-                            #                     },
-                            #                     'content': [
-                            #                         {
-                            #                             'component': 'VCol',
-                            #                             'props': {
-                            #                                 'cols': 12
-                            #
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VAutocomplete',
-                            #                                     'props': {
-                            #                                         'multiple': True,
-                            #                                         'chips': True,
-                            #                                         'model': 'block_plugins',
-                            #                                         'label': '需要排除的插件',
-                            #                                         'placeholder': '留空，则默认不过滤任何插件',
-                            #                                         'items': PluginTypeOptions,
-                            #                                         'clearable': True,
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                     ]
-                            #                 },
-                            #                 {
-                            #                     'component': 'VRow',
-                            #                     'props': {
-                            #                             'align': 'center'
-                            #                     },
-                            #                     'content': [
-                            #                         {
-                            #                             'component': 'VCol',
-                            #                             'props': {
-                            #                                 'cols': 12,
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VAlert',
-                            #                                     'props': {
-                            #                                         'type': 'warning',
-                            #                                         'variant': 'tonal',
-                            #                                         'text': '目前只支持插件名与邮件主题名一致的插件；'
-                            #                                                 '邮件主题 =【插件名】、{title} = '
-                            #                                                 '【{local_plugin.plugin_name}】'
-                            #                                     }
-                            #                                 }
-                            #                             ]
-                            #                         }
-                            #                     ]
-                            #                 },
-                            #             ]
-                            #         },
-                            #     ]
-                            # },
-                            # {
-                            #     "component": "VDialog",
-                            #     "props": {
-                            #         "model": "dialog_closed",
-                            #         "max-width": "65rem",
-                            #         "overlay-class": "v-dialog--scrollable v-overlay--scroll-blocked",
-                            #         "content-class": "v-card v-card--density-default v-card--variant-elevated rounded-t"
-                            #     },
-                            #     "content": [
-                            #         {
-                            #             "component": "VCard",
-                            #             "props": {
-                            #                 "title": "设置自定义过滤规则"
-                            #             },
-                            #             "content": [
-                            #                 {
-                            #                     "component": "VDialogCloseBtn",
-                            #                     "props": {
-                            #                         "model": "dialog_closed"
-                            #                     }
-                            #                 },
-                            #                 {
-                            #                     "component": "VCardText",
-                            #                     "props": {},
-                            #                     "content": [
-                            #                         {
-                            #                             'component': 'VRow',
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VCol',
-                            #                                     'props': {
-                            #                                         'cols': 12,
-                            #                                     },
-                            #                                     'content': [
-                            #                                         {
-                            #                                             'component': 'VAceEditor',
-                            #                                             'props': {
-                            #                                                 'modelvalue': 'site_config',
-                            #                                                 'lang': 'json',
-                            #                                                 'theme': 'monokai',
-                            #                                                 'style': 'height: 30rem',
-                            #                                             }
-                            #                                         }
-                            #                                     ]
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                         {
-                            #                             'component': 'VRow',
-                            #                             'props': {
-                            #                                     'align': 'center'
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VCol',
-                            #                                     'props': {
-                            #                                         'cols': 12,
-                            #                                     },
-                            #                                     'content': [
-                            #                                         {
-                            #                                             'component': 'VAlert',
-                            #                                             'props': {
-                            #                                                 'type': 'info',
-                            #                                                 'variant': 'tonal'
-                            #                                             },
-                            #                                             'content': [
-                            #                                                 {
-                            #                                                     'component': 'span',
-                            #                                                     'text': '注意：只有启用高级自定义过滤时，该配置项才会生效，详细配置参考：'
-                            #                                                 },
-                            #                                                 {
-                            #                                                     'component': 'a',
-                            #                                                     'props': {
-                            #                                                         'href': 'https://github.com/Aqr-K/MoviePilot-Plugins/blob/main/plugins/smtpmsg',
-                            #                                                         'target': '_blank'
-                            #                                                     },
-                            #                                                     'content': [
-                            #                                                         {
-                            #                                                             'component': 'u',
-                            #                                                             'text': 'README'
-                            #                                                         }
-                            #                                                     ]
-                            #                                                 },
-                            #                                             ]
-                            #                                         },
-                            #                                     ]
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                         {
-                            #                             'component': 'VRow',
-                            #                             'props': {
-                            #                                     'align': 'center'
-                            #                             },
-                            #                             'content': [
-                            #                                 {
-                            #                                     'component': 'VCol',
-                            #                                     'props': {
-                            #                                         'cols': 12,
-                            #                                     },
-                            #                                     'content': [
-                            #                                         {
-                            #                                             'component': 'VAlert',
-                            #                                             'props': {
-                            #                                                 'type': 'info',
-                            #                                                 'variant': 'tonal',
-                            #                                                 'text': '注意：当"需要管理的插件"中的插件，'
-                            #                                                         '在自定义过滤规则未配置内容时，'
-                            #                                                         '默认过滤整个插件的消息'
-                            #                                             }
-                            #                                         }
-                            #                                     ]
-                            #                                 }
-                            #                             ]
-                            #                         },
-                            #                     ]
-                            #                 }
-                            #             ]
-                            #         }
-                        ]
-                    }
-                ]
-            }
-        ], {
-            'enabled': False,
-            'test': False,
-
-            'server_timeout': 10,
-
-            'main': True,
-            'main_smtp_host': "",
-            'main_smtp_port': "",
-            'main_smtp_encryption': "not_encrypted",
-            'main_sender_mail': "",
-            'main_sender_password': "",
-
-            'secondary': False,
-            'secondary_smtp_host': "",
-            'secondary_smtp_port': "",
-            'secondary_smtp_encryption': "not_encrypted",
-            'secondary_sender_mail': "",
-            'secondary_sender_password': "",
-
-            'enabled_image_send': False,
-            'enabled_proxy_image': True,
-            'enabled_github_proxy_image': True,
-            'image_timeout': 10,
-            'sender_name': "",
-            'receiver_mail': "",
-            'msgtypes': [],
-            'other_msgtypes': False,
-
-            'enabled_customizable_mail_template': False,
-            'save': False,
-            'reset': False,
-            'content': self.custom_template.read_text(encoding="utf-8"),
-
-            'enabled_msg_rules': False,
-            'enabled_customizable_msg_rules': False,
-
-            'log_more': False,
-            'clean_all_log': False,
-            'onlyonce_clean': False,
-            'enabled_scheduled_clean': False,
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'enabled_adaptive_timeout',
+                                                            'label': '自适应超时',
+                                                            'hint': '按最近成功请求的耗时计算各服务器与图片域名的超时时间',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'adaptive_timeout_factor',
+                                                            'label': '超时倍数',
+                                                            'placeholder': '3',
+                                                            'clearable': True,
+                                                            'hint': '超时时间为最近p99耗时的倍数，默认3倍',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'adaptive_timeout_min',
+                                                            'label': '最小超时时间（秒）',
+                                                            'placeholder': '2',
+                                                            'clearable': True,
+                                                            'hint': '自适应超时时间的下限，默认2秒',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'adaptive_timeout_max',
+                                                            'label': '最大超时时间（秒）',
+                                                            'placeholder': '30',
+                                                            'clearable': True,
+                                                            'hint': '自适应超时时间的上限，默认30秒',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'enabled_hedged',
+                                                            'label': '对冲连接',
+                                                            'hint': '首选账号响应慢时同时连接下一个账号，使用先登录成功的账号',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'hedge_delay',
+                                                            'label': '对冲等待时间（秒）',
+                                                            'placeholder': '2',
+                                                            'clearable': True,
+                                                            'hint': '首选账号超过该时间未完成登录时开始对冲，默认2秒',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'enabled_spool',
+                                                            'label': '失败重试',
+                                                            'hint': '全部账号发送失败的消息保存到本地，恢复后自动重发',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'spool_max_count',
+                                                            'label': '重试队列上限',
+                                                            'placeholder': '500',
+                                                            'clearable': True,
+                                                            'hint': '最多保存的消息数量，超过时清理最早的消息，默认500',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'spool_max_age',
+                                                            'label': '最长保存时间（小时）',
+                                                            'placeholder': '24',
+                                                            'clearable': True,
+                                                            'hint': '超过该时间仍未发送成功的消息不再重试，默认24小时',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'spool_drain_rate',
+                                                            'label': '每轮重发数量',
+                                                            'placeholder': '10',
+                                                            'clearable': True,
+                                                            'hint': '每30秒最多重发的消息数量，默认10',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'enabled_dedup',
+                                                            'label': '消息去重',
+                                                            'hint': '窗口期内标题、内容、类型、用户与图片都相同的消息只发送一次',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'dedup_window',
+                                                            'label': '去重窗口（秒）',
+                                                            'placeholder': '60',
+                                                            'clearable': True,
+                                                            'hint': '相同消息在该时间内只发送一次，默认60秒',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'recipient_chunk_size',
+                                                            'label': '每批收件人数量',
+                                                            'placeholder': '50',
+                                                            'clearable': True,
+                                                            'hint': '收件人较多时按该数量分批发送，默认50',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'recipient_concurrency',
+                                                            'label': '分批发送并发数',
+                                                            'placeholder': '2',
+                                                            'clearable': True,
+                                                            'hint': '同时使用的最大连接数量，默认2',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                ]
+                            },
+                            {
+                                'component': 'VWindowItem',
+                                'props': {
+                                    'value': 'log_setting',
+                                    'style': {
+                                        'padding-top': '20px',
+                                        'padding-bottom': '20px'
+                                    },
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'log_more',
+                                                            'label': '记录更多日志',
+                                                            'hint': '记录细节，排查问题',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'clean_all_log',
+                                                            'label': '立刻清空所有日志',
+                                                            'hint': '一次性任务，运行后自动关闭',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'onlyonce_clean',
+                                                            'label': '立刻整理日志',
+                                                            'hint': '一次性任务，依赖于日志记录最大数量',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VSwitch',
+                                                        'props': {
+                                                            'model': 'enabled_max_lines',
+                                                            'label': '启用最大记录数量',
+                                                            'hint': '激活日志记录最大数量',
+                                                            'persistent-hint': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                    'md': 3,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'max_lines',
+                                                            'label': '日志记录最大数量',
+                                                            'placeholder': '不能低于等于0',
+                                                            'hint': '保存的最近的记录的最大数量',
+                                                            'persistent-hint': True,
+                                                            'type': 'number',
+                                                            'clearable': True,
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                    {
+                                        'component': 'VRow',
+                                        'props': {
+                                            'align': 'center'
+                                        },
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    'cols': 12,
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VAlert',
+                                                        'props': {
+                                                            'type': 'info',
+                                                            'variant': 'tonal',
+                                                            'text': '启用最大记录数量后，每次发送任务结束，不管是否发送成功，'
+                                                                    '都将进行整理，该功能处理方式为删除文件内记录！\n'
+                                                                    "\n"
+                                                                    '清空所有日志记录功能不需要依赖于启用最大记录数量。\n'
+                                                                    '\n'
+                                                                    '同时启用立刻清空所有日志与立刻整理日志时，'
+                                                                    '优先运行立刻整理日志，且自动关闭清空所有日志开关，'
+                                                                    '避免误操作！',
+                                                            'style': 'white-space: pre-line;',
+                                                        }
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    },
+                                ]
+                            },
+                            {
+                                'component': 'VWindowItem',
+                                'props': {
+                                    'value': 'msg_rules',
+                                    'style': {
+                                        'padding-top': '20px',
+                                        'padding-bottom': '20px'
+                                    },
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VForm',
+                                        'content': [
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                            'md': 3
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VSwitch',
+                                                                'props': {
+                                                                    'model': 'enabled_msg_rules',
+                                                                    'label': '启用消息过滤',
+                                                                    'hint': '按下方规则过滤消息，不发送的消息不会构建邮件',
+                                                                    'persistent-hint': True,
+                                                                }
+                                                            }
+                                                        ]
+                                                    },
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                            'md': 3
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VSwitch',
+                                                                'props': {
+                                                                    'model': 'enabled_customizable_msg_rules',
+                                                                    'label': '启用自定义规则文件',
+                                                                    'hint': '同时读取插件数据目录中的 rules.json',
+                                                                    'persistent-hint': True,
+                                                                }
+                                                            }
+                                                        ]
+                                                    },
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VAceEditor',
+                                                                'props': {
+                                                                    'modelvalue': 'msg_rules',
+                                                                    'lang': 'json',
+                                                                    'theme': 'monokai',
+                                                                    'style': 'height: 20rem; font-size: 14px;',
+                                                                }
+                                                            }
+                                                        ]
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VAlert',
+                                                                'props': {
+                                                                    'type': 'info',
+                                                                    'variant': 'tonal',
+                                                                    'text': '规则为JSON数组，每条规则包含：action（include 只发送命中的消息 / '
+                                                                            'exclude 不发送命中的消息）、match（keyword 关键字 / regex 正则 / '
+                                                                            'glob 通配符）、msg_type（消息类型，如 SiteMessage，留空为全部类型）、'
+                                                                            'title / text / userid（匹配值，可为数组）、'
+                                                                            'time（生效时间段，如 23:00-07:00）；'
+                                                                            '排除规则优先，存在包含规则时只发送命中包含规则的消息\n'
+                                                                            f'示例：{self.example_msg_rules}',
+                                                                    'style': 'white-space: pre-line;',
+                                                                }
+                                                            }
+                                                        ]
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                ]
+                            },
+                            {
+                                'component': 'VWindowItem',
+                                'props': {
+                                    'value': 'recipient_routes',
+                                    'style': {
+                                        'padding-top': '20px',
+                                        'padding-bottom': '20px'
+                                    },
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VForm',
+                                        'content': [
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                            'md': 3
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VSwitch',
+                                                                'props': {
+                                                                    'model': 'enabled_recipient_routes',
+                                                                    'label': '启用收件人路由',
+                                                                    'hint': '按用户ID与消息类型选择收件人',
+                                                                    'persistent-hint': True,
+                                                                }
+                                                            }
+                                                        ]
+                                                    },
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VAceEditor',
+                                                                'props': {
+                                                                    'modelvalue': 'recipient_routes',
+                                                                    'lang': 'json',
+                                                                    'theme': 'monokai',
+                                                                    'style': 'height: 20rem; font-size: 14px;',
+                                                                }
+                                                            }
+                                                        ]
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VRow',
+                                                'props': {
+                                                    'align': 'center'
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VCol',
+                                                        'props': {
+                                                            'cols': 12,
+                                                        },
+                                                        'content': [
+                                                            {
+                                                                'component': 'VAlert',
+                                                                'props': {
+                                                                    'type': 'info',
+                                                                    'variant': 'tonal',
+                                                                    'text': '路由为JSON数组，每条路由包含：userid（MoviePilot用户ID，可为数组，'
+                                                                            '留空为全部用户）、msg_type（消息类型，如 Download，留空为全部类型）、'
+                                                                            'mail（收件人邮箱，可为数组）；'
+                                                                            '消息发送到命中的全部路由的邮箱，没有命中任何路由时发送到默认收件人；'
+                                                                            '汇总消息按收件人拆分，收到相同消息的收件人共用一封邮件\n'
+                                                                            f'示例：{self.example_recipient_routes}',
+                                                                    'style': 'white-space: pre-line;',
+                                                                }
+                                                            }
+                                                        ]
+                                                    }
+                                                ]
+                                            },
+                                        ]
+                                    },
+                                ]
+                            },
+                        ]
+                    }
+                ]
+            }
+        ], {
+            'enabled': False,
+            'test': False,
+
+            'server_timeout': 10,
+
+            'smtp_accounts': self.default_smtp_accounts,
+            'balance_mode': "failover",
+            'quota_merge': True,
+
+            'enabled_image_send': False,
+            'enabled_proxy_image': True,
+            'enabled_github_proxy_image': True,
+            'image_timeout': 10,
+            'enabled_image_cache': True,
+            'enabled_image_disk_cache': False,
+            'image_cache_size': 32,
+            'image_cache_ttl': 3600,
+            'enabled_image_process': False,
+            'image_max_size': 800,
+            'image_format': 'jpeg',
+            'image_quality': 80,
+            'sender_name': "",
+            'receiver_mail': "",
+            'msgtypes': [],
+            'other_msgtypes': False,
+
+            'enabled_customizable_mail_template': False,
+            'save': False,
+            'reset': False,
+            'content': self._template_cache.read_text(self.custom_template),
+
+            'enabled_msg_rules': False,
+            'enabled_customizable_msg_rules': False,
+            'msg_rules': "[]",
+            'enabled_recipient_routes': False,
+            'recipient_routes': "[]",
+
+            'enabled_smtp_pool': True,
+            'smtp_pool_idle_timeout': 60,
+            'enabled_pipeline': True,
+            'enabled_circuit_breaker': True,
+            'circuit_failure_threshold': 3,
+            'circuit_open_seconds': 60,
+            'enabled_hedged': False,
+            'hedge_delay': 2,
+            'enabled_adaptive_timeout': True,
+            'adaptive_timeout_factor': 3,
+            'adaptive_timeout_min': 2,
+            'adaptive_timeout_max': 30,
+            'enabled_outbox': True,
+            'outbox_size': 100,
+            'outbox_workers': 1,
+            'outbox_policy': 'drop_oldest',
+            'enabled_digest': False,
+            'digest_window': 60,
+            'digest_max_count': 20,
+            'recipient_chunk_size': 50,
+            'recipient_concurrency': 2,
+            'enabled_dedup': True,
+            'dedup_window': 60,
+            'enabled_spool': True,
+            'spool_max_count': 500,
+            'spool_max_age': 24,
+            'spool_drain_rate': 10,
+
+            'log_more': False,
+            'clean_all_log': False,
+            'onlyonce_clean': False,
+            'enabled_scheduled_clean': False,
             'cron': '0 0 7 * * ',
             'rows': 100,
         }
 
     def get_page(self) -> List[dict]:
-        pass
+        """
+        拼装插件详情页面，展示各账号的剩余发送额度与各发送阶段的耗时
+        """
+        stats = SmtpMsgDecorator.tracer.stats()
+        quota = self._quota.snapshot() if self._quota else {}
+        if not stats and not quota:
+            return [
+                {
+                    'component': 'div',
+                    'text': '暂无数据',
+                    'props': {
+                        'class': 'text-center',
+                    }
+                }
+            ]
+
+        # 表格标题
+        headers = [
+            {'title': '阶段', 'key': 'stage', 'sortable': True},
+            {'title': '次数', 'key': 'count', 'sortable': True},
+            {'title': 'p50（毫秒）', 'key': 'p50_ms', 'sortable': True},
+            {'title': 'p95（毫秒）', 'key': 'p95_ms', 'sortable': True},
+            {'title': 'p99（毫秒）', 'key': 'p99_ms', 'sortable': True},
+            {'title': '最大（毫秒）', 'key': 'max_ms', 'sortable': True},
+        ]
+
+        # 按p99倒序排序
+        items = sorted(({'stage': stage, **value} for stage, value in stats.items()),
+                       key=lambda x: x.get("p99_ms") or 0, reverse=True)
+
+        # 剩余发送额度，不限制的周期显示为 -
+        quota_headers = [
+            {'title': '账号', 'key': 'name', 'sortable': True},
+            {'title': '本分钟剩余', 'key': 'minute', 'sortable': True},
+            {'title': '本小时剩余', 'key': 'hour', 'sortable': True},
+            {'title': '今日剩余', 'key': 'day', 'sortable': True},
+        ]
+        quota_items = [{'name': name, **{period: (f"{periods[period]['remaining']} / {periods[period]['limit']}"
+                                                  if period in periods else '-')
+                                         for period in SmtpQuota.PERIODS}}
+                       for name, periods in quota.items()]
+
+        page = []
+        for table_headers, table_items, height in ((quota_headers, quota_items, '12rem'), (headers, items, '30rem')):
+            if not table_items:
+                continue
+            page.append({
+                'component': 'VRow',
+                'content': [
+                    {
+                        'component': 'VCol',
+                        'props': {
+                            'cols': 12,
+                        },
+                        'content': [
+                            {
+                                'component': 'VDataTableVirtual',
+                                'props': {
+                                    'class': 'text-sm',
+                                    'headers': table_headers,
+                                    'items': table_items,
+                                    'height': height,
+                                    'density': 'compact',
+                                    'fixed-header': True,
+                                    'hide-no-data': True,
+                                    'hover': True
+                                },
+                            }
+                        ]
+                    }
+                ]
+            })
+        return page
 
     def get_service(self) -> List[Dict[str, Any]]:
         """
@@ -1769,7 +2673,40 @@ class SmtpMsg(_PluginBase):
             "kwargs": {} # 定时器参数
         }]
         """
-        pass
+        services = []
+        if self._enabled and self._enabled_smtp_pool:
+            services.append({
+                "id": "SmtpMsgSessionPool",
+                "name": "SMTP空闲连接清理",
+                "trigger": "interval",
+                "func": self._evict_idle_sessions,
+                "kwargs": {"seconds": 30}
+            })
+        if self._enabled and self._spool:
+            services.append({
+                "id": "SmtpMsgSpoolRetry",
+                "name": "SMTP失败消息重发",
+                "trigger": "interval",
+                "func": self._retry_spool,
+                "kwargs": {"seconds": 30}
+            })
+        if self._enabled and self._quota:
+            services.append({
+                "id": "SmtpMsgQuotaSync",
+                "name": "SMTP发送额度保存",
+                "trigger": "interval",
+                "func": self._save_quota,
+                "kwargs": {"seconds": 60}
+            })
+        if self._enabled and self._enabled_circuit_breaker:
+            services.append({
+                "id": "SmtpMsgHealthProbe",
+                "name": "SMTP熔断服务器探测",
+                "trigger": "interval",
+                "func": self._probe_servers,
+                "kwargs": {"seconds": 15}
+            })
+        return services
 
     def stop_service(self):
         """
@@ -1785,6 +2722,17 @@ class SmtpMsg(_PluginBase):
                 self._scheduler = None
         except Exception as e:
             logger.info(str(e))
+        if self._digest:
+            self._digest.flush_all()
+            self._digest = None
+        self._stop_outbox()
+        self._save_quota()
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+        if self._smtp_pool:
+            self._smtp_pool.close_all()
+            self._smtp_pool = None
 
     # init
 
@@ -1827,19 +2775,22 @@ class SmtpMsg(_PluginBase):
                 # 如果_content不为空，写入自定义模板
                 if self._content:
                     self.custom_template.write_text(self._content, encoding="utf-8")
+                    self._template_cache.invalidate(self.custom_template)
                     msg = "自定义邮件模板文件不存在，已创建模板文件，已将数据库内配置写入文件"
                 # 否则，复制默认模板到自定义模板
                 else:
                     self.default_template.replace(self.custom_template)
+                    self._template_cache.invalidate()
                     msg = "自定义邮件模板文件不存在，已创建模板文件，数据库内没有该项配置，还原使用默认配置"
 
             # 自定义模板存在
             elif self.custom_template.exists():
                 # 内容是否一致
+                file_content = self._template_cache.read_text(self.custom_template)
                 if (self._save is not True
                         and self._reset is not True
-                        and self._content != self.custom_template.read_text(encoding="utf-8")):
-                    self._content = self.custom_template.read_text(encoding="utf-8")
+                        and self._content != file_content):
+                    self._content = file_content
                     self.__update_config()
                     msg = "自定义邮件模板文件已存在，但与数据库内缓存不一致，提取文件配置并覆盖数据库配置"
                 else:
@@ -1860,6 +2811,7 @@ class SmtpMsg(_PluginBase):
             if self._save or self._reset:
                 if self._save is True:
                     self.custom_template.write_text(self._content, encoding="utf-8")
+                    self._template_cache.invalidate(self.custom_template)
                     self._save = False
                     self.__update_config()
                     if self._reset is True:
@@ -1871,7 +2823,8 @@ class SmtpMsg(_PluginBase):
                     self.systemmessage.put(msg)
                 elif self._save is not True and self._reset is True:
                     shutil.copy(self.default_template, self.custom_template)
-                    self._content = self.custom_template.read_text(encoding="utf-8")
+                    self._template_cache.invalidate(self.custom_template)
+                    self._content = self._template_cache.read_text(self.custom_template)
                     self._reset = False
                     self.__update_config()
                     msg = "默认邮件模板恢复成功！"
@@ -1887,26 +2840,479 @@ class SmtpMsg(_PluginBase):
             msg = f"模板配置运行失败 - 原因 - {e}"
             raise Exception(msg)
 
-        finally:
-            log_container['msg'] = msg
-            log_container['level'] = level
+        finally:
+            log_container['msg'] = msg
+            log_container['level'] = level
+
+    def _get_template_path(self) -> Path:
+        """
+        当前使用的模板文件
+        """
+        return self.custom_template if self._enabled_customizable_mail_template else self.default_template
+
+    @SmtpMsgDecorator.log("模板预编译")
+    def _compile_template(self, log_container):
+        """
+        预编译当前模板，提前校验模板变量
+        """
+        msg = level = None
+        try:
+            self._template_cache.get(self._get_template_path())
+            msg = "邮件模板预编译成功"
+            level = 1
+        except KeyError as e:
+            msg = f"邮件模板文件中导入了不被支持的变量 - {e}"
+            level = 2
+            self.systemmessage.put(f"{self.plugin_name}插件{msg}")
+        except Exception as e:
+            msg = f"邮件模板预编译失败 - 原因 - {e}"
+            level = 2
+        finally:
+            log_container['msg'] = msg
+            log_container['level'] = level
+
+    def _init_image_cache(self):
+        """
+        初始化图片缓存
+        """
+        if not self._send_image or not self._enabled_image_cache:
+            self._image_cache = None
+            return
+        self._image_cache = SmtpImageCache(
+            max_bytes=int(self._parse_number(self._image_cache_size, default=32) * 1024 * 1024),
+            ttl=self._parse_number(self._image_cache_ttl, default=3600),
+            disk_dir=self.image_cache_dir if self._enabled_image_disk_cache else None)
+
+    def _init_image_processor(self):
+        """
+        初始化图片压缩
+        """
+        self._image_processor = None
+        if not self._send_image or not self._enabled_image_process:
+            return
+        if not SmtpImageProcessor.available():
+            logger.warning("日志汇报 - 警告 - 未安装Pillow，无法启用图片压缩")
+            return
+        self._image_processor = SmtpImageProcessor(
+            max_size=int(self._parse_number(self._image_max_size, default=800)),
+            image_format=self._image_format,
+            quality=int(self._parse_number(self._image_quality, default=80)))
+
+    def _init_smtp_pool(self):
+        """
+        初始化SMTP会话池
+        """
+        if self._smtp_pool:
+            self._smtp_pool.close_all()
+            self._smtp_pool = None
+        if not self._enabled_smtp_pool:
+            return
+        idle_timeout = self._parse_number(self._smtp_pool_idle_timeout, default=60)
+        self._smtp_pool = SmtpSessionPool(idle_timeout=idle_timeout)
+
+    def _init_health(self):
+        """
+        初始化服务器健康状态与熔断器
+        """
+        if not self._enabled_circuit_breaker:
+            self._health = None
+            return
+        self._health = SmtpHealthTracker(
+            failure_threshold=int(self._parse_number(self._circuit_failure_threshold, default=3)),
+            open_seconds=self._parse_number(self._circuit_open_seconds, default=60))
+
+    def _init_timeouts(self):
+        """
+        解析超时时间配置，初始化自适应超时
+        """
+        self._server_timeout_value = self._parse_number(self._server_timeout, default=10)
+        self._image_timeout_value = self._parse_number(self._image_timeout, default=10)
+        if not self._enabled_adaptive_timeout:
+            self._server_timeouts = self._image_timeouts = None
+            return
+        kwargs = dict(factor=self._parse_number(self._adaptive_timeout_factor, default=3),
+                      minimum=self._parse_number(self._adaptive_timeout_min, default=2),
+                      maximum=self._parse_number(self._adaptive_timeout_max, default=30))
+        self._server_timeouts = SmtpAdaptiveTimeout(**kwargs)
+        self._image_timeouts = SmtpAdaptiveTimeout(**kwargs)
+
+    def _smtp_timeout(self, smtp_conf) -> float:
+        """
+        服务器的超时时间
+        """
+        if not self._server_timeouts:
+            return self._server_timeout_value
+        return self._server_timeouts.timeout(f'{smtp_conf["host"]}:{smtp_conf["port"]}',
+                                             default=self._server_timeout_value)
+
+    def _observe_smtp(self, smtp_conf, seconds: Optional[float] = None):
+        """
+        记录服务器的耗时，为 None 时记录一次超时
+        """
+        if not self._server_timeouts:
+            return
+        key = f'{smtp_conf["host"]}:{smtp_conf["port"]}'
+        if seconds is None:
+            self._server_timeouts.observe_timeout(key)
+        else:
+            self._server_timeouts.observe(key, seconds)
+
+    def _image_timeout_for(self, domain: str) -> float:
+        """
+        图片域名的超时时间，本地图片使用配置的超时时间
+        """
+        if not self._image_timeouts or not domain:
+            return self._image_timeout_value
+        return self._image_timeouts.timeout(domain, default=self._image_timeout_value)
+
+    @staticmethod
+    def _migrate_smtp_accounts(config: dict) -> str:
+        """
+        将旧版主服务器与备用服务器配置转换为账号列表
+        备用服务器未启用或参数不完整时不迁移，与旧版只使用主服务器发送的行为一致
+        """
+        accounts = []
+        for prefix, name, default_enabled in (("main", "主服务器", True), ("secondary", "备用服务器", False)):
+            if not config.get(f"{prefix}_smtp_host") and not config.get(f"{prefix}_sender_mail"):
+                continue
+            if prefix == "secondary":
+                complete = all(config.get(f"{prefix}_{key}") for key in
+                               ("smtp_host", "smtp_port", "sender_mail", "sender_password"))
+                if not config.get(prefix, default_enabled) or not complete:
+                    logger.info("日志汇报 - 状态 - 旧版备用服务器未启用或参数不完整，不迁移")
+                    continue
+            accounts.append({
+                "name": name,
+                "host": config.get(f"{prefix}_smtp_host") or "",
+                "port": config.get(f"{prefix}_smtp_port") or "",
+                "encryption": config.get(f"{prefix}_smtp_encryption") or "not_encrypted",
+                "mail": config.get(f"{prefix}_sender_mail") or "",
+                "password": config.get(f"{prefix}_sender_password") or "",
+                "enabled": bool(config.get(prefix, default_enabled)),
+                "weight": 1,
+                "minute_limit": 0,
+                "hourly_limit": 0,
+                "daily_limit": 0,
+            })
+        logger.info(f"日志汇报 - 状态 - 已将旧版主服务器与备用服务器配置迁移为{len(accounts)}个SMTP账号")
+        return json.dumps(accounts, ensure_ascii=False, indent=2)
+
+    def _init_accounts(self):
+        """
+        解析SMTP账号列表，初始化负载均衡
+        """
+        self._balancer = None
+        try:
+            data = json.loads(self._smtp_accounts or "[]")
+            if not isinstance(data, list):
+                raise ValueError("账号配置必须是JSON数组")
+        except (ValueError, TypeError) as e:
+            logger.error(f"日志汇报 - 错误 - SMTP账号配置无效 - 原因 - {e}")
+            return
+        accounts = []
+        for index, item in enumerate(data):
+            # 逐个校验，跳过无效账号，不影响其他账号
+            try:
+                account = SmtpAccount.from_dict(item, index=index)
+            except ValueError as e:
+                enabled = not isinstance(item, dict) or item.get("enabled", True)
+                if enabled:
+                    logger.warning(f"日志汇报 - 警告 - 跳过无效的SMTP账号 - 原因 - {e}")
+                continue
+            # 名称用于统计与熔断，重复时追加序号
+            if any(exist.name == account.name for exist in accounts):
+                account.name = f"{account.name}-{index + 1}"
+            accounts.append(account)
+        balancer = SmtpAccountBalancer(accounts=accounts, mode=self._balance_mode)
+        if not balancer.accounts:
+            logger.error("日志汇报 - 错误 - SMTP账号配置无效 - 原因 - 没有启用的有效账号")
+            return
+        self._balancer = balancer
+        if self._log_more:
+            logger.info(f"日志汇报 - 汇报 - 已加载{len(self._balancer.accounts)}个启用的SMTP账号")
+
+    def _init_quota(self):
+        """
+        初始化各账号的发送额度，读取保存的令牌桶状态
+        """
+        # 重新加载配置前保存当前状态
+        self._save_quota()
+        self._quota = None
+        if not self._balancer:
+            return
+        limits = {account.name: account.limits for account in self._balancer.accounts}
+        if not any(limit for periods in limits.values() for limit in periods.values()):
+            return
+        self._quota = SmtpQuota(limits=limits, state=self.get_data("quota"))
+
+    def _save_quota(self, force: bool = False):
+        """
+        令牌桶状态保存到插件数据，没有变化时不保存
+        """
+        if not self._quota:
+            return
+        state = self._quota.dump(force=force)
+        if state is not None:
+            self.save_data("quota", state)
+
+    def _init_connectors(self):
+        """
+        为每个服务器创建连接参数，同一服务器的账号共用 SSLContext 与 TLS 会话
+        """
+        self._resolver.invalidate()
+        with self._connector_lock:
+            self._connectors = {}
+        if self._balancer:
+            for account in self._balancer.accounts:
+                self._get_connector(account.conf)
+
+    def _get_connector(self, smtp_conf) -> SmtpConnector:
+        key = (smtp_conf["host"], smtp_conf["port"], smtp_conf["encryption"])
+        with self._connector_lock:
+            connector = self._connectors.get(key)
+            if connector is None:
+                connector = self._connectors[key] = SmtpConnector(resolver=self._resolver)
+            return connector
+
+    def _probe_servers(self):
+        """
+        探测熔断冷却结束的服务器，连接登录成功后恢复使用
+        """
+        if not self._health:
+            return
+        for name in self._health.due_probes():
+            account = self._balancer.get(name) if self._balancer else None
+            if not account:
+                continue
+            server = None
+            start = time.monotonic()
+            try:
+                server = self._connect_to_smtp_server(smtp_conf=account.conf)
+                self._health.record(name, success=True, latency=time.monotonic() - start)
+                logger.info(f"日志汇报 - 状态 - SMTP账号【{name}】探测成功，恢复使用")
+                if self._smtp_pool:
+                    self._smtp_pool.release(key=self._smtp_session_key(account.conf), server=server)
+                    server = None
+            except Exception as e:
+                self._health.record(name, success=False, error=str(e))
+                logger.warning(f"日志汇报 - 警告 - SMTP账号【{name}】探测失败，继续熔断 - 原因 - {e}")
+            finally:
+                if server:
+                    self._quit_server(server=server)
+
+    def _stop_outbox(self):
+        """
+        停止发件队列，未发送的消息转存到重试队列
+        """
+        if not self._outbox:
+            return
+        self._outbox.stop()
+        pending = self._outbox.drain()
+        self._outbox = None
+        if not pending:
+            return
+        if self._spool:
+            for kwargs in pending:
+                self._spool.add(payload=self._spool_encode(kwargs), error="插件停止时未发送")
+            logger.info(f"日志汇报 - 状态 - 发件队列中{len(pending)}条未发送的消息已转存到重试队列")
+        else:
+            logger.warning(f"日志汇报 - 警告 - 插件停止时发件队列中还有{len(pending)}条消息未发送")
+
+    def _init_spool(self):
+        """
+        初始化失败消息重试队列
+        """
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+        if not self._enabled or not self._enabled_spool:
+            return
+        try:
+            self._spool = SmtpSpool(path=self.spool_path,
+                                    max_count=int(self._parse_number(self._spool_max_count, default=500)),
+                                    max_age=self._parse_number(self._spool_max_age, default=24) * 3600)
+        except Exception as e:
+            logger.error(f"日志汇报 - 错误 - 重试队列初始化失败 - 原因 - {e}")
+
+    def _retry_spool(self):
+        """
+        重发到达重试时间的消息，每轮数量有限，避免服务恢复后集中发送
+        """
+        if not self._spool:
+            return
+        expired = self._spool.purge_expired()
+        if expired:
+            logger.warning(f"日志汇报 - 警告 - 重试队列中{expired}条消息超过最长保存时间，已放弃发送")
+        # 全部账号熔断中，等待探测恢复后再重发
+        if self._health and self._balancer and not any(self._health.allow(account.name)
+                                                       for account in self._balancer.accounts):
+            return
+        if not self._quota_available():
+            return
+        due = [([(spool_id, attempts)], self._spool_decode(payload)) for spool_id, payload, attempts in
+               self._spool.due(limit=int(self._parse_number(self._spool_drain_rate, default=10)))]
+        if self._quota and self._quota_merge and len(due) > 1:
+            remaining = self._quota.total_remaining([account.name for account in self._balancer.accounts])
+            if remaining is not None and remaining < len(due):
+                due = self._merge_spooled(due)
+        for entries, kwargs in due:
+            # 本轮发送额度用完，剩余消息等待下一轮
+            if not self._quota_available():
+                break
+            with SmtpMsgDecorator.tracer.stage("消息总耗时"):
+                results = self._send_message(**kwargs)
+            if any(success for _, success in results):
+                for spool_id, attempts in entries:
+                    self._spool.remove(spool_id)
+                logger.info(f"日志汇报 - 状态 - 重试队列消息第{entries[0][1] + 1}次发送成功 - {kwargs.get('title')}")
+            else:
+                error = self._generate_result_log(results)
+                for spool_id, attempts in entries:
+                    self._spool.failure(spool_id, attempts=attempts, error=error)
+
+    def _merge_spooled(self, due: List[Tuple[list, dict]]) -> List[Tuple[list, dict]]:
+        """
+        发送额度不足以逐条发送时，收件人相同的消息合并为一封汇总邮件
+        """
+        groups: Dict[tuple, List[Tuple[list, dict]]] = {}
+        for entry in due:
+            groups.setdefault(tuple(entry[1].get("receivers") or ()), []).append(entry)
+        merged = []
+        for receivers, entries in groups.items():
+            if len(entries) == 1:
+                merged.append(entries[0])
+                continue
+            items = [item for _, kwargs in entries
+                     for item in (kwargs.get("digest") or [{key: value for key, value in kwargs.items()
+                                                           if key not in ("digest", "receivers")}])]
+            merged.append(([pair for pairs, _ in entries for pair in pairs],
+                           self._digest_kwargs(items, receivers=list(receivers) or None, reason="发送额度不足期间")))
+            logger.info(f"日志汇报 - 状态 - 发送额度不足，重试队列中{len(entries)}条消息合并为一封邮件发送")
+        return merged
+
+    def _quota_available(self) -> bool:
+        """
+        是否有账号还有发送额度
+        """
+        if not self._quota or not self._balancer:
+            return True
+        return any(self._quota.allow(account.name) for account in self._balancer.accounts)
+
+    @staticmethod
+    def _spool_encode(kwargs: dict) -> dict:
+        """
+        消息参数转为可保存的格式，消息类型保存为名称
+        """
+        def encode(item: dict) -> dict:
+            item = dict(item)
+            msg_type = item.get("msg_type")
+            if isinstance(msg_type, NotificationType):
+                item["msg_type"] = {"name": msg_type.name}
+            image = item.get("image")
+            if isinstance(image, (list, tuple)):
+                item["image"] = [str(source) for source in image]
+            elif image is not None:
+                item["image"] = str(image)
+            return item
+        payload = encode(kwargs)
+        if payload.get("digest"):
+            payload["digest"] = [encode(item) for item in payload["digest"]]
+        return payload
+
+    @staticmethod
+    def _spool_decode(payload: dict) -> dict:
+        """
+        还原保存的消息参数
+        """
+        def decode(item: dict) -> dict:
+            msg_type = item.get("msg_type")
+            if isinstance(msg_type, dict):
+                try:
+                    item["msg_type"] = NotificationType[msg_type.get("name")]
+                except KeyError:
+                    item["msg_type"] = None
+            return item
+        kwargs = decode(dict(payload))
+        if kwargs.get("digest"):
+            kwargs["digest"] = [decode(item) for item in kwargs["digest"]]
+        return kwargs
+
+    def _init_outbox(self):
+        """
+        初始化发件队列，测试邮件发送完成后再启动，避免与测试邮件混用状态
+        """
+        if not self._enabled or not self._enabled_outbox:
+            return
+        policy = self._outbox_policy
+        if policy not in (SmtpOutbox.POLICY_BLOCK, SmtpOutbox.POLICY_DROP_OLDEST, SmtpOutbox.POLICY_DROP_NEWEST):
+            policy = SmtpOutbox.POLICY_DROP_OLDEST
+        self._outbox = SmtpOutbox(handler=self.master_program,
+                                  maxsize=int(self._parse_number(self._outbox_size, default=100)),
+                                  workers=int(self._parse_number(self._outbox_workers, default=1)),
+                                  policy=policy)
+        self._outbox.start()
+
+    def _init_dedup(self):
+        """
+        初始化消息去重
+        """
+        self._dedup = None
+        if not self._enabled or not self._enabled_dedup:
+            return
+        self._dedup = SmtpDedup(window=self._parse_number(self._dedup_window, default=60))
+
+    def _init_digest(self):
+        """
+        初始化消息汇总
+        """
+        if self._digest:
+            self._digest.flush_all()
+            self._digest = None
+        if not self._enabled or not self._enabled_digest:
+            return
+        self._digest = SmtpDigest(flush=self._flush_digest,
+                                  window=self._parse_number(self._digest_window, default=60),
+                                  max_count=int(self._parse_number(self._digest_max_count, default=20)))
+
+    @staticmethod
+    def _parse_number(value, default: Union[float, int]) -> float:
+        """
+        解析配置中的正数，无效时使用默认值
+        """
+        try:
+            number = float(value)
+            if number > 0:
+                return number
+        except (ValueError, TypeError):
+            pass
+        return float(default)
+
+    def _evict_idle_sessions(self):
+        """
+        清理超过空闲时间的SMTP会话
+        """
+        if self._smtp_pool:
+            count = self._smtp_pool.evict_idle()
+            if count and self._log_more:
+                logger.info(f"日志汇报 - 汇报 - 已关闭{count}个空闲SMTP连接")
 
     def _run_plugin(self):
         """
         启用插件
         """
         # 参数配置不完整，关闭插件
-        if self._main is False and self._secondary is False:
+        if self._enabled and (not self._balancer or not self._balancer.accounts):
             self._enabled = False
             self._test = False
             self.__update_config()
-            msg = "当前参数配置不完整，主服务器与备用服务器至少需要启用一个，关闭插件"
+            msg = "当前参数配置不完整，至少需要启用一个有效的SMTP账号，关闭插件"
             logger.warning(msg)
             self.systemmessage.put(f"{self.plugin_name}插件{msg}")
             return
         else:
             if self._test:
-                msg = self.master_program()
+                with SmtpMsgLock:
+                    msg = self.master_program()
                 self._test = False
                 self.__update_config()
                 self.systemmessage.put(msg)
@@ -1939,66 +3345,237 @@ class SmtpMsg(_PluginBase):
             if not self._other_msgtypes:
                 logger.info(f"消息类型 {msg_type.value} 未开启消息发送")
                 return
-        self.master_program(title=title, text=text, msg_type=msg_type, userid=userid, image=image)
+        # 按过滤规则丢弃消息，在汇总、构建邮件与连接服务器之前完成
+        if self._rule_engine and not self.__msg_filter(title=title, text=text, msg_type=msg_type, userid=userid):
+            return
+        # 窗口期内内容相同的消息只发送一次
+        if self._dedup and self._dedup.is_duplicate(title, text, msg_type.name if msg_type else "", userid, image):
+            if self._log_more:
+                logger.info(f"日志汇报 - 汇报 - 消息在去重窗口内重复，不再发送 - {title}")
+            return
+        msg_kwargs = dict(title=title, text=text, msg_type=msg_type, userid=userid, image=image)
+        # 汇总进行中时消息进入缓存，窗口结束后合并发送
+        if self._digest and not self._digest.add(key=msg_type.name if msg_type else "", item=msg_kwargs):
+            return
+        self._dispatch(**msg_kwargs)
 
-    def master_program(self, title=None, text=None, msg_type=None, userid=None, image=None):
+    def _dispatch(self, **kwargs):
         """
-        运行主要逻辑
+        投递消息，启用发件队列时只负责入队，由后台线程发送
         """
+        if self._router and "receivers" not in kwargs:
+            msg_type = kwargs.get("msg_type")
+            kwargs["receivers"] = self._router.recipients(
+                kwargs.get("userid"), msg_type.name if isinstance(msg_type, NotificationType) else msg_type)
+        if self._outbox:
+            self._outbox.put(**kwargs)
+            return
         with SmtpMsgLock:
-            # todo: 消息过滤，待完善
-            # self.__msg_filter(title=title, text=text, msg_type=msg_type, userid=userid)
-
-            m_success = s_success = None
-            if self._main:
-                smtp_value = 0
-                success, server_type = self._determine_server(smtp_value=smtp_value, success=m_success)
-                if success:
-                    m_success = self._send_to_smtp(smtp_value=smtp_value, server_type=server_type,
-                                                   msg_type=msg_type, title=title, text=text, userid=userid,
-                                                   image=image)
-            if self._secondary:
-                smtp_value = 1
-                success, server_type = self._determine_server(smtp_value=smtp_value, success=m_success)
-                if success:
-                    s_success = self._send_to_smtp(smtp_value=smtp_value, server_type=server_type,
-                                                   msg_type=msg_type, title=title, text=text, userid=userid,
-                                                   image=image)
-            # 打印结果
-            msg = self._generate_result_log(m_success, s_success)
-            return msg
+            self.master_program(**kwargs)
+
+    def _flush_digest(self, key, items: List[dict]):
+        """
+        合并汇总窗口内的消息并投递
+        """
+        if len(items) == 1:
+            self._dispatch(**items[0])
+            return
+        if not self._router:
+            self._dispatch_digest(items)
+            return
+        # 按收件人分组，每个收件人只收到路由到自己的消息，收到相同消息的收件人共用一封邮件
+        groups = self._router.group([(item.get("userid"), item["msg_type"].name
+                                      if isinstance(item.get("msg_type"), NotificationType) else item.get("msg_type"))
+                                     for item in items])
+        for receivers, indexes in groups:
+            self._dispatch_digest([items[index] for index in indexes], receivers=receivers)
+
+    def _dispatch_digest(self, items: List[dict], receivers: Optional[List[str]] = None):
+        """
+        投递汇总消息
+        :param receivers: 收件人列表，为空时使用默认收件人
+        """
+        if len(items) == 1:
+            self._dispatch(**items[0], receivers=receivers)
+            return
+        self._dispatch(**self._digest_kwargs(items, receivers=receivers))
+
+    def _digest_kwargs(self, items: List[dict], receivers: Optional[List[str]] = None,
+                       reason: str = "汇总期间") -> dict:
+        """
+        多条消息合并为一条汇总消息的参数，消息类型不同时不区分类型
+        """
+        msg_types = {item.get("msg_type") for item in items}
+        msg_type = items[0].get("msg_type") if len(msg_types) == 1 else None
+        type_name = msg_type.value if isinstance(msg_type, NotificationType) else "消息"
+        userids = list(dict.fromkeys(str(item.get("userid")) for item in items if item.get("userid")))
+        # 汇总消息中的图片全部嵌入，超过数量上限的图片在参数校验时舍弃
+        images = list(dict.fromkeys(source for item in items
+                                    for source in self._image_sources(item.get("image"))))
+        image = images if len(images) > 1 else next(iter(images), None)
+        return dict(title=f"【{type_name}汇总】共{len(items)}条消息",
+                    text=f"{reason}共收到{len(items)}条{type_name}",
+                    msg_type=msg_type, userid=",".join(userids), image=image, digest=items, receivers=receivers)
+
+    def master_program(self, title=None, text=None, msg_type=None, userid=None, image=None, digest=None,
+                       receivers=None):
+        """
+        运行主要逻辑，服务器配置按次传递，可由多个发送线程同时调用
+        :param receivers: 收件人路由选择的收件人，为空时使用默认收件人
+        """
+        msg_kwargs = dict(msg_type=msg_type, title=title, text=text, userid=userid, image=image, digest=digest,
+                          receivers=receivers)
+        with SmtpMsgDecorator.tracer.stage("消息总耗时"):
+            results = self._send_message(**msg_kwargs)
+        # 打印结果
+        msg = self._generate_result_log(results)
+        # 全部账号发送失败，保存到重试队列
+        if self._spool and not self._test and not any(success for _, success in results):
+            self._spool.add(payload=self._spool_encode(msg_kwargs), error=msg)
+            logger.info(f"日志汇报 - 状态 - 消息已保存到重试队列，稍后重新发送 - {title}")
+        return msg
+
+    def _send_message(self, title=None, text=None, msg_type=None, userid=None, image=None,
+                      digest=None, receivers=None) -> List[Tuple[str, bool]]:
+        """
+        按候选账号依次发送
+        :return: 各账号的发送结果 (账号名称, 是否成功)
+        """
+        msg_kwargs = dict(msg_type=msg_type, title=title, text=text, userid=userid, image=image, digest=digest,
+                          receivers=receivers)
+        results = []
+        candidates = self._select_accounts()
+        session = None
+        if self._enabled_hedged and not self._test and len(candidates) > 1:
+            # 对冲连接，使用最先完成登录的账号发送
+            account, session = self._hedged_session(candidates=candidates)
+            if session:
+                candidates.remove(account)
+                candidates.insert(0, account)
+        last_success = None
+        # 同一条消息只编码一次，多个账号之间复用
+        prepared = {}
+        for account in candidates:
+            if self._determine_server(account=account, success=last_success):
+                last_success = self._send_to_smtp(account=account, session=session, prepared=prepared,
+                                                  **msg_kwargs)
+                results.append((account.name, last_success))
+            elif session:
+                self._quit_server(server=session, smtp_conf=account.conf, reusable=True)
+            session = None
+        return results
+
+    def _select_accounts(self) -> List[SmtpAccount]:
+        """
+        按账号选择方式排列候选账号，跳过熔断中与发送额度已用完的账号；测试时使用全部启用的账号
+        """
+        if not self._balancer:
+            return []
+        if self._test:
+            return list(self._balancer.accounts)
+        candidates = self._balancer.candidates(allow=self._health.allow if self._health else None,
+                                               limit=self._quota.allow if self._quota else None)
+        if not candidates:
+            logger.warning(f"日志汇报 - 警告 - 全部SMTP账号的发送额度已用完，"
+                           f"{'消息保存到重试队列，额度恢复后发送' if self._spool else '本次消息不发送'}")
+        elif self._log_more:
+            logger.info(f"日志汇报 - 汇报 - 本次首选SMTP账号【{candidates[0].name}】，"
+                        f"候选账号{len(candidates)}个")
+        return candidates
+
+    def _hedged_session(self, candidates: List[SmtpAccount]) -> Tuple[Optional[SmtpAccount], Any]:
+        """
+        先连接首选账号，超过延迟预算仍未完成时同时连接下一个账号
+        :return: 最先完成登录的账号与连接，全部失败时返回 None, None
+        """
+        hedge_delay = self._parse_number(self._hedge_delay, default=2)
+        deadline = (time.monotonic() + max(self._smtp_timeout(account.conf) for account in candidates)
+                    + hedge_delay)
+        futures = {}
+        winner = (None, None)
+        for index, account in enumerate(candidates):
+            futures[self._prepare_executor.submit(SmtpMsgDecorator.tracer.bind(self._get_smtp_session),
+                                                  smtp_conf=account.conf)] = account
+            # 最后一个账号不再等待延迟预算
+            last = index == len(candidates) - 1
+            timeout = max(deadline - time.monotonic(), 0) if last else hedge_delay
+            pending = set(futures)
+            while pending and winner[1] is None:
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if not future.exception() and winner[1] is None:
+                        winner = (futures[future], future.result())
+                if last:
+                    timeout = max(deadline - time.monotonic(), 0)
+            if winner[1] is not None:
+                break
+        # 未被使用的连接，完成后归还会话池或关闭
+        for future, account in futures.items():
+            if account is not winner[0]:
+                future.add_done_callback(partial(self._release_hedged_session, smtp_conf=account.conf))
+        return winner
+
+    def _release_hedged_session(self, future: Future, smtp_conf: dict):
+        """
+        归还对冲中未被使用的连接
+        """
+        if future.exception():
+            return
+        self._quit_server(server=future.result(), smtp_conf=smtp_conf, reusable=True)
 
     @SmtpMsgDecorator.log("邮件发送")
-    def _send_to_smtp(self, smtp_value, log_container, server_type,
-                      msg_type=None, title=None, text=None, image=None, userid=None):
+    def _send_to_smtp(self, account: SmtpAccount, log_container,
+                      msg_type=None, title=None, text=None, image=None, userid=None, digest=None, session=None,
+                      prepared: dict = None, receivers=None):
         """
         连接-构建-发送 逻辑
+        :param session: 已登录的连接，为空时自动获取
+        :param prepared: 同一条消息已编码的邮件，用于多个账号之间复用
         """
-        msg = level = server = None
+        msg = level = smtp_conf = None
+        server = session
+        success = reserved = False
+        reusable = True
+        start = time.monotonic()
+        if self._balancer:
+            self._balancer.begin(account.name)
         try:
-            if smtp_value == 0:
-                smtp_type = "main"
-            elif smtp_value == 1:
-                smtp_type = "secondary"
-            else:
-                raise Exception("无效的SMTP服务器类型，无法识别")
-
+            # 预占发送额度，同时发送的消息较多时额度可能已被占用
+            if self._quota and not self._test:
+                reserved = self._quota.acquire(account.name)
+                if not reserved:
+                    raise Exception(f"SMTP账号【{account.name}】的发送额度已用完")
             # 消息参数校验
             title, text, image, userid, msg_type = (
                 self._msg_parameter_validation(msg_type=msg_type, title=title, text=text, image=image, userid=userid,
-                                               server_type=server_type))
+                                               account_name=account.name))
             # 读取服务端配置
-            self._get_dict_value(server_type=server_type, smtp_type=smtp_type)
-            # 连接与认证 SMTP 服务器
-            server = self._connect_to_smtp_server()
+            smtp_conf = self._get_dict_value(account=account)
             # 读取收件人与发件人配置
-            receiver_list, sender_name, sender_mail = self._get_receiver_and_sender()
-            # 构建邮件
-            message = self._msg_build_email(title=title, text=text, image=image, userid=userid, msg_type=msg_type,
-                                            sender_name=sender_name, sender_mail=sender_mail)
+            receiver_list, sender_name, sender_mail = self._get_receiver_and_sender(smtp_conf=smtp_conf,
+                                                                                    receivers=receivers)
+            build_kwargs = dict(title=title, text=text, image=image, userid=userid, msg_type=msg_type,
+                                sender_name=sender_name, sender_mail=sender_mail, digest=digest, prepared=prepared)
+            if server or (prepared and (title, image) in prepared):
+                message = self._msg_build_email(**build_kwargs)
+            elif self._enabled_pipeline:
+                # 图片获取与模板渲染在后台进行，同时连接与认证 SMTP 服务器，共用一个发送期限
+                deadline = time.monotonic() + max(self._smtp_timeout(smtp_conf), self._image_deadline(image))
+                future = self._prepare_executor.submit(SmtpMsgDecorator.tracer.bind(self._msg_build_email),
+                                                       **build_kwargs)
+                server = self._get_smtp_session(smtp_conf=smtp_conf)
+                message = self._wait_prepared_email(future=future, deadline=deadline, build_kwargs=build_kwargs)
+            else:
+                # 连接与认证 SMTP 服务器，优先复用会话池中的连接
+                server = self._get_smtp_session(smtp_conf=smtp_conf)
+                # 构建邮件
+                message = self._msg_build_email(**build_kwargs)
             # 发送邮件
-            send_status = self._send_msg_to_smtp(server=server, message=message, sender_mail=self._sender_mail,
-                                                 receiver_list=receiver_list, server_type=server_type)
+            send_status, reusable = self._send_msg_to_smtp(server=server, message=message,
+                                                           sender_mail=sender_mail, receiver_list=receiver_list,
+                                                           account_name=account.name, smtp_conf=smtp_conf)
 
             msg = "邮件发送成功" if send_status else "邮件发送失败"
             success = True if send_status else False
@@ -2010,46 +3587,108 @@ class SmtpMsg(_PluginBase):
             level = -1
             return success
         finally:
-            self._quit_server(server=server)
+            # 发送时连接异常的会话不再归还会话池
+            self._quit_server(server=server, smtp_conf=smtp_conf or account.conf, reusable=success and reusable)
+            if reserved and not success:
+                self._quota.refund(account.name)
+            if self._balancer:
+                self._balancer.end(account.name, success=success)
+            # 只统计已读取服务端配置之后的结果，参数错误不计入服务器健康状态
+            if self._health and smtp_conf and not self._test:
+                self._health.record(account.name, success=success, latency=time.monotonic() - start,
+                                    error=None if success else msg)
             log_container['msg'] = msg
             log_container['level'] = level
 
     # filter
 
-    # Todo：读取json格式配置辅助消息过滤功能的实现
     @SmtpMsgDecorator.log("读取过滤规则")
-    def __read_json_filter(self):
-        pass
+    def __read_json_filter(self, log_container) -> Optional[SmtpMsgRuleEngine]:
+        """
+        读取并编译过滤规则，启用自定义规则文件时合并文件中的规则
+        """
+        msg = level = None
+        try:
+            try:
+                rules = json.loads(self._msg_rules or "[]")
+            except ValueError as e:
+                raise Exception(f"过滤规则不是有效的JSON - {e}")
+            if self._enabled_customizable_msg_rules and self.custom_rules.exists():
+                try:
+                    rules = list(rules) + list(json.loads(self.custom_rules.read_text(encoding="utf-8")))
+                except (ValueError, TypeError) as e:
+                    raise Exception(f"自定义规则文件不是有效的JSON数组 - {e}")
+            try:
+                engine = SmtpMsgRuleEngine(rules)
+            except ValueError as e:
+                raise Exception(e)
+            msg = f"已加载{len(engine.rules)}条过滤规则"
+            level = 0
+            return engine
+        except Exception as e:
+            msg = f"过滤规则加载失败，不过滤消息 - 原因 - {e}"
+            level = 2
+            return None
+        finally:
+            log_container['msg'] = msg
+            log_container['level'] = level
+
+    @SmtpMsgDecorator.log("读取收件人路由")
+    def __read_recipient_routes(self, log_container) -> Optional[SmtpRecipientRouter]:
+        """
+        读取收件人路由
+        """
+        msg = level = None
+        try:
+            try:
+                routes = json.loads(self._recipient_routes or "[]")
+            except ValueError as e:
+                raise Exception(f"收件人路由不是有效的JSON - {e}")
+            try:
+                router = SmtpRecipientRouter(routes)
+            except ValueError as e:
+                raise Exception(e)
+            msg = f"已加载{len(router.routes)}条收件人路由"
+            level = 0
+            return router
+        except Exception as e:
+            msg = f"收件人路由加载失败，全部消息发送至默认收件人 - 原因 - {e}"
+            level = 2
+            return None
+        finally:
+            log_container['msg'] = msg
+            log_container['level'] = level
 
-    # Todo：消息过滤功能的实现
     @SmtpMsgDecorator.log("消息过滤")
-    def __msg_filter(self, title, text, msg_type, userid):
-        pass
+    def __msg_filter(self, title, text, msg_type, userid, log_container) -> bool:
+        """
+        判断消息是否需要发送
+        """
+        type_name = msg_type.name if isinstance(msg_type, NotificationType) else msg_type
+        now = datetime.now(tz=pytz.timezone(settings.TZ)).time()
+        allowed, rule = self._rule_engine.check(title=title, text=text, msg_type=type_name, userid=userid, now=now)
+        if allowed:
+            log_container['msg'] = lambda: f"消息通过过滤 - {title}"
+            log_container['level'] = 1
+        else:
+            log_container['msg'] = f"消息{'命中规则【' + rule + '】' if rule else '未命中任何包含规则'}，不发送 - {title}"
+            log_container['level'] = 3
+        return allowed
 
     # smtp_server
 
     @SmtpMsgDecorator.log("服务器调用判断")
-    def _determine_server(self, smtp_value, success, log_container):
+    def _determine_server(self, account: SmtpAccount, success, log_container):
+        """
+        判断是否需要使用该账号发送，测试时全部账号都发送，否则前一个账号发送成功后不再发送
+        """
         msg = level = None
         try:
-            if smtp_value == 0:
-                server_type = "主"
-            elif smtp_value == 1:
-                server_type = "备用"
-            else:
-                raise Exception("未知的SMTP服务器类型")
-            if self._test and smtp_value == 1:
-                status = self._secondary
-            else:
-                if success:
-                    status = False
-                else:
-                    status = True
+            status = True if self._test else not success
             result = "开始调用" if status else "不需要调用"
-            success = status
-            msg = f'{server_type}服务器调用判断 - {result}'
+            msg = lambda: f'SMTP账号【{account.name}】调用判断 - {result}'
             level = 1
-            return success, server_type
+            return status
         except Exception as e:
             level = -1
             msg = f'判断失败 - 原因 - {e}'
@@ -2058,34 +3697,74 @@ class SmtpMsg(_PluginBase):
             log_container['msg'] = msg
             log_container['level'] = level
 
+    @staticmethod
+    def _smtp_session_key(smtp_conf: dict) -> tuple:
+        """
+        会话池中区分服务器的标识
+        """
+        return smtp_conf["host"], smtp_conf["port"], smtp_conf["encryption"], smtp_conf["mail"]
+
+    @SmtpMsgDecorator.log("会话获取")
+    def _get_smtp_session(self, smtp_conf, log_container):
+        """
+        获取已认证的SMTP会话
+        """
+        msg = level = None
+        try:
+            if not self._smtp_pool:
+                server = self._connect_to_smtp_server(smtp_conf=smtp_conf)
+                msg = "未启用连接复用，已建立新连接"
+            else:
+                server, reused = self._smtp_pool.acquire(key=self._smtp_session_key(smtp_conf),
+                                                         factory=partial(self._connect_to_smtp_server,
+                                                                         smtp_conf=smtp_conf))
+                msg = "复用已有连接" if reused else "连接池中没有可用连接，已建立新连接"
+                if reused and server.sock:
+                    # 复用的连接按当前的超时时间发送
+                    server.sock.settimeout(self._smtp_timeout(smtp_conf))
+            level = 1
+            return server
+        except Exception as e:
+            level = -1
+            msg = f"获取连接失败 - 原因 - {e}"
+            raise Exception(msg)
+        finally:
+            log_container['msg'] = msg
+            log_container['level'] = level
+
     @SmtpMsgDecorator.log("服务器连接")
-    def _connect_to_smtp_server(self, log_container):
-        msg = level = server_timeout = None
+    def _connect_to_smtp_server(self, smtp_conf, log_container):
+        msg = level = None
+        server_timeout = self._smtp_timeout(smtp_conf)
+        start = time.monotonic()
         try:
             try:
-                try:
-                    if self._server_timeout:
-                        if float(self._server_timeout) > 0:
-                            server_timeout = float(self._server_timeout)
-                    else:
-                        server_timeout = float(10)
-                except (ValueError, TypeError):
-                    server_timeout = float(10)
-
-                if self._encryption == "ssl":
-                    server = smtplib.SMTP_SSL(self._host, self._port, timeout=server_timeout)
-                else:
-                    server = smtplib.SMTP(self._host, self._port, timeout=server_timeout)
-                    if self._encryption == "tls":
+                host, port = smtp_conf["host"], smtp_conf["port"]
+                tracer = SmtpMsgDecorator.tracer
+                connector = self._get_connector(smtp_conf)
+                with tracer.stage("DNS解析"):
+                    self._resolver.resolve(host, port)
+                with tracer.stage("建立连接"):
+                    server = SmtpClient(connector, host, port, timeout=server_timeout,
+                                        implicit_tls=smtp_conf["encryption"] == "ssl")
+                if smtp_conf["encryption"] == "tls":
+                    with tracer.stage("STARTTLS"):
                         server.starttls()
 
-                server.ehlo(self._host)
-                server.login(self._sender_mail, self._password)
+                with tracer.stage("EHLO"):
+                    server.ehlo(host)
+                with tracer.stage("LOGIN"):
+                    server.login(smtp_conf["mail"], smtp_conf["password"])
+                # 登录响应之后已收到会话票据，保存用于下次连接
+                connector.remember(server.sock)
+                self._observe_smtp(smtp_conf, time.monotonic() - start)
                 msg = "地址连接成功"
                 level = 1
                 return server
             except socket.timeout as e:
-                raise Exception(f'建立连接超时 - {e}')
+                # 超时只计数，不作为耗时样本，避免超时时间被推高
+                self._observe_smtp(smtp_conf)
+                raise Exception(f'建立连接超时（{server_timeout:.1f}秒） - {e}')
             except socket.gaierror as e:
                 raise Exception(f'无法解析主机名或 IP 地址 - {e}')
             except smtplib.SMTPConnectError as e:
@@ -2108,32 +3787,43 @@ class SmtpMsg(_PluginBase):
             log_container['msg'] = msg
             log_container['level'] = level
 
-    @SmtpMsgDecorator.log("邮件发送")
-    def _send_msg_to_smtp(self, server, message, sender_mail, receiver_list, server_type, log_container):
+    @SmtpMsgDecorator.log("邮件发送", stage="DATA传输")
+    def _send_msg_to_smtp(self, server, message, sender_mail, receiver_list, account_name, log_container,
+                          smtp_conf=None):
+        """
+        发送邮件，收件人较多时分批通过多个连接同时发送，只重试临时失败的收件人
+        :return: (是否发送成功, 传入的连接是否仍然可用)
+        """
         test_type = "测试" if self._test else ""
         msg = level = None
         try:
-            try:
-                server.sendmail(sender_mail, receiver_list, message.as_string())
-            except socket.timeout as e:
-                raise Exception(f"连接超时 - {e}")
-            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
-                raise Exception(f"拒绝了接受或发送者地址 - {e}")
-            except smtplib.SMTPDataError as e:
-                raise Exception(f"拒绝了接受邮件数据，返回了错误响应 - {e}")
-            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
-                raise Exception(f"断开了连接 - {e}")
-            except smtplib.SMTPAuthenticationError as e:
-                raise Exception(f"身份验证失败 - {e}")
-            except smtplib.SMTPNotSupportedError as e:
-                raise Exception(f"不支持某些功能 - {e}")
-            except smtplib.SMTPException as e:
-                raise Exception(f"出现了未知原因 - {e}")
-            msg = f"使用{server_type} SMTP 服务器发送{test_type}邮件成功"
-            level = 1
-            return True
+            sender = SmtpShardSender(
+                executor=self._prepare_executor,
+                acquire=SmtpMsgDecorator.tracer.bind(partial(self._get_smtp_session, smtp_conf=smtp_conf)),
+                release=lambda session, reusable: self._quit_server(server=session, smtp_conf=smtp_conf,
+                                                                    reusable=reusable),
+                chunk_size=int(self._parse_number(self._recipient_chunk_size, default=50)),
+                concurrency=int(min(self._parse_number(self._recipient_concurrency, default=2), 4)))
+            start = time.monotonic()
+            failed, server_ok = sender.send(server=server, sender_mail=sender_mail, recipients=receiver_list,
+                                            message=message)
+            if smtp_conf and not failed:
+                # 发送耗时同样计入，避免服务器处理较慢的邮件时超时
+                self._observe_smtp(smtp_conf, time.monotonic() - start)
+            self._recipient_stats.record(receiver_list, failed)
+            if len(failed) >= len(receiver_list):
+                code, error = next(iter(failed.values()))
+                raise Exception(f"全部收件人发送失败 - {f'{code} ' if code else ''}{error}")
+            if failed:
+                msg = (f"使用SMTP账号【{account_name}】发送{test_type}邮件部分成功 - "
+                       f"{len(failed)}/{len(receiver_list)}个收件人失败 - {', '.join(failed)}")
+                level = 2
+            else:
+                msg = lambda: f"使用SMTP账号【{account_name}】发送{test_type}邮件成功"
+                level = 1
+            return True, server_ok
         except Exception as e:
-            msg = f"使用{server_type} SMTP 服务器发送{test_type}邮件失败 - 原因 - {e}"
+            msg = f"使用SMTP账号【{account_name}】发送{test_type}邮件失败 - 原因 - {e}"
             level = -1
             raise Exception(msg)
         finally:
@@ -2141,13 +3831,16 @@ class SmtpMsg(_PluginBase):
             log_container['level'] = level
 
     @SmtpMsgDecorator.log("关闭连接")
-    def _quit_server(self, server, log_container):
+    def _quit_server(self, server, log_container, smtp_conf=None, reusable=False):
         """
-        断开服务器连接
+        断开服务器连接，启用连接复用且发送成功时归还到会话池
         """
         msg = level = None
         try:
-            if server:
+            if server and reusable and self._smtp_pool and smtp_conf:
+                self._smtp_pool.release(key=self._smtp_session_key(smtp_conf), server=server)
+                msg = '连接已归还会话池'
+            elif server:
                 server.quit()
                 msg = '关闭连接成功'
             else:
@@ -2163,8 +3856,8 @@ class SmtpMsg(_PluginBase):
     # setting
 
     @SmtpMsgDecorator.log("消息参数校验")
-    def _msg_parameter_validation(self, log_container, server_type, msg_type=None, title=None, text=None, image=None,
-                                  userid=None):
+    def _msg_parameter_validation(self, log_container, account_name, msg_type=None, title=None, text=None,
+                                  image=None, userid=None):
         msg = level = None
         try:
             if self._test:
@@ -2181,7 +3874,7 @@ class SmtpMsg(_PluginBase):
                         raise Exception("接收到不被支持的消息类型，且未开启第三方消息类型")
 
             if self._test:
-                title = f"测试{server_type}服务器配置"
+                title = f"测试SMTP账号【{account_name}】配置"
             else:
                 title = title if title is not None else f"【{self.plugin_name}】"
 
@@ -2197,10 +3890,13 @@ class SmtpMsg(_PluginBase):
 
             if self._test:
                 image = self._test_image
+            elif isinstance(image, (list, tuple)):
+                # 多张图片转为元组，用于已编码邮件的缓存键
+                image = tuple(self._image_sources(image))[:self.gallery_max_images]
             else:
                 image = image if image is not None else ""
 
-            msg = f"消息参数校验成功 - 当前消息类型 - {msg_type}"
+            msg = lambda: f"消息参数校验成功 - 当前消息类型 - {msg_type}"
             level = 1
             return title, text, image, userid, msg_type
 
@@ -2214,94 +3910,96 @@ class SmtpMsg(_PluginBase):
             log_container['level'] = level
 
     @SmtpMsgDecorator.log("连接配置提取")
-    def _get_dict_value(self, server_type, smtp_type, log_container):
+    def _get_dict_value(self, account: SmtpAccount, log_container):
         """
         获取配置参数
         """
         msg = level = None
         try:
-            try:
-                _smtp_settings = self.__smtp_settings()
-                self._host = _smtp_settings[smtp_type]["host"]
-                self._port = _smtp_settings[smtp_type]["port"]
-                self._encryption = _smtp_settings[smtp_type]["encryption"]
-                self._sender_mail = _smtp_settings[smtp_type]["mail"]
-                self._password = _smtp_settings[smtp_type]["password"]
-                msg = f"提取{server_type} SMTP 服务端配置成功"
-                level = 1
-
-            except KeyError as e:
-                raise Exception(f'{server_type} SMTP 服务端配置参数不完整 - {e}')
-            except Exception as e:
-                raise Exception(f'出现异常 - 原因 - {e}')
+            smtp_conf = account.conf
+            missing = [key for key in ("host", "port", "mail", "password") if not smtp_conf.get(key)]
+            if missing:
+                raise Exception(f'SMTP账号【{account.name}】配置参数不完整 - {", ".join(missing)}')
+            msg = lambda: f"提取SMTP账号【{account.name}】配置成功"
+            level = 1
+            return smtp_conf
         except Exception as e:
             level = -1
+            msg = f'出现异常 - 原因 - {e}'
             raise Exception(e)
 
         finally:
             log_container['msg'] = msg
             log_container['level'] = level
 
-    def __smtp_settings(self):
+    # message
+
+    def _msg_build_email(self, title, text, image, userid, msg_type, sender_name, sender_mail, message=None,
+                         digest=None, prepared: dict = None) -> bytes:
         """
-        整合配置参数
+        构建邮件，返回序列化后的邮件数据
+        :param prepared: 已编码的邮件，按标题与图片参数保存，存在时只替换发件人
         """
-        try:
-            _smtp_settings = {
-                "main": {
-                    "host": self._main_smtp_host,
-                    "port": self._main_smtp_port,
-                    "encryption": self._main_smtp_encryption,
-                    "mail": self._main_sender_mail,
-                    "password": self._main_sender_password,
-                },
-                "secondary": {
-                    "host": self._secondary_smtp_host,
-                    "port": self._secondary_smtp_port,
-                    "encryption": self._secondary_smtp_encryption,
-                    "mail": self._secondary_sender_mail,
-                    "password": self._secondary_sender_password,
-                }
-            }
-
-            return _smtp_settings
-
-        except Exception as e:
-            raise Exception(e)
-
-    # message
+        encoded = prepared.get((title, image)) if prepared is not None else None
+        if not encoded:
+            if not message:
+                message = MIMEMultipart()
+                images = self.___msg_build_email_body_fetch_images(image)
+                msg_html = self.__msg_build_read_email_template(text=text, image=image, title=title, userid=userid,
+                                                                msg_type=msg_type, digest=digest,
+                                                                gallery=self._render_gallery(
+                                                                    [index for index, _ in images]))
+                message = self.__msg_build_email_Header(message, title, sender_name, sender_mail)
+                message = self.__msg_build_email_body(message, images, msg_html)
+            with SmtpMsgDecorator.tracer.stage("邮件编码"):
+                encoded = SmtpEncodedMessage(message)
+            if prepared is not None:
+                prepared[(title, image)] = encoded
+        return encoded.for_sender(sender_name, sender_mail)
 
-    def _msg_build_email(self, title, text, image, userid, msg_type, sender_name, sender_mail, message=None):
+    @SmtpMsgDecorator.log("邮件预构建")
+    def _wait_prepared_email(self, future: Future, deadline: float, build_kwargs: dict, log_container):
         """
-        构建邮件
+        等待后台构建的邮件，超过发送期限时放弃图片，直接构建不含图片的邮件
         """
-        if not message:
-            message = MIMEMultipart()
-            msg_html = self.__msg_build_read_email_template(text=text, image=image, title=title, userid=userid,
-                                                            msg_type=msg_type)
-            message = self.__msg_build_email_Header(message, title, sender_name, sender_mail)
-            message = self.__msg_build_email_body(message, image, msg_html)
-        if message:
+        msg = level = None
+        try:
+            try:
+                message = future.result(timeout=max(deadline - time.monotonic(), 0))
+                msg = "邮件预构建完成"
+                level = 1
+            except FutureTimeoutError:
+                message = self._msg_build_email(**{**build_kwargs, "image": ""})
+                msg = "图片获取超过发送期限，跳过图片嵌入"
+                level = 2
             return message
+        except Exception as e:
+            level = -1
+            msg = f"邮件预构建失败 - 原因 - {e}"
+            raise Exception(msg)
+        finally:
+            log_container['msg'] = msg
+            log_container['level'] = level
 
     @SmtpMsgDecorator.log("邮件头参数提取")
-    def _get_receiver_and_sender(self, log_container):
+    def _get_receiver_and_sender(self, smtp_conf, log_container, receivers=None):
         """
         读取收件人与发件人配置
+        :param receivers: 收件人路由选择的收件人，优先于收件人配置
         """
         msg = level = None
         try:
             try:
-                if self._receiver_mail:
-                    receiver_list = self._receiver_mail.split(",")
-                else:
-                    receiver_list = self._sender_mail
+                receiver_list = ([mail.strip() for mail in receivers if mail and mail.strip()] if receivers else
+                                 [mail.strip() for mail in (self._receiver_mail or "").split(",") if mail.strip()])
+                if not receiver_list:
+                    receiver_list = [smtp_conf["mail"]]
             except Exception:
                 raise Exception('提取收件人配置失败')
 
             try:
-                sender_name = self._sender_name if self._sender_name else self._sender_mail
-                sender_mail = self._sender_mail
+                sender_name = self._sender_name if self._sender_name else smtp_conf["mail"]
+                sender_mail = smtp_conf["mail"]
             except Exception:
                 raise Exception('提取发件人配置失败')
 
@@ -2319,16 +4017,16 @@ class SmtpMsg(_PluginBase):
             log_container['level'] = level
 
     @SmtpMsgDecorator.log("模板导入")
-    def __msg_build_read_email_template(self, text, image, title, userid, msg_type, log_container):
+    def __msg_build_read_email_template(self, text, image, title, userid, msg_type, log_container, digest=None,
+                                        gallery=""):
         msg = level = None
         try:
             try:
-                if self._enabled_customizable_mail_template:
-                    template = self.custom_template
-                else:
-                    template = self.default_template
-                with open(template, "r", encoding="utf-8") as template_file:
-                    template_content = template_file.read()
+                template = self._template_cache.get(self._get_template_path())
+            except KeyError as e:
+                raise Exception(f"邮件模板文件中导入了不被支持的变量 - {e}")
+            except ValueError as e:
+                raise Exception(f"邮件模板文件格式错误 - {e}")
             except FileNotFoundError as e:
                 raise Exception(f"没有找到邮件模板文件 - {e}")
             except PermissionError as e:
@@ -2339,14 +4037,16 @@ class SmtpMsg(_PluginBase):
                 raise Exception(f"包含非 UTF-8 编码的内容，尝试用 UTF-8 编码读取邮件模板失败 - {e}")
             except Exception as e:
                 raise Exception(f"邮件模板文件读取失败，出现了未知错误 - {e}")
+            digest_html = self._render_digest(digest) if digest else ""
+            # 模板中没有汇总列表变量时，将汇总列表追加到内容中
+            if digest_html and "digest" not in template.placeholders:
+                text = f"{text}\n{digest_html}"
             try:
-                msg_html = template_content.format(text=text, image=image, title=title, userid=userid,
-                                                   msg_type=msg_type)
-            except KeyError as e:
-                raise Exception(f"邮件模板文件中导入了不被支持的变量 - {e}")
+                msg_html = template.render(text=text, image=image, title=title, userid=userid,
+                                           msg_type=msg_type, digest=digest_html, gallery=gallery)
             except Exception as e:
                 raise Exception(f"邮件模板文件在导入变量时遇到了未知错误 - {e}")
-            msg = f"成功提取邮件模板并导入变量"
+            msg = "成功提取邮件模板并导入变量"
             level = 1
             return msg_html
         except Exception as e:
@@ -2357,6 +4057,24 @@ class SmtpMsg(_PluginBase):
             log_container['msg'] = msg
             log_container['level'] = level
 
+    @staticmethod
+    def _render_digest(digest: List[dict]) -> str:
+        """
+        生成汇总列表
+        """
+        rows = [f'<li style="margin-bottom:8px;"><b>{item.get("title") or ""}</b>\n{item.get("text") or ""}</li>'
+                for item in digest]
+        return f'<ol style="white-space:pre-line; margin:0; padding-left:20px;">{"".join(rows)}</ol>'
+
+    @staticmethod
+    def _render_gallery(indices: List[int]) -> str:
+        """
+        生成第二张起的图片列表，第一张图片由模板中的 cid:image0 引用
+        :param indices: 获取成功的图片的来源序号
+        """
+        return "".join(f'<img src="cid:image{index}" width="256px" style="padding:10px; display:inline-block;" '
+                       f'alt="Image {index + 1}">' for index in indices if index > 0)
+
     @SmtpMsgDecorator.log("邮件头构建")
     def __msg_build_email_Header(self, message, title, sender_name, sender_mail, log_container):
         msg = level = None
@@ -2394,15 +4112,20 @@ class SmtpMsg(_PluginBase):
             log_container['level'] = level
 
     @SmtpMsgDecorator.log("邮件体构建")
-    def __msg_build_email_body(self, message, image, msg_html, log_container):
+    def __msg_build_email_body(self, message, images, msg_html, log_container):
         msg = level = None
         try:
             message_alternative = MIMEMultipart('alternative')
             message.attach(message_alternative)
 
-            image_mime = self.___msg_build_email_body_embed_image(image)
-            if image_mime:
-                message.attach(image_mime)
+            # 兼容旧模板中的 cid:image，指向第一张图片
+            msg_html = re.sub(r"cid:image(?![\w-])", "cid:image0", msg_html)
+            # 只嵌入模板中引用的图片，编号为图片的来源序号
+            for index, image_data in images:
+                if f"cid:image{index}" in msg_html:
+                    message.attach(self._mime_part_cache.image(
+                        image_data, subtype=SmtpImageProcessor.guess_subtype(image_data),
+                        content_id=f"<image{index}>"))
             html_part = MIMEText(msg_html, 'html', 'utf-8')
             message_alternative.attach(html_part)
             level = 1
@@ -2416,125 +4139,314 @@ class SmtpMsg(_PluginBase):
             log_container['msg'] = msg
             log_container['level'] = level
 
-    @SmtpMsgDecorator.log("图片嵌入")
-    def ___msg_build_email_body_embed_image(self, image, log_container):
-        msg = level = image_mime = image_timeout = None
-        if self._send_image:
-            if image:
+    @staticmethod
+    def _image_sources(image) -> List[str]:
+        """
+        图片参数转为图片来源列表，支持单个来源或来源列表
+        """
+        if isinstance(image, (list, tuple)):
+            return [str(source) for source in image if source]
+        return [image] if image else []
+
+    @SmtpMsgDecorator.log("图片获取")
+    def ___msg_build_email_body_fetch_images(self, image, log_container) -> List[Tuple[int, bytes]]:
+        """
+        同时获取全部图片，共用一个获取期限，超过期限或获取失败的图片跳过，不影响邮件发送
+        :return: 获取成功的图片 (来源序号, 图片数据)，来源序号对应 cid:image{序号}，跳过的图片不影响其他图片的编号
+        """
+        msg = level = None
+        images = []
+        sources = self._image_sources(image)
+        if not self._send_image:
+            level = 1
+            msg = '未开启发送图片，抛弃图片数据'
+        elif not sources:
+            level = 2
+            msg = '未传入图片参数，跳过图片嵌入'
+        else:
+            errors = []
+            if len(sources) == 1:
                 try:
-                    try:
-                        image_path = Path(image).resolve()
-                        if image_path.is_file():
-                            with open(image, 'rb') as image_file:
-                                image_data = image_file.read()
-                        else:
-                            image_url = new_proxies = response = None
-                            parsed_url = urllib.parse.urlparse(image)
-                            if parsed_url.scheme in set(urllib.parse.uses_netloc):
-                                proxies = settings.PROXY if self._enabled_proxy_image else None
-                                github_proxy = settings.GITHUB_PROXY if self._enabled_github_proxy_image else None
-                                try:
-                                    if self._image_timeout:
-                                        if float(self._image_timeout) > 0:
-                                            image_timeout = float(self._image_timeout)
-                                    else:
-                                        image_timeout = float(10)
-                                except (TypeError, ValueError):
-                                    image_timeout = float(10)
-                                domain = parsed_url.netloc
-                                domains = ['github.com', 'githubapp.com',  'githubengineering.com', 'githubstatus.com',
-                                           'github.blog', 'githubusercontent.com', 'github.dev', 'githubtraining.com',
-                                           'github.io', 'githubcloud.com', 'githubpages.com']
-                                for github_domain in domains:
-                                    if domain == github_domain or domain.endswith('.' + github_domain):
-                                        image_url = urllib.parse.urljoin(github_proxy, image)
-                                        new_proxies = None
-                                    else:
-                                        image_url = image
-                                        new_proxies = proxies
-                                try:
-                                    response = requests.get(url=image_url, proxies=new_proxies, timeout=image_timeout)
-                                    if response.status_code == 200:
-                                        image_data = response.content
-                                    else:
-                                        raise Exception(f"状态码：{response.status_code}")
-                                except Exception as e:
-                                    if proxies is not None:
-                                        try:
-                                            response = requests.get(url=image, proxies=proxies, timeout=image_timeout)
-                                            if response.status_code == 200:
-                                                image_data = response.content
-                                            else:
-                                                raise Exception(f"状态码：{response.status_code}")
-                                        except Exception as e:
-                                            raise Exception(f'获取图片都失败 - 原因 - {e}')
-                                    else:
-                                        raise Exception(f'获取图片都失败 - 原因 - {e}')
-                                finally:
-                                    if response:
-                                        response.close()
-                    except requests.exceptions.RequestException as e:
-                        raise Exception(f"请求图片失败 - {e}")
-                    except TypeError as e:
-                        raise Exception(f"接受不支持的数据 - {e}")
-                    except FileNotFoundError as e:
-                        raise Exception(f"文件路径不存在 - {e}")
-                    except PermissionError as e:
-                        raise Exception(f"没有权限读取图片文件 - {e}")
-                    except IsADirectoryError as e:
-                        raise Exception(f"提供了一个目录地址，不是图片文件 - {e}")
-                    except Exception as e:
-                        raise Exception(e)
-                    if image_data:
-                        image_mime = MIMEImage(image_data)
-                        image_mime.add_header('Content-ID', '<image>')
-                        level = 1
-                        msg = '图片文件嵌入成功'
-                    else:
-                        raise Exception("无法获取图像数据")
+                    images.append((0, self._load_image(sources[0])))
                 except Exception as e:
-                    level = 2
-                    msg = f'出现错误，跳过嵌入 - 原因 - {e}'
+                    errors.append(str(e))
             else:
+                deadline = time.monotonic() + self._image_deadline(sources)
+                futures = [self._image_executor.submit(SmtpMsgDecorator.tracer.bind(self._load_image), source)
+                           for source in sources]
+                # 超过期限的图片继续在后台获取，获取结果写入图片缓存
+                done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+                for index, future in enumerate(futures):
+                    if future not in done:
+                        errors.append(f"第{index + 1}张图片获取超过期限")
+                        continue
+                    try:
+                        images.append((index, future.result()))
+                    except Exception as e:
+                        errors.append(f"第{index + 1}张图片 - {e}")
+            if errors:
                 level = 2
-                msg = '未传入图片参数，跳过图片嵌入'
-        elif not self._send_image:
-            level = 1
-            msg = '未开启发送图片，抛弃图片数据'
+                msg = f'获取{len(images)}/{len(sources)}张图片，出现错误的图片跳过嵌入 - 原因 - {"；".join(errors)}'
+            else:
+                level = 1
+                msg = lambda: f'获取{len(images)}张图片成功'
         log_container['msg'] = msg
         log_container['level'] = level
-        return image_mime
+        return images
+
+    def _load_image(self, image) -> bytes:
+        """
+        读取本地图片或获取网络图片
+        """
+        try:
+            image_path = Path(image).resolve()
+            if image_path.is_file():
+                with open(image, 'rb') as image_file:
+                    image_data = self._process_image(image_file.read())
+            else:
+                image_data = self._load_remote_image(str(image))
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"请求图片失败 - {e}")
+        except TypeError as e:
+            raise Exception(f"接受不支持的数据 - {e}")
+        except FileNotFoundError as e:
+            raise Exception(f"文件路径不存在 - {e}")
+        except PermissionError as e:
+            raise Exception(f"没有权限读取图片文件 - {e}")
+        except IsADirectoryError as e:
+            raise Exception(f"提供了一个目录地址，不是图片文件 - {e}")
+        if not image_data:
+            raise Exception("无法获取图像数据")
+        return image_data
+
+    def _load_remote_image(self, image: str) -> bytes:
+        """
+        获取网络图片，启用图片缓存时缓存处理后的结果
+        """
+        if not self._image_cache:
+            return self._process_image(self._download_image(image))
+        if self._image_processor:
+            return self._image_cache.get_or_fetch(
+                image, lambda: self._image_processor.process(self._download_image(image)),
+                suffix=self._image_processor.cache_suffix)
+        return self._image_cache.get_or_fetch(image, partial(self._download_image, image))
+
+    def _process_image(self, image_data: bytes) -> bytes:
+        """
+        压缩图片，未启用时返回原图
+        """
+        if self._image_processor:
+            return self._image_processor.process(image_data)
+        return image_data
+
+    def _download_image(self, image: str) -> bytes:
+        """
+        下载网络图片，Github官方域名优先使用加速站，失败时使用全局代理再次获取
+        """
+        parsed_url = urllib.parse.urlparse(image)
+        if parsed_url.scheme not in set(urllib.parse.uses_netloc):
+            raise Exception("不是本地文件，也不是可访问的网络地址")
+        proxies = settings.PROXY if self._enabled_proxy_image else None
+        github_proxy = settings.GITHUB_PROXY if self._enabled_github_proxy_image else None
+        domain = parsed_url.netloc
+        if any(domain == github_domain or domain.endswith('.' + github_domain)
+               for github_domain in self._github_domains):
+            image_url = urllib.parse.urljoin(github_proxy, image)
+            new_proxies = None
+        else:
+            image_url = image
+            new_proxies = proxies
+        try:
+            return self.__fetch_image(url=image_url, proxies=new_proxies)
+        except Exception as e:
+            if proxies is None:
+                raise Exception(f'获取图片都失败 - 原因 - {e}')
+            try:
+                return self.__fetch_image(url=image, proxies=proxies)
+            except Exception as e:
+                raise Exception(f'获取图片都失败 - 原因 - {e}')
+
+    def _image_deadline(self, image) -> float:
+        """
+        获取全部图片的期限，取各图片域名超时时间的最大值
+        """
+        return max((self._image_timeout_for(urllib.parse.urlparse(str(source)).netloc)
+                    for source in self._image_sources(image)), default=self._image_timeout_value)
+
+    def __fetch_image(self, url: str, proxies) -> bytes:
+        """
+        按图片域名的超时时间请求图片，并记录耗时
+        """
+        domain = urllib.parse.urlparse(url).netloc
+        timeout = self._image_timeout_for(domain)
+        start = time.monotonic()
+        try:
+            data = self.__request_image(url=url, proxies=proxies, timeout=timeout)
+        except requests.exceptions.Timeout:
+            if self._image_timeouts:
+                self._image_timeouts.observe_timeout(domain)
+            raise
+        if self._image_timeouts:
+            self._image_timeouts.observe(domain, time.monotonic() - start)
+        return data
+
+    @staticmethod
+    def __request_image(url: str, proxies, timeout: float) -> bytes:
+        """
+        请求图片数据
+        """
+        with SmtpMsgDecorator.tracer.stage("图片下载"):
+            response = requests.get(url=url, proxies=proxies, timeout=timeout)
+        try:
+            if response.status_code == 200:
+                return response.content
+            raise Exception(f"状态码：{response.status_code}")
+        finally:
+            response.close()
+
+    # api
+
+    def api_outbox_stats(self, apikey: str):
+        """
+        API - 发件队列状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._outbox:
+            return schemas.Response(success=False, message="发件队列未启用")
+        return schemas.Response(success=True, data=self._outbox.stats())
+
+    def api_image_cache_stats(self, apikey: str):
+        """
+        API - 图片缓存状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._image_cache:
+            return schemas.Response(success=False, message="图片缓存未启用")
+        return schemas.Response(success=True, data=self._image_cache.stats())
+
+    def api_health_stats(self, apikey: str):
+        """
+        API - 服务器健康状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._health:
+            return schemas.Response(success=False, message="熔断器未启用")
+        return schemas.Response(success=True, data=self._health.snapshot())
+
+    def api_connect_stats(self, apikey: str):
+        """
+        API - 连接建立
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        with self._connector_lock:
+            servers = {f"{host}:{port}": {"encryption": encryption, **connector.stats()}
+                       for (host, port, encryption), connector in self._connectors.items()}
+        return schemas.Response(success=True, data={"dns": self._resolver.stats(), "servers": servers})
+
+    def api_recipient_stats(self, apikey: str):
+        """
+        API - 收件人发送结果
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        return schemas.Response(success=True, data=self._recipient_stats.snapshot())
+
+    def api_dedup_stats(self, apikey: str):
+        """
+        API - 消息去重
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._dedup:
+            return schemas.Response(success=False, message="消息去重未启用")
+        return schemas.Response(success=True, data=self._dedup.stats())
+
+    def api_rule_stats(self, apikey: str):
+        """
+        API - 过滤规则
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._rule_engine:
+            return schemas.Response(success=False, message="消息过滤未启用")
+        return schemas.Response(success=True, data=self._rule_engine.stats())
+
+    def api_route_stats(self, apikey: str):
+        """
+        API - 收件人路由
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._router:
+            return schemas.Response(success=False, message="收件人路由未启用")
+        return schemas.Response(success=True, data=self._router.stats())
+
+    def api_spool_stats(self, apikey: str):
+        """
+        API - 重试队列状态
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._spool:
+            return schemas.Response(success=False, message="失败重试未启用")
+        return schemas.Response(success=True, data=self._spool.stats())
+
+    def api_timeout_stats(self, apikey: str):
+        """
+        API - 自适应超时
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._server_timeouts:
+            return schemas.Response(success=False, message="自适应超时未启用")
+        return schemas.Response(success=True, data={"server": self._server_timeouts.stats(),
+                                                    "image": self._image_timeouts.stats()})
+
+    def api_trace_stats(self, apikey: str, limit: int = 20):
+        """
+        API - 阶段耗时
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        tracer = SmtpMsgDecorator.tracer
+        return schemas.Response(success=True, data={"stages": tracer.stats(), "recent": tracer.recent(limit=limit)})
+
+    def api_account_stats(self, apikey: str):
+        """
+        API - 账号负载
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._balancer:
+            return schemas.Response(success=False, message="没有可用的SMTP账号")
+        return schemas.Response(success=True, data={"mode": self._balancer.mode, "accounts": self._balancer.stats(),
+                                                    "quota": self._quota.snapshot() if self._quota else {}})
 
     # log
 
     @SmtpMsgDecorator.clean_log()
     @SmtpMsgDecorator.log("结果汇报")
-    def _generate_result_log(self, m_success, s_success, log_container):
-        s_msg = m_msg = msg = level = None
+    def _generate_result_log(self, results: List[Tuple[str, bool]], log_container):
+        """
+        :param results: 各账号的发送结果 (账号名称, 是否成功)
+        """
+        msg = level = None
         test_type = "测试" if self._test else ""
         try:
-            if m_success is True:
-                m_msg = f"主服务器发送{test_type}邮件成功！"
-            elif m_success is False:
-                m_msg = f"主服务器发送{test_type}邮件失败！"
-            elif m_success is None:
-                m_msg = f""
-
-            if s_success is True:
-                s_msg = f"备用服务器发送{test_type}邮件成功！"
-            elif s_success is False:
-                s_msg = f"备用服务器发送{test_type}邮件失败！"
-            elif s_success is None:
-                s_msg = f""
-
-            if m_success is not None and s_msg is not None:
-                msg = f"{m_msg} {s_msg}"
-            elif m_success is None and s_msg is None:
-                msg = f"未启用主服务器与备用服务器！无法发送{test_type}邮件！"
+            if results:
+                msg = " ".join(f"SMTP账号【{name}】发送{test_type}邮件{'成功' if success else '失败'}！"
+                               for name, success in results)
+            elif not self._quota_available():
+                msg = f"全部SMTP账号的发送额度已用完！无法发送{test_type}邮件！"
+            else:
+                msg = f"没有可用的SMTP账号！无法发送{test_type}邮件！"
 
             level = 0
-            if self._test:
-                return msg
+            return msg
         except Exception as e:
             level = -1
             raise Exception(e)
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SmtpAccount:
+    """
+    SMTP账号配置
+    """
+    ENCRYPTIONS = ("not_encrypted", "ssl", "tls")
+
+    def __init__(self, name: str, host: str, port: int, mail: str, password: str,
+                 encryption: str = "not_encrypted", enabled: bool = True, weight: int = 1,
+                 hourly_limit: int = 0, daily_limit: int = 0, minute_limit: int = 0):
+        """
+        :param name: 账号名称，用于日志与统计
+        :param weight: 权重，加权轮询时按权重分配发送次数
+        :param minute_limit: 每分钟最多发送数量，0 表示不限制
+        :param hourly_limit: 每小时最多发送数量，0 表示不限制
+        :param daily_limit: 每天最多发送数量，0 表示不限制
+        """
+        self.name = name
+        self.host = host
+        self.port = port
+        self.mail = mail
+        self.password = password
+        self.encryption = encryption if encryption in self.ENCRYPTIONS else "not_encrypted"
+        self.enabled = enabled
+        self.weight = max(int(weight), 1)
+        self.minute_limit = max(int(minute_limit or 0), 0)
+        self.hourly_limit = max(int(hourly_limit or 0), 0)
+        self.daily_limit = max(int(daily_limit or 0), 0)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], index: int) -> "SmtpAccount":
+        """
+        从配置字典创建账号
+        :raise ValueError: 缺少必填参数或参数无效
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"第{index + 1}个账号配置不是对象")
+        missing = [key for key in ("host", "port", "mail", "password") if not data.get(key)]
+        if missing:
+            raise ValueError(f"第{index + 1}个账号缺少参数 - {', '.join(missing)}")
+        try:
+            return cls(name=str(data.get("name") or f"账号{index + 1}"),
+                       host=str(data["host"]).strip(),
+                       port=int(data["port"]),
+                       mail=str(data["mail"]).strip(),
+                       password=str(data["password"]),
+                       encryption=data.get("encryption") or "not_encrypted",
+                       enabled=bool(data.get("enabled", True)),
+                       weight=data.get("weight") or 1,
+                       hourly_limit=data.get("hourly_limit") or 0,
+                       daily_limit=data.get("daily_limit") or 0,
+                       minute_limit=data.get("minute_limit") or 0)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"第{index + 1}个账号参数无效 - {e}")
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        """
+        各周期的发送上限
+        """
+        return {"minute": self.minute_limit, "hour": self.hourly_limit, "day": self.daily_limit}
+
+    @property
+    def conf(self) -> Dict[str, Any]:
+        """
+        连接参数
+        """
+        return {"host": self.host, "port": self.port, "encryption": self.encryption,
+                "mail": self.mail, "password": self.password}
+
+
+class SmtpAccountBalancer:
+    """
+    多账号负载均衡，按发送模式排列候选账号，发送上限由调用方通过 limit 筛选
+    failover：按配置顺序；weighted：平滑加权轮询；least_loaded：按权重折算后负载最小优先
+    """
+    MODE_FAILOVER = "failover"
+    MODE_WEIGHTED = "weighted"
+    MODE_LEAST_LOADED = "least_loaded"
+    MODES = (MODE_FAILOVER, MODE_WEIGHTED, MODE_LEAST_LOADED)
+
+    def __init__(self, accounts: List[SmtpAccount], mode: str = MODE_FAILOVER):
+        self.accounts = [account for account in accounts if account.enabled]
+        self.mode = mode if mode in self.MODES else self.MODE_FAILOVER
+        self._lock = threading.Lock()
+        # 平滑加权轮询的当前权重
+        self._current: Dict[str, int] = {account.name: 0 for account in self.accounts}
+        self._inflight: Dict[str, int] = {account.name: 0 for account in self.accounts}
+        # 最近一天的发送时间
+        self._sent: Dict[str, deque] = {account.name: deque() for account in self.accounts}
+
+    def get(self, name: str) -> Optional[SmtpAccount]:
+        return next((account for account in self.accounts if account.name == name), None)
+
+    def candidates(self, allow: Optional[Callable[[str], bool]] = None,
+                   limit: Optional[Callable[[str], bool]] = None) -> List[SmtpAccount]:
+        """
+        本次发送的候选账号，第一个为首选账号，其余按配置顺序作为失败时的后备
+        :param allow: 额外的筛选条件，例如跳过熔断中的账号；全部不满足时忽略该条件
+        :param limit: 必须满足的筛选条件，例如跳过没有发送额度的账号
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [account for account in self.accounts if not limit or limit(account.name)]
+            if allow:
+                allowed = [account for account in available if allow(account.name)]
+                available = allowed or available
+            if not available:
+                return []
+            if self.mode == self.MODE_WEIGHTED:
+                first = self._weighted_pick(available)
+            elif self.mode == self.MODE_LEAST_LOADED:
+                first = min(available, key=lambda account: self._load(account, now))
+            else:
+                first = available[0]
+        return [first] + [account for account in available if account is not first]
+
+    def begin(self, name: str):
+        """
+        开始使用账号发送
+        """
+        with self._lock:
+            if name in self._inflight:
+                self._inflight[name] += 1
+
+    def end(self, name: str, success: bool):
+        """
+        账号发送结束，发送成功时计入发送数量
+        """
+        with self._lock:
+            if name not in self._inflight:
+                return
+            self._inflight[name] = max(self._inflight[name] - 1, 0)
+            if success:
+                self._sent[name].append(time.monotonic())
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        各账号的负载与发送数量
+        """
+        now = time.monotonic()
+        with self._lock:
+            result = []
+            for account in self.accounts:
+                hourly, daily = self._usage(account, now)
+                result.append({
+                    "name": account.name,
+                    "mail": account.mail,
+                    "weight": account.weight,
+                    "inflight": self._inflight[account.name],
+                    "hourly_sent": hourly,
+                    "daily_sent": daily,
+                    "minute_limit": account.minute_limit,
+                    "hourly_limit": account.hourly_limit,
+                    "daily_limit": account.daily_limit,
+                })
+            return result
+
+    def _usage(self, account: SmtpAccount, now: float):
+        sent = self._sent[account.name]
+        while sent and now - sent[0] > 86400:
+            sent.popleft()
+        hourly = 0
+        for timestamp in reversed(sent):
+            if now - timestamp > 3600:
+                break
+            hourly += 1
+        return hourly, len(sent)
+
+    def _load(self, account: SmtpAccount, now: float) -> float:
+        hourly, _ = self._usage(account, now)
+        return (self._inflight[account.name] * 10 + hourly) / account.weight
+
+    def _weighted_pick(self, available: List[SmtpAccount]) -> SmtpAccount:
+        total = 0
+        best = None
+        for account in available:
+            self._current[account.name] += account.weight
+            total += account.weight
+            if best is None or self._current[account.name] > self._current[best.name]:
+                best = account
+        self._current[best.name] -= total
+        return best
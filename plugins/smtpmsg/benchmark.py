@@ -0,0 +1,359 @@
+import argparse
+import base64
+import json
+import random
+import socketserver
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.event import Event
+from app.schemas.types import EventType, NotificationType
+
+from app.plugins.smtpmsg import SmtpMsg, SmtpMsgDecorator
+
+
+class SmtpSink:
+    """
+    本地SMTP服务器，只接收不投递，可设置响应延迟、失败比例与加密方式
+    """
+
+    def __init__(self, latency: float = 0, fail_rate: float = 0, encryption: str = "not_encrypted",
+                 certfile: Optional[str] = None, keyfile: Optional[str] = None):
+        """
+        :param latency: 每封邮件 DATA 结束后的响应延迟（秒）
+        :param fail_rate: DATA 返回 451 临时错误的比例
+        :param encryption: not_encrypted、ssl 或 tls
+        """
+        if encryption in ("ssl", "tls") and not certfile:
+            raise ValueError("使用 ssl 或 tls 时需要提供证书文件")
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.encryption = encryption
+        self.context = None
+        if certfile:
+            self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.context.load_cert_chain(certfile, keyfile)
+        self._lock = threading.Lock()
+        self._counter = {"sessions": 0, "accepted": 0, "rejected": 0, "recipients": 0}
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler(), bind_and_activate=True)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="SmtpSink", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, key: str, value: int = 1):
+        with self._lock:
+            self._counter[key] += value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counter)
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+
+            def setup(self):
+                if sink.encryption == "ssl":
+                    self.request = sink.context.wrap_socket(self.request, server_side=True)
+                super().setup()
+
+            def reply(self, line: str):
+                self.wfile.write(f"{line}\r\n".encode())
+                self.wfile.flush()
+
+            def handle(self):
+                sink.count("sessions")
+                secure = sink.encryption != "tls"
+                recipients = 0
+                self.reply("220 localhost SmtpSink")
+                while True:
+                    # STARTTLS 之后会替换 rfile，每次重新读取
+                    raw = self.rfile.readline()
+                    if not raw:
+                        break
+                    command = raw.decode("utf-8", "replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb in ("EHLO", "HELO"):
+                        extensions = ["AUTH PLAIN LOGIN", "8BITMIME", "SIZE 52428800"]
+                        if not secure:
+                            extensions.insert(0, "STARTTLS")
+                        lines = ["localhost"] + extensions
+                        for extension in lines[:-1]:
+                            self.reply(f"250-{extension}")
+                        self.reply(f"250 {lines[-1]}")
+                    elif verb == "STARTTLS" and not secure:
+                        self.reply("220 Ready to start TLS")
+                        self.request = sink.context.wrap_socket(self.request, server_side=True)
+                        self.rfile = self.request.makefile("rb")
+                        self.wfile = self.request.makefile("wb")
+                        secure = True
+                    elif verb == "AUTH":
+                        if command.upper().startswith("AUTH LOGIN"):
+                            self.reply(f"334 {base64.b64encode(b'Username:').decode()}")
+                            self.rfile.readline()
+                            self.reply(f"334 {base64.b64encode(b'Password:').decode()}")
+                            self.rfile.readline()
+                        self.reply("235 Authentication successful")
+                    elif verb == "MAIL":
+                        recipients = 0
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        recipients += 1
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        for line in self.rfile:
+                            if line in (b".\r\n", b".\n"):
+                                break
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        if sink.fail_rate and random.random() < sink.fail_rate:
+                            sink.count("rejected")
+                            self.reply("451 4.3.0 Temporary failure")
+                        else:
+                            sink.count("accepted")
+                            sink.count("recipients", recipients)
+                            self.reply("250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        break
+                    else:
+                        # RSET、NOOP 等命令
+                        self.reply("250 OK")
+
+        return Handler
+
+
+class ImageStub:
+    """
+    本地图片服务器，任意路径都返回同一张图片，不同路径用于模拟不同的图片地址
+    """
+
+    def __init__(self, latency: float = 0, image: Optional[Path] = None):
+        """
+        :param latency: 每次请求的响应延迟（秒）
+        :param image: 返回的图片文件，默认为插件图标
+        """
+        data = (image or Path(__file__).with_name("Synomail_A.png")).read_bytes()
+        subtype = "png" if data.startswith(b"\x89PNG") else "jpeg"
+        self.requests = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                with lock:
+                    stub.requests += 1
+                if latency:
+                    time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Type", f"image/{subtype}")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ImageStub", daemon=True)
+
+    def url(self, index: int) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/image/{index}.png"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SmtpMsgBenchmark:
+    """
+    向插件发送合成的消息，统计吞吐量、耗时分位数与各阶段耗时
+    mode：master 直接调用 master_program，可多线程同时发送；send 模拟 NoticeMessage 事件，经过过滤与去重等完整流程
+    """
+
+    def __init__(self, plugin: SmtpMsg, count: int = 100, concurrency: int = 1, mode: str = "master",
+                 image: Optional[ImageStub] = None, image_variants: int = 1):
+        """
+        :param image_variants: 使用的不同图片地址数量，用于控制图片缓存的命中率
+        """
+        if mode not in ("master", "send"):
+            raise ValueError("mode 只能是 master 或 send")
+        self.plugin = plugin
+        self.count = max(int(count), 1)
+        self.concurrency = max(int(concurrency), 1)
+        self.mode = mode
+        self.image = image
+        self.image_variants = max(int(image_variants), 1)
+
+    def message(self, index: int) -> Dict[str, Any]:
+        msg_types = list(NotificationType)
+        return dict(title=f"性能测试消息 {index}",
+                    text=f"第{index}条性能测试消息\n发送时间：{time.strftime('%Y-%m-%d %H:%M:%S')}",
+                    msg_type=msg_types[index % len(msg_types)],
+                    userid=None,
+                    image=self.image.url(index % self.image_variants) if self.image else None)
+
+    def run(self) -> Dict[str, Any]:
+        SmtpMsgDecorator.tracer.clear()
+        latencies: List[float] = []
+        lock = threading.Lock()
+
+        def deliver(index: int):
+            kwargs = self.message(index)
+            start = time.perf_counter()
+            if self.mode == "master":
+                self.plugin.master_program(**kwargs)
+            else:
+                kwargs["type"] = kwargs.pop("msg_type")
+                self.plugin.send(Event(EventType.NoticeMessage, kwargs))
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="SmtpMsgBenchmark") as executor:
+            for future in [executor.submit(deliver, index) for index in range(self.count)]:
+                future.result()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            "mode": self.mode,
+            "count": self.count,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "msgs_per_sec": round(self.count / elapsed, 2) if elapsed else None,
+            "p50_ms": self._percentile(latencies, 0.50),
+            "p99_ms": self._percentile(latencies, 0.99),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "stages": SmtpMsgDecorator.tracer.stats(),
+        }
+
+    @staticmethod
+    def _percentile(values: List[float], percent: float) -> float:
+        index = min(int(round(percent * (len(values) - 1))), len(values) - 1)
+        return round(values[index] * 1000, 2)
+
+
+def build_config(sink: SmtpSink, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    性能测试使用的插件配置，默认关闭发件队列、重试队列、去重与熔断，使每条消息都同步发送到本地服务器
+    """
+    accounts = [{
+        "name": f"本地账号{index + 1}",
+        "host": "127.0.0.1",
+        "port": sink.port,
+        "encryption": args.encryption,
+        "mail": f"sender{index + 1}@localhost",
+        "password": "benchmark",
+        "enabled": True,
+        "weight": 1,
+        "hourly_limit": 0,
+        "daily_limit": 0,
+    } for index in range(args.accounts)]
+    config = {
+        "enabled": True,
+        "test": False,
+        "server_timeout": 10,
+        "smtp_accounts": json.dumps(accounts, ensure_ascii=False),
+        "balance_mode": args.balance_mode,
+        "sender_name": "SmtpMsgBenchmark",
+        "receiver_mail": ",".join(f"receiver{index + 1}@localhost" for index in range(args.recipients)),
+        "enabled_image_send": args.image,
+        "enabled_proxy_image": False,
+        "enabled_github_proxy_image": False,
+        "enabled_outbox": False,
+        "enabled_spool": False,
+        "enabled_dedup": False,
+        "enabled_digest": False,
+        "enabled_circuit_breaker": False,
+    }
+    # 命令行覆盖的配置项，值按 JSON 解析，解析失败时作为字符串
+    for item in args.set or []:
+        key, _, value = item.partition("=")
+        try:
+            config[key] = json.loads(value)
+        except ValueError:
+            config[key] = value
+    return config
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="SmtpMsg 离线性能测试，使用本地SMTP服务器与图片服务器，不连接外部服务")
+    parser.add_argument("--count", type=int, default=200, help="发送的消息数量")
+    parser.add_argument("--concurrency", type=int, default=1, help="同时发送的线程数量")
+    parser.add_argument("--mode", choices=("master", "send"), default="master", help="调用入口")
+    parser.add_argument("--accounts", type=int, default=1, help="SMTP账号数量")
+    parser.add_argument("--balance-mode", choices=("failover", "weighted", "least_loaded"), default="failover")
+    parser.add_argument("--recipients", type=int, default=1, help="每封邮件的收件人数量")
+    parser.add_argument("--latency", type=float, default=0, help="SMTP服务器响应延迟（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0, help="SMTP服务器返回临时错误的比例")
+    parser.add_argument("--encryption", choices=("not_encrypted", "ssl", "tls"), default="not_encrypted")
+    parser.add_argument("--certfile", help="ssl 或 tls 使用的证书文件")
+    parser.add_argument("--keyfile", help="ssl 或 tls 使用的私钥文件")
+    parser.add_argument("--image", action="store_true", help="发送图片")
+    parser.add_argument("--image-latency", type=float, default=0, help="图片服务器响应延迟（秒）")
+    parser.add_argument("--image-variants", type=int, default=1, help="不同图片地址的数量")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="覆盖插件配置项，可重复使用")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args(argv)
+
+    sink = SmtpSink(latency=args.latency, fail_rate=args.fail_rate, encryption=args.encryption,
+                    certfile=args.certfile, keyfile=args.keyfile)
+    image = ImageStub(latency=args.image_latency) if args.image else None
+    sink.start()
+    if image:
+        image.start()
+    plugin = SmtpMsg()
+    try:
+        plugin.init_plugin(build_config(sink, args))
+        result = SmtpMsgBenchmark(plugin=plugin, count=args.count, concurrency=args.concurrency, mode=args.mode,
+                                  image=image, image_variants=args.image_variants).run()
+    finally:
+        plugin.stop_service()
+        sink.stop()
+        if image:
+            image.stop()
+    result["sink"] = sink.stats()
+    if image:
+        result["image_requests"] = image.requests
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"模式：{result['mode']}  消息：{result['count']}  线程：{result['concurrency']}  "
+          f"耗时：{result['elapsed_s']}s")
+    print(f"吞吐量：{result['msgs_per_sec']} 条/秒  p50：{result['p50_ms']}ms  p99：{result['p99_ms']}ms  "
+          f"最大：{result['max_ms']}ms")
+    print(f"SMTP服务器：{result['sink']}")
+    if image:
+        print(f"图片请求：{result['image_requests']}")
+    print(f"{'阶段':<12}{'次数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}")
+    for stage, stat in sorted(result["stages"].items(), key=lambda item: -item[1]["p50_ms"]):
+        print(f"{stage:<12}{stat['count']:>8}{stat['p50_ms']:>10}{stat['p95_ms']:>10}"
+              f"{stat['p99_ms']:>10}{stat['max_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import smtplib
+import socket
+import ssl
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SmtpResolver:
+    """
+    DNS解析缓存，缓存有效期内不再重复解析，多个地址时 IPv4 与 IPv6 交替尝试
+    最近一次连接成功的地址排在最前面
+    """
+
+    def __init__(self, ttl: float = 300):
+        """
+        :param ttl: 解析结果的缓存时间（秒）
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (主机, 端口) -> (过期时间, 地址列表)
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+        self._counter = {"hits": 0, "misses": 0}
+
+    def resolve(self, host: str, port: int) -> List[tuple]:
+        """
+        :return: [(地址族, 套接字类型, 协议, 地址)]
+        :raise socket.gaierror: 解析失败
+        """
+        key = (host, int(port))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > now:
+                self._counter["hits"] += 1
+                return list(entry[1])
+            self._counter["misses"] += 1
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = self._interleave([(family, socktype, proto, sockaddr)
+                                      for family, socktype, proto, _, sockaddr in infos])
+        with self._lock:
+            self._cache[key] = (now + self.ttl, addresses)
+        return list(addresses)
+
+    def prefer(self, host: str, port: int, address: tuple):
+        """
+        连接成功的地址排到最前面
+        """
+        key = (host, int(port))
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and address in entry[1] and entry[1][0] != address:
+                addresses = [address] + [item for item in entry[1] if item != address]
+                self._cache[key] = (entry[0], addresses)
+
+    def invalidate(self, host: str = None, port: int = None):
+        with self._lock:
+            if host is None:
+                self._cache.clear()
+            else:
+                self._cache.pop((host, int(port)), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._cache), **self._counter}
+
+    @staticmethod
+    def _interleave(addresses: List[tuple]) -> List[tuple]:
+        """
+        按解析顺序交替排列不同地址族的地址，并去除重复地址
+        """
+        unique = list(dict.fromkeys(addresses))
+        groups: Dict[int, List[tuple]] = {}
+        for address in unique:
+            groups.setdefault(address[0], []).append(address)
+        result = []
+        while any(groups.values()):
+            for family in list(groups):
+                if groups[family]:
+                    result.append(groups[family].pop(0))
+        return result
+
+
+class SmtpConnector:
+    """
+    单个服务器的连接参数，共用 SSLContext，并保存最近的 TLS 会话用于会话恢复
+    """
+
+    def __init__(self, resolver: SmtpResolver):
+        self.resolver = resolver
+        # 与 smtplib 默认行为一致，不校验服务器证书
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        self.context.check_hostname = False
+        self.context.verify_mode = ssl.CERT_NONE
+        self._session: Optional[ssl.SSLSession] = None
+        self._lock = threading.Lock()
+        self._counter = {"handshakes": 0, "resumed": 0}
+
+    def open_socket(self, host: str, port: int, timeout: float, source_address=None) -> socket.socket:
+        """
+        依次尝试解析到的地址，直到连接成功
+        """
+        error = None
+        for family, socktype, proto, sockaddr in self.resolver.resolve(host, port):
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                self.resolver.prefer(host, port, (family, socktype, proto, sockaddr))
+                return sock
+            except OSError as e:
+                error = e
+                if sock is not None:
+                    sock.close()
+        # 缓存的地址都无法连接时，下次重新解析
+        self.resolver.invalidate(host, port)
+        raise error or OSError(f"没有可用的地址 - {host}")
+
+    def wrap(self, sock: socket.socket, host: str) -> ssl.SSLSocket:
+        """
+        建立 TLS 连接，优先恢复上一次的 TLS 会话
+        """
+        with self._lock:
+            session = self._session
+        try:
+            ssock = self.context.wrap_socket(sock, server_hostname=host, session=session)
+        except ssl.SSLError:
+            # 握手失败时丢弃保存的会话，下次连接使用完整握手
+            with self._lock:
+                self._session = None
+            raise
+        with self._lock:
+            self._counter["handshakes"] += 1
+            if ssock.session_reused:
+                self._counter["resumed"] += 1
+        return ssock
+
+    def remember(self, sock):
+        """
+        保存 TLS 会话，TLS 1.3 的会话票据在握手后才发送，需要在收到服务器响应后保存
+        """
+        if isinstance(sock, ssl.SSLSocket) and sock.session is not None:
+            with self._lock:
+                self._session = sock.session
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counter)
+
+
+class SmtpClient(smtplib.SMTP):
+    """
+    使用 SmtpConnector 建立连接的 SMTP 客户端，支持 SSL 与 STARTTLS
+    """
+
+    def __init__(self, connector: SmtpConnector, host: str, port: int, timeout: float, implicit_tls: bool = False):
+        # 父类初始化时会建立连接，需要先设置连接参数
+        self._connector = connector
+        self._implicit_tls = implicit_tls
+        super().__init__(host, port, timeout=timeout)
+
+    def _get_socket(self, host, port, timeout):
+        sock = self._connector.open_socket(host, port, timeout, self.source_address)
+        if self._implicit_tls:
+            sock = self._connector.wrap(sock, self._host)
+        return sock
+
+    def starttls(self, keyfile=None, certfile=None, context=None):
+        """
+        与 smtplib.SMTP.starttls 一致，使用共用的 SSLContext 与 TLS 会话
+        """
+        self.ehlo_or_helo_if_needed()
+        if not self.has_extn("starttls"):
+            raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+        resp, reply = self.docmd("STARTTLS")
+        if resp == 220:
+            self.sock = self._connector.wrap(self.sock, self._host)
+            self.file = None
+            self.helo_resp = None
+            self.ehlo_resp = None
+            self.esmtp_features = {}
+            self.does_esmtp = False
+        else:
+            raise smtplib.SMTPResponseException(resp, reply)
+        return resp, reply
@@ -0,0 +1,62 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+
+class SmtpDedup:
+    """
+    消息去重，按消息内容的哈希记录窗口期内已发送的消息
+    记录按加入顺序排列，窗口期固定，过期记录总在最前面，清理与查找均为 O(1)
+    """
+
+    def __init__(self, window: float = 60, max_entries: int = 2048):
+        """
+        :param window: 去重窗口时间（秒）
+        :param max_entries: 最多保存的记录数量，超过时清理最早的记录
+        """
+        self._window = window
+        self._max_entries = max(int(max_entries), 1)
+        self._lock = threading.Lock()
+        # 内容哈希 -> 过期时间
+        self._entries: "OrderedDict[bytes, float]" = OrderedDict()
+        self._counter = {"checked": 0, "suppressed": 0}
+
+    @staticmethod
+    def make_key(*parts: Any) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(str(part if part is not None else "").encode("utf-8", "surrogatepass"))
+            digest.update(b"\x1f")
+        return digest.digest()
+
+    def is_duplicate(self, *parts: Any) -> bool:
+        """
+        判断消息是否在窗口期内重复，不重复时记录该消息
+        """
+        key = self.make_key(*parts)
+        now = time.monotonic()
+        with self._lock:
+            self._counter["checked"] += 1
+            while self._entries:
+                oldest_key, expires = next(iter(self._entries.items()))
+                if expires > now:
+                    break
+                del self._entries[oldest_key]
+            if key in self._entries:
+                self._counter["suppressed"] += 1
+                return True
+            self._entries[key] = now + self._window
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "window": self._window,
+                **self._counter,
+            }
@@ -0,0 +1,89 @@
+import threading
+from typing import Any, Callable, Dict, List, Hashable
+
+from app.log import logger
+
+
+class SmtpDigest:
+    """
+    消息汇总，同一分组的连续消息在窗口期内合并为一封邮件
+    每轮的第一条消息立即发送，后续消息缓存，窗口结束或达到数量上限时一起发送
+    """
+
+    def __init__(self, flush: Callable[[Hashable, List[Dict[str, Any]]], Any], window: float = 60,
+                 max_count: int = 20):
+        """
+        :param flush: 发送汇总的方法，参数为分组与缓存的消息列表
+        :param window: 汇总窗口时间（秒）
+        :param max_count: 单封汇总邮件的最大消息数量
+        """
+        self._flush = flush
+        self._window = window
+        self._max_count = max(int(max_count), 1)
+        self._lock = threading.Lock()
+        # 分组 -> 缓存的消息
+        self._buckets: Dict[Hashable, List[Dict[str, Any]]] = {}
+        # 分组 -> 窗口计时器
+        self._timers: Dict[Hashable, threading.Timer] = {}
+
+    def add(self, key: Hashable, item: Dict[str, Any]) -> bool:
+        """
+        添加消息
+        :return: True 表示当前没有进行中的汇总，消息需要立即发送
+        """
+        batch = None
+        with self._lock:
+            if key not in self._timers:
+                # 新一轮的第一条消息，开启窗口并立即发送
+                self._buckets[key] = []
+                self._start_timer(key)
+                return True
+            bucket = self._buckets[key]
+            bucket.append(item)
+            if len(bucket) >= self._max_count:
+                batch = bucket
+                self._buckets[key] = []
+        if batch:
+            self._emit(key, bucket_items=batch)
+        return False
+
+    def flush_all(self):
+        """
+        立即发送全部缓存的消息，并结束全部窗口
+        """
+        with self._lock:
+            timers = list(self._timers.values())
+            buckets = list(self._buckets.items())
+            self._timers.clear()
+            self._buckets.clear()
+        for timer in timers:
+            timer.cancel()
+        for key, items in buckets:
+            if items:
+                self._emit(key, bucket_items=items)
+
+    def pending(self) -> int:
+        """
+        缓存中的消息数量
+        """
+        with self._lock:
+            return sum(len(items) for items in self._buckets.values())
+
+    def _start_timer(self, key: Hashable):
+        timer = threading.Timer(self._window, self._on_timer, args=(key,))
+        timer.daemon = True
+        self._timers[key] = timer
+        timer.start()
+
+    def _on_timer(self, key: Hashable):
+        with self._lock:
+            self._timers.pop(key, None)
+            items = self._buckets.pop(key, None)
+        if items:
+            self._emit(key, bucket_items=items)
+
+    def _emit(self, key: Hashable, bucket_items: List[Dict[str, Any]]):
+        try:
+            self._flush(key, bucket_items)
+        except Exception as e:
+            logger.error(f"日志汇报 - 错误 - 汇总消息发送失败 - 原因 - {e}")
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+class SmtpServerHealth:
+    """
+    单个服务器的健康状态与熔断器
+    closed：正常使用；open：熔断中，不再发送；half_open：熔断冷却结束，正在探测
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, open_seconds: float = 60, window: int = 50):
+        """
+        :param failure_threshold: 连续失败多少次后熔断
+        :param open_seconds: 熔断后多久开始探测（秒）
+        :param window: 延迟统计的样本数量
+        """
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.total_success = 0
+        self.total_failure = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[float] = None
+        self.opened_at: Optional[float] = None
+        self.latencies = deque(maxlen=window)
+
+    def allow(self) -> bool:
+        """
+        是否允许发送
+        """
+        return self.state == self.CLOSED
+
+    def probe_due(self) -> bool:
+        """
+        熔断冷却结束时进入探测状态
+        :return: 是否需要探测
+        """
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self, latency: Optional[float] = None):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.total_success += 1
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def record_failure(self, error: Optional[str] = None, latency: Optional[float] = None):
+        self.consecutive_failures += 1
+        self.total_failure += 1
+        self.last_error = error
+        self.last_failure_at = time.time()
+        if latency is not None:
+            self.latencies.append(latency)
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_success": self.total_success,
+            "total_failure": self.total_failure,
+            "last_error": self.last_error,
+            "last_failure_at": self.last_failure_at,
+            "latency_avg_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        }
+
+
+class SmtpHealthTracker:
+    """
+    全部服务器的健康状态
+    """
+
+    def __init__(self, failure_threshold: int = 3, open_seconds: float = 60):
+        self._failure_threshold = failure_threshold
+        self._open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._servers: Dict[str, SmtpServerHealth] = {}
+
+    def _get(self, name: str) -> SmtpServerHealth:
+        server = self._servers.get(name)
+        if not server:
+            server = self._servers[name] = SmtpServerHealth(failure_threshold=self._failure_threshold,
+                                                            open_seconds=self._open_seconds)
+        return server
+
+    def allow(self, name: str) -> bool:
+        with self._lock:
+            return self._get(name).allow()
+
+    def due_probes(self) -> List[str]:
+        """
+        熔断冷却结束、需要探测的服务器
+        """
+        with self._lock:
+            return [name for name, server in self._servers.items() if server.probe_due()]
+
+    def record(self, name: str, success: bool, latency: Optional[float] = None, error: Optional[str] = None):
+        with self._lock:
+            if success:
+                self._get(name).record_success(latency=latency)
+            else:
+                self._get(name).record_failure(error=error, latency=latency)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: server.snapshot() for name, server in self._servers.items()}
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.log import logger
+
+
+class _KeyLock:
+    """
+    同一地址的请求锁，等待的请求全部结束后才移除，
+    获取到的数据同时保存在锁中，未写入缓存（超过缓存大小）时等待的请求直接使用，不再重复获取
+    """
+    __slots__ = ("lock", "refs", "data")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.refs = 0
+        self.data: Optional[bytes] = None
+
+
+class SmtpImageCache:
+    """
+    图片缓存，内存LRU + 可选的磁盘缓存，失败的地址会短暂缓存，避免重复请求
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 3600, negative_ttl: float = 300,
+                 disk_dir: Optional[Path] = None, disk_max_bytes: int = 256 * 1024 * 1024):
+        """
+        :param max_bytes: 内存缓存最大字节数
+        :param ttl: 缓存有效期（秒）
+        :param negative_ttl: 获取失败的地址的缓存时间（秒）
+        :param disk_dir: 磁盘缓存目录，为空时不启用磁盘缓存
+        :param disk_max_bytes: 磁盘缓存最大字节数
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        # key -> (图片数据, 过期时间)
+        self._memory: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> (失败原因, 过期时间)
+        self._negative: Dict[str, Tuple[str, float]] = {}
+        # 同一地址同时只请求一次
+        self._key_locks: Dict[str, _KeyLock] = {}
+        self._counter = {"hits": 0, "disk_hits": 0, "misses": 0, "negative_hits": 0, "errors": 0}
+        # 磁盘缓存的总字节数，只在启动时与超出上限时遍历目录
+        self._disk_bytes = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        """
+        规范化地址，协议与域名小写，去掉片段标识
+        """
+        parsed = urllib.parse.urlsplit(url.strip())
+        return urllib.parse.urlunsplit((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path or "/",
+                                        parsed.query, ""))
+
+    @classmethod
+    def make_key(cls, url: str, suffix: str = "") -> str:
+        return hashlib.sha1(f"{cls.normalize(url)}{suffix}".encode("utf-8")).hexdigest()
+
+    def get_or_fetch(self, url: str, fetch: Callable[[], bytes], suffix: str = "") -> bytes:
+        """
+        读取缓存，未命中时调用 fetch 获取并写入缓存
+        :param url: 图片地址
+        :param fetch: 获取图片数据的方法
+        :param suffix: 缓存标识后缀，用于区分同一地址的不同处理结果
+        :raise Exception: 获取失败，或地址在失败缓存有效期内
+        """
+        key = self.make_key(url, suffix)
+        data = self._lookup(key)
+        if data is not None:
+            return data
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, _KeyLock())
+            key_lock.refs += 1
+        try:
+            with key_lock.lock:
+                # 等待期间可能已由其他线程获取
+                if key_lock.data is not None:
+                    self._count("hits")
+                    return key_lock.data
+                data = self._lookup(key, count=False)
+                if data is not None:
+                    return data
+                self._count("misses")
+                try:
+                    data = fetch()
+                    if not data:
+                        raise Exception("无法获取图像数据")
+                    self._store(key, data)
+                    key_lock.data = data
+                    return data
+                except Exception as e:
+                    self._count("errors")
+                    with self._lock:
+                        self._negative[key] = (str(e), time.monotonic() + self.negative_ttl)
+                    raise
+        finally:
+            with self._lock:
+                key_lock.refs -= 1
+                if not key_lock.refs:
+                    self._key_locks.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计
+        """
+        with self._lock:
+            counter = dict(self._counter)
+            entries = len(self._memory)
+            memory_bytes = self._memory_bytes
+            negative = len(self._negative)
+            disk_bytes = self._disk_bytes
+        lookups = counter["hits"] + counter["disk_hits"] + counter["misses"]
+        return {
+            "entries": entries,
+            "memory_bytes": memory_bytes,
+            "max_bytes": self.max_bytes,
+            "negative_entries": negative,
+            "hit_rate": round((counter["hits"] + counter["disk_hits"]) / lookups, 4) if lookups else 0,
+            "disk_enabled": bool(self.disk_dir),
+            "disk_bytes": disk_bytes,
+            **counter,
+        }
+
+    def clear(self):
+        """
+        清空内存缓存
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._negative.clear()
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counter[key] += 1
+
+    def _lookup(self, key: str, count: bool = True) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            negative = self._negative.get(key)
+            if negative:
+                if negative[1] > now:
+                    if count:
+                        self._counter["negative_hits"] += 1
+                    raise Exception(f"该地址近期获取失败，暂不重试 - {negative[0]}")
+                del self._negative[key]
+            entry = self._memory.get(key)
+            if entry:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    if count:
+                        self._counter["hits"] += 1
+                    return entry[0]
+                self._memory_bytes -= len(entry[0])
+                del self._memory[key]
+        data = self._disk_read(key)
+        if data is not None:
+            if count:
+                self._count("disk_hits")
+            self._memory_put(key, data)
+        return data
+
+    def _store(self, key: str, data: bytes):
+        self._memory_put(key, data)
+        self._disk_write(key, data)
+
+    def _memory_put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old:
+                self._memory_bytes -= len(old[0])
+            self._memory[key] = (data, time.monotonic() + self.ttl)
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_bytes and self._memory:
+                _, (evicted, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / key
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self.ttl:
+                self._disk_unlink(path, stat.st_size)
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"读取图片磁盘缓存失败 - 原因 - {e}")
+            return None
+
+    def _disk_write(self, key: str, data: bytes):
+        if not self.disk_dir:
+            return
+        try:
+            path = self.disk_dir / key
+            try:
+                old_size = path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            tmp_path = self.disk_dir / f"{key}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_bytes += len(data) - old_size
+                over = self._disk_bytes > self.disk_max_bytes
+            if over:
+                self._disk_trim()
+        except Exception as e:
+            logger.debug(f"写入图片磁盘缓存失败 - 原因 - {e}")
+
+    def _disk_unlink(self, path: Path, size: int):
+        path.unlink(missing_ok=True)
+        with self._lock:
+            self._disk_bytes = max(self._disk_bytes - size, 0)
+
+    def _disk_files(self):
+        """
+        磁盘缓存文件列表 (修改时间, 大小, 路径)
+        """
+        files = []
+        for path in self.disk_dir.iterdir():
+            if not path.is_file() or path.suffix == ".tmp":
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _disk_trim(self):
+        """
+        超出上限时按修改时间删除最早的文件，同时校正总字节数
+        """
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+        if total > self.disk_max_bytes:
+            for _, size, path in sorted(files):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= self.disk_max_bytes:
+                    break
+        with self._lock:
+            self._disk_bytes = total
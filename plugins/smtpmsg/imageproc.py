@@ -0,0 +1,92 @@
+from io import BytesIO
+from typing import Optional
+
+from app.log import logger
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class SmtpImageProcessor:
+    """
+    图片压缩，按最大边长缩小图片并重新编码，减小邮件体积
+    """
+    FORMATS = {"jpeg": "JPEG", "webp": "WEBP"}
+
+    def __init__(self, max_size: int = 800, image_format: str = "jpeg", quality: int = 80):
+        """
+        :param max_size: 图片最大边长（像素）
+        :param image_format: 输出格式，jpeg 或 webp
+        :param quality: 输出质量，1~95
+        """
+        self.max_size = max(int(max_size), 16)
+        self.image_format = image_format if image_format in self.FORMATS else "jpeg"
+        self.quality = min(max(int(quality), 1), 95)
+
+    @staticmethod
+    def available() -> bool:
+        """
+        是否可以处理图片
+        """
+        return Image is not None
+
+    @property
+    def cache_suffix(self) -> str:
+        """
+        图片缓存标识后缀，区分不同的处理参数
+        """
+        return f"|{self.max_size}|{self.image_format}|{self.quality}"
+
+    def process(self, data: bytes) -> bytes:
+        """
+        缩小并重新编码图片，处理失败或体积没有减小时返回原图
+        """
+        if Image is None or not data:
+            return data
+        try:
+            with Image.open(BytesIO(data)) as image:
+                # 动图重新编码会丢失动画，保持原样
+                if getattr(image, "is_animated", False):
+                    return data
+                resized = max(image.size) > self.max_size
+                image.thumbnail((self.max_size, self.max_size), Image.LANCZOS)
+                if image.mode not in ("RGB", "L"):
+                    image = self._flatten(image)
+                output = BytesIO()
+                image.save(output, format=self.FORMATS[self.image_format], quality=self.quality, optimize=True)
+            result = output.getvalue()
+            if not resized and len(result) >= len(data):
+                return data
+            return result
+        except Exception as e:
+            logger.warning(f"日志汇报 - 警告 - 图片压缩失败，使用原图 - 原因 - {e}")
+            return data
+
+    @staticmethod
+    def _flatten(image):
+        """
+        透明背景转为白色背景
+        """
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+
+    @staticmethod
+    def guess_subtype(data: bytes) -> Optional[str]:
+        """
+        根据文件头识别图片类型
+        """
+        if data.startswith(b"\xff\xd8\xff"):
+            return "jpeg"
+        if data.startswith(b"\x89PNG\r\n\x1a\n"):
+            return "png"
+        if data[:6] in (b"GIF87a", b"GIF89a"):
+            return "gif"
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return "webp"
+        if data.startswith(b"BM"):
+            return "bmp"
+        return None
@@ -0,0 +1,76 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from email.generator import BytesGenerator
+from email.message import Message
+from email.mime.image import MIMEImage
+from io import BytesIO
+from typing import Dict, Optional
+
+
+class SmtpEncodedMessage:
+    """
+    序列化后的邮件，正文只编码一次，按发件人替换 From 头后复用于多个账号
+    """
+
+    def __init__(self, message: Message):
+        self._policy = message.policy.clone(linesep="\r\n")
+        sender = message["From"]
+        del message["From"]
+        try:
+            output = BytesIO()
+            BytesGenerator(output, mangle_from_=False, policy=self._policy).flatten(message)
+            data = output.getvalue()
+        finally:
+            if sender is not None:
+                message["From"] = sender
+        self._head, _, self._body = data.partition(b"\r\n\r\n")
+        self._cache: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self._head) + len(self._body)
+
+    def for_sender(self, sender_name: str, sender_mail: str) -> bytes:
+        """
+        生成指定发件人的邮件数据
+        """
+        sender = f"{sender_name} <{sender_mail}>"
+        data = self._cache.get(sender)
+        if data is None:
+            header = self._policy.fold_binary("From", sender)
+            data = self._cache[sender] = b"".join((self._head, b"\r\n", header, b"\r\n", self._body))
+        return data
+
+
+class SmtpMimePartCache:
+    """
+    编码后的图片附件缓存，按图片内容的哈希保存，相同图片不再重复 base64 编码
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self._max_entries = max(int(max_entries), 1)
+        self._lock = threading.Lock()
+        self._parts: "OrderedDict[str, MIMEImage]" = OrderedDict()
+
+    def image(self, data: bytes, subtype: Optional[str] = None, content_id: str = "<image>") -> MIMEImage:
+        """
+        获取图片附件，附件只读，可同时用于多封邮件
+        """
+        key = f"{hashlib.sha1(data).hexdigest()}|{subtype}|{content_id}"
+        with self._lock:
+            part = self._parts.get(key)
+            if part is not None:
+                self._parts.move_to_end(key)
+                return part
+        part = MIMEImage(data, _subtype=subtype)
+        part.add_header("Content-ID", content_id)
+        with self._lock:
+            self._parts[key] = part
+            while len(self._parts) > self._max_entries:
+                self._parts.popitem(last=False)
+        return part
+
+    def clear(self):
+        with self._lock:
+            self._parts.clear()
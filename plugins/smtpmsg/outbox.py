@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from app.log import logger
+
+
+class SmtpOutbox:
+    """
+    有界发件队列，事件线程只负责入队，由后台线程完成发送
+    """
+    # 队列已满时的处理策略
+    POLICY_BLOCK = "block"
+    POLICY_DROP_OLDEST = "drop_oldest"
+    POLICY_DROP_NEWEST = "drop_newest"
+
+    def __init__(self, handler: Callable[..., Any], maxsize: int = 100, workers: int = 1,
+                 policy: str = POLICY_DROP_OLDEST, block_timeout: float = 1, name: str = "SmtpMsgOutbox"):
+        """
+        :param handler: 发送方法，参数为入队时的关键字参数
+        :param maxsize: 队列最大长度
+        :param workers: 发送线程数量
+        :param policy: 队列已满时的处理策略
+        :param block_timeout: 阻塞策略下的最长等待时间（秒），超时后丢弃新消息
+        """
+        self._handler = handler
+        self._queue: queue.Queue = queue.Queue(maxsize=max(int(maxsize), 1))
+        self._workers = max(int(workers), 1)
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self._name = name
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        # 最近的排队等待时间（秒）
+        self._waits = deque(maxlen=200)
+        self._counter = {"enqueued": 0, "processed": 0, "failed": 0, "dropped": 0}
+
+    def start(self):
+        """
+        启动发送线程
+        """
+        self._stop_event.clear()
+        for index in range(self._workers):
+            thread = threading.Thread(target=self._run, name=f"{self._name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5) -> int:
+        """
+        停止发送线程
+        :return: 停止时队列中未发送的消息数量
+        """
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(deadline - time.monotonic(), 0))
+        self._threads = []
+        return self._queue.qsize()
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        取出队列中全部未发送的消息，用于停止后转存
+        """
+        items = []
+        while True:
+            try:
+                _, kwargs = self._queue.get_nowait()
+                self._queue.task_done()
+                items.append(kwargs)
+            except queue.Empty:
+                return items
+
+    def put(self, **kwargs) -> bool:
+        """
+        消息入队
+        :return: 是否入队成功
+        """
+        item = (time.monotonic(), kwargs)
+        try:
+            if self._policy == self.POLICY_BLOCK:
+                self._queue.put(item, timeout=self._block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if self._policy != self.POLICY_DROP_OLDEST:
+                self._count("dropped")
+                logger.warning(f"日志汇报 - 警告 - 发件队列已满，丢弃最新消息 - {kwargs.get('title')}")
+                return False
+            # 丢弃最早入队的消息，为新消息腾出位置
+            while True:
+                try:
+                    _, dropped = self._queue.get_nowait()
+                    self._queue.task_done()
+                    self._count("dropped")
+                    logger.warning(f"日志汇报 - 警告 - 发件队列已满，丢弃最早消息 - {dropped.get('title')}")
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    continue
+        self._count("enqueued")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        队列状态统计
+        """
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            counter = dict(self._counter)
+        avg_wait = sum(waits) / len(waits) if waits else 0
+        max_wait = waits[-1] if waits else 0
+        p95_wait = waits[int(len(waits) * 0.95) - 1] if len(waits) >= 20 else max_wait
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self._queue.maxsize,
+            "workers": self._workers,
+            "policy": self._policy,
+            "wait_avg_ms": round(avg_wait * 1000, 2),
+            "wait_p95_ms": round(p95_wait * 1000, 2),
+            "wait_max_ms": round(max_wait * 1000, 2),
+            **counter,
+        }
+
+    def _count(self, key: str, value: int = 1):
+        with self._stats_lock:
+            self._counter[key] += value
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                enqueue_time, kwargs = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            with self._stats_lock:
+                self._waits.append(time.monotonic() - enqueue_time)
+            try:
+                self._handler(**kwargs)
+                self._count("processed")
+            except Exception as e:
+                self._count("failed")
+                logger.error(f"日志汇报 - 错误 - 发件队列处理消息失败 - 原因 - {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,111 @@
+import smtplib
+import threading
+import time
+from typing import Callable, Dict, List, Tuple, Hashable
+
+from app.log import logger
+
+
+class SmtpSessionPool:
+    """
+    SMTP会话池，按服务器保存已认证的长连接
+    """
+
+    def __init__(self, idle_timeout: float = 60, max_idle: int = 2):
+        """
+        :param idle_timeout: 空闲会话的最长保留时间（秒）
+        :param max_idle: 每个服务器最多保留的空闲会话数量
+        """
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        # key -> [(会话, 最后使用时间)]
+        self._idle: Dict[Hashable, List[Tuple[smtplib.SMTP, float]]] = {}
+
+    def acquire(self, key: Hashable, factory: Callable[[], smtplib.SMTP]) -> Tuple[smtplib.SMTP, bool]:
+        """
+        获取会话，优先复用空闲会话，复用前使用NOOP检查存活
+        :param key: 服务器标识
+        :param factory: 新建会话的方法
+        :return: 会话, 是否为复用的会话
+        """
+        while True:
+            with self._lock:
+                sessions = self._idle.get(key)
+                if not sessions:
+                    break
+                server, last_used = sessions.pop()
+            if time.monotonic() - last_used > self.idle_timeout:
+                self._close(server)
+                continue
+            if self._is_alive(server):
+                return server, True
+            self._close(server)
+        return factory(), False
+
+    def release(self, key: Hashable, server: smtplib.SMTP):
+        """
+        归还会话，超过空闲数量上限时直接关闭
+        """
+        if not server:
+            return
+        with self._lock:
+            sessions = self._idle.setdefault(key, [])
+            if len(sessions) < self.max_idle:
+                sessions.append((server, time.monotonic()))
+                return
+        self._close(server)
+
+    def evict_idle(self) -> int:
+        """
+        关闭超过空闲时间的会话
+        :return: 关闭的会话数量
+        """
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, sessions in self._idle.items():
+                alive = []
+                for server, last_used in sessions:
+                    if now - last_used > self.idle_timeout:
+                        expired.append(server)
+                    else:
+                        alive.append((server, last_used))
+                self._idle[key] = alive
+        for server in expired:
+            self._close(server)
+        return len(expired)
+
+    def close_all(self):
+        """
+        关闭全部空闲会话
+        """
+        with self._lock:
+            sessions = [server for items in self._idle.values() for server, _ in items]
+            self._idle.clear()
+        for server in sessions:
+            self._close(server)
+
+    def idle_count(self) -> int:
+        """
+        当前空闲会话数量
+        """
+        with self._lock:
+            return sum(len(items) for items in self._idle.values())
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception as e:
+                logger.debug(f"关闭SMTP会话失败 - 原因 - {e}")
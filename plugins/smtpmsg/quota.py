@@ -0,0 +1,145 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class SmtpTokenBucket:
+    """
+    令牌桶，容量为周期内的发送上限，令牌按 容量/周期 的速度持续补充
+    使用系统时间计算补充量，重启后按离线时长补充
+    """
+
+    def __init__(self, capacity: int, period: float, tokens: Optional[float] = None, updated: Optional[float] = None):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = float(capacity) if tokens is None else min(max(float(tokens), 0.0), float(capacity))
+        self.updated = time.time() if updated is None else float(updated)
+
+    def refill(self, now: float):
+        elapsed = max(now - self.updated, 0)
+        self.tokens = min(self.tokens + elapsed * self.capacity / self.period, float(self.capacity))
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """
+        获得一个令牌还需等待的时间（秒）
+        """
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) * self.period / self.capacity
+
+
+class SmtpQuota:
+    """
+    各账号的发送额度，每个账号按分钟、小时、天分别设置令牌桶，发送前预占令牌，发送失败时退回
+    上限为 0 的周期不限制
+    """
+    PERIODS = {"minute": 60, "hour": 3600, "day": 86400}
+
+    def __init__(self, limits: Dict[str, Dict[str, int]], state: Optional[Dict[str, Any]] = None):
+        """
+        :param limits: 账号名称 -> {周期: 上限}
+        :param state: 保存的令牌桶状态，账号名称 -> {周期: [令牌数, 更新时间]}
+        """
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._buckets: Dict[str, Dict[str, SmtpTokenBucket]] = {}
+        state = state if isinstance(state, dict) else {}
+        for name, periods in limits.items():
+            saved = state.get(name) if isinstance(state.get(name), dict) else {}
+            buckets = {}
+            for period, limit in periods.items():
+                if period not in self.PERIODS or not limit:
+                    continue
+                tokens, updated = None, None
+                if isinstance(saved.get(period), (list, tuple)) and len(saved[period]) == 2:
+                    tokens, updated = saved[period]
+                buckets[period] = SmtpTokenBucket(capacity=int(limit), period=self.PERIODS[period],
+                                                  tokens=tokens, updated=updated)
+            self._buckets[name] = buckets
+
+    def allow(self, name: str) -> bool:
+        """
+        账号是否还有发送额度
+        """
+        now = time.time()
+        with self._lock:
+            buckets = self._buckets.get(name) or {}
+            for bucket in buckets.values():
+                bucket.refill(now)
+            return all(bucket.tokens >= 1 for bucket in buckets.values())
+
+    def acquire(self, name: str) -> bool:
+        """
+        预占一次发送额度，任一周期额度不足时不预占
+        """
+        now = time.time()
+        with self._lock:
+            buckets = self._buckets.get(name) or {}
+            for bucket in buckets.values():
+                bucket.refill(now)
+            if not all(bucket.tokens >= 1 for bucket in buckets.values()):
+                return False
+            for bucket in buckets.values():
+                bucket.tokens -= 1
+            self._dirty = self._dirty or bool(buckets)
+            return True
+
+    def refund(self, name: str):
+        """
+        退回预占的发送额度
+        """
+        with self._lock:
+            for bucket in (self._buckets.get(name) or {}).values():
+                bucket.tokens = min(bucket.tokens + 1, float(bucket.capacity))
+            self._dirty = True
+
+    def remaining(self, name: str) -> int:
+        """
+        当前可以连续发送的数量，不限制时为 -1
+        """
+        now = time.time()
+        with self._lock:
+            buckets = self._buckets.get(name) or {}
+            for bucket in buckets.values():
+                bucket.refill(now)
+            if not buckets:
+                return -1
+            return int(min(bucket.tokens for bucket in buckets.values()))
+
+    def total_remaining(self, names: List[str]) -> Optional[int]:
+        """
+        多个账号合计可以连续发送的数量，存在不限制的账号时为 None
+        """
+        total = 0
+        for name in names:
+            remaining = self.remaining(name)
+            if remaining < 0:
+                return None
+            total += remaining
+        return total
+
+    def dump(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        令牌桶状态，用于保存到插件数据
+        :return: 没有变化且不强制导出时返回 None
+        """
+        with self._lock:
+            if not self._dirty and not force:
+                return None
+            self._dirty = False
+            return {name: {period: [round(bucket.tokens, 3), bucket.updated] for period, bucket in buckets.items()}
+                    for name, buckets in self._buckets.items() if buckets}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            result = {}
+            for name, buckets in self._buckets.items():
+                periods = {}
+                for period, bucket in buckets.items():
+                    bucket.refill(now)
+                    periods[period] = {"limit": bucket.capacity, "remaining": int(bucket.tokens),
+                                       "next_in_s": round(bucket.wait_time(), 1)}
+                result[name] = periods
+            return result
@@ -0,0 +1,140 @@
+import smtplib
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.log import logger
+
+
+class SmtpShardSender:
+    """
+    收件人分片发送，收件人按数量分片后通过多个会话同时发送
+    被拒绝的收件人单独记录，只对临时错误（4xx 与连接异常）的收件人重试一次
+    """
+
+    def __init__(self, executor: Executor, acquire: Callable[[], Any], release: Callable[[Any, bool], None],
+                 chunk_size: int = 50, concurrency: int = 2):
+        """
+        :param executor: 运行其余会话的线程池
+        :param acquire: 获取新会话的方法
+        :param release: 归还会话的方法，参数为会话与是否可以复用
+        :param chunk_size: 单次发送的最大收件人数量
+        :param concurrency: 同时使用的最大会话数量
+        """
+        self._executor = executor
+        self._acquire = acquire
+        self._release = release
+        self._chunk_size = max(int(chunk_size), 1)
+        self._concurrency = max(int(concurrency), 1)
+
+    def send(self, server, sender_mail: str, recipients: List[str],
+             message: bytes) -> Tuple[Dict[str, Tuple[Optional[int], Optional[str]]], bool]:
+        """
+        发送邮件
+        :param server: 已登录的会话，用于第一组分片，由调用方归还
+        :return: (发送失败的收件人 -> (状态码, 错误信息)，连接异常时状态码为 None；传入的会话是否仍然可用)
+        """
+        failed, server_ok = self._send_lanes(server, sender_mail, recipients, message)
+        retry = [recipient for recipient, (code, _) in failed.items() if code is None or 400 <= code < 500]
+        if retry:
+            logger.info(f"日志汇报 - 状态 - {len(retry)}个收件人发送失败，重试一次")
+            retry_failed, retry_ok = self._send_lanes(server if server_ok else None, sender_mail, retry, message)
+            server_ok = server_ok and retry_ok
+            for recipient in retry:
+                if recipient in retry_failed:
+                    failed[recipient] = retry_failed[recipient]
+                else:
+                    failed.pop(recipient, None)
+        return failed, server_ok
+
+    def _send_lanes(self, server, sender_mail: str, recipients: List[str], message: bytes):
+        """
+        按并发数量分配分片，第一组使用传入的会话在当前线程发送，其余各组获取新会话在线程池中发送
+        :return: 发送失败的收件人，传入的会话是否仍然可用
+        """
+        shards = [recipients[index:index + self._chunk_size]
+                  for index in range(0, len(recipients), self._chunk_size)]
+        lanes = [shards[index::self._concurrency] for index in range(min(self._concurrency, len(shards)))]
+        futures = [self._executor.submit(self._run_lane, None, sender_mail, lane, message) for lane in lanes[1:]]
+        failed, server_ok = self._run_lane(server, sender_mail, lanes[0], message) if lanes else ({}, True)
+        for future in futures:
+            failed.update(future.result()[0])
+        return failed, server_ok
+
+    def _run_lane(self, server, sender_mail: str, shards: List[List[str]], message: bytes):
+        failed = {}
+        own = server is None
+        try:
+            if own:
+                server = self._acquire()
+        except Exception as e:
+            for shard in shards:
+                failed.update({recipient: (None, f"获取连接失败 - {e}") for recipient in shard})
+            return failed, False
+        server_ok = True
+        for index, shard in enumerate(shards):
+            try:
+                refused = server.sendmail(sender_mail, shard, message)
+                failed.update({recipient: (code, self._decode(resp)) for recipient, (code, resp) in refused.items()})
+            except smtplib.SMTPRecipientsRefused as e:
+                failed.update({recipient: (code, self._decode(resp))
+                               for recipient, (code, resp) in e.recipients.items()})
+            except smtplib.SMTPResponseException as e:
+                # 服务器拒绝了本次发送，会话仍可继续使用
+                failed.update({recipient: (e.smtp_code, self._decode(e.smtp_error)) for recipient in shard})
+                self._reset(server)
+            except Exception as e:
+                # 连接异常，本组剩余分片全部记为失败
+                server_ok = False
+                for rest in shards[index:]:
+                    failed.update({recipient: (None, str(e)) for recipient in rest})
+                break
+        if own:
+            self._release(server, server_ok)
+        return failed, server_ok
+
+    @staticmethod
+    def _reset(server):
+        try:
+            server.rset()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _decode(resp) -> str:
+        if isinstance(resp, bytes):
+            return resp.decode("utf-8", "replace")
+        return str(resp)
+
+
+class SmtpRecipientStats:
+    """
+    各收件人的发送结果统计
+    """
+
+    def __init__(self, max_entries: int = 500):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, recipients: List[str], failed: Dict[str, Tuple[Optional[int], Optional[str]]]):
+        now = time.time()
+        with self._lock:
+            for recipient in recipients:
+                stat = self._stats.get(recipient)
+                if stat is None:
+                    if len(self._stats) >= self._max_entries:
+                        continue
+                    stat = self._stats[recipient] = {"sent": 0, "failed": 0, "last_error": None, "last_at": None}
+                if recipient in failed:
+                    code, error = failed[recipient]
+                    stat["failed"] += 1
+                    stat["last_error"] = f"{code} {error}" if code else error
+                else:
+                    stat["sent"] += 1
+                stat["last_at"] = now
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {recipient: dict(stat) for recipient, stat in self._stats.items()}
@@ -0,0 +1,94 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SmtpRecipientRoute:
+    """
+    单条收件人路由，用户ID与消息类型同时满足时，消息发送到 mail 中的邮箱
+    用户ID或消息类型留空时不限制
+    """
+
+    def __init__(self, data: Dict[str, Any], index: int):
+        """
+        :raise ValueError: 路由格式错误
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"第{index + 1}条路由不是对象")
+        self.name = str(data.get("name") or f"路由{index + 1}")
+        self.userids = set(self._as_list(data.get("userid")))
+        self.msg_types = set(self._as_list(data.get("msg_type")))
+        self.mails = list(dict.fromkeys(mail.strip() for mail in self._as_list(data.get("mail")) if mail.strip()))
+        if not self.mails:
+            raise ValueError(f"路由【{self.name}】没有填写收件人邮箱 mail")
+        self.hits = 0
+
+    def match(self, userid: str, msg_type: str) -> bool:
+        if self.userids and userid not in self.userids:
+            return False
+        if self.msg_types and msg_type not in self.msg_types:
+            return False
+        return True
+
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        if value is None or value == "":
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(item) for item in value if item is not None and item != ""]
+        return [str(value)]
+
+
+class SmtpRecipientRouter:
+    """
+    按用户ID与消息类型选择收件人，命中的全部路由的邮箱合并发送，没有命中时使用默认收件人
+    汇总消息按收件人分组，收到相同消息的收件人合并为一组，每组只构建一次邮件
+    """
+
+    def __init__(self, routes: List[Dict[str, Any]]):
+        """
+        :raise ValueError: 路由格式错误
+        """
+        if not isinstance(routes, list):
+            raise ValueError("收件人路由必须是JSON数组")
+        self.routes = [SmtpRecipientRoute(data, index) for index, data in enumerate(routes)]
+        self._lock = threading.Lock()
+
+    def recipients(self, userid: Optional[str], msg_type: Optional[str]) -> Optional[List[str]]:
+        """
+        :param msg_type: 消息类型名称
+        :return: 收件人列表，没有命中任何路由时为 None，使用默认收件人
+        """
+        userid, msg_type = str(userid or ""), msg_type or ""
+        mails = []
+        for route in self.routes:
+            if route.match(userid, msg_type):
+                self._hit(route)
+                mails.extend(route.mails)
+        return list(dict.fromkeys(mails)) or None
+
+    def group(self, targets: List[Tuple[Optional[str], Optional[str]]]) -> List[Tuple[Optional[List[str]], List[int]]]:
+        """
+        汇总消息按收件人分组
+        :param targets: 各条消息的 (用户ID, 消息类型名称)
+        :return: [(收件人列表，None 为默认收件人, 该组收到的消息序号)]，按消息首次出现的顺序排列
+        """
+        # 收件人 -> 收到的消息序号，None 表示默认收件人
+        received: Dict[Optional[str], List[int]] = {}
+        for index, (userid, msg_type) in enumerate(targets):
+            for mail in self.recipients(userid, msg_type) or [None]:
+                received.setdefault(mail, []).append(index)
+        # 收到的消息相同的收件人合并，默认收件人单独成组
+        groups: Dict[Tuple[Tuple[int, ...], bool], List[Optional[str]]] = {}
+        for mail, indexes in received.items():
+            groups.setdefault((tuple(indexes), mail is None), []).append(mail)
+        return [(None if is_default else mails, list(indexes))
+                for (indexes, is_default), mails in sorted(groups.items(), key=lambda group: group[0][0])]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"name": route.name, "userid": sorted(route.userids), "msg_type": sorted(route.msg_types),
+                     "mail": route.mails, "hits": route.hits} for route in self.routes]
+
+    def _hit(self, route: SmtpRecipientRoute):
+        with self._lock:
+            route.hits += 1
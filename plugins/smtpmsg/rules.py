@@ -0,0 +1,141 @@
+import fnmatch
+import re
+import threading
+from datetime import datetime, time as dtime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SmtpMsgRule:
+    """
+    单条过滤规则，加载时编译匹配条件
+    action：include 只发送命中的消息；exclude 不发送命中的消息
+    各条件同时满足时命中，同一条件中的多个匹配值满足其一即可
+    """
+    ACTIONS = ("include", "exclude")
+    MATCHERS = ("keyword", "regex", "glob")
+    FIELDS = ("title", "text", "userid")
+
+    def __init__(self, data: Dict[str, Any], index: int):
+        """
+        :raise ValueError: 规则格式错误或正则表达式无效
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"第{index + 1}条规则不是对象")
+        self.name = str(data.get("name") or f"规则{index + 1}")
+        self.action = data.get("action", "exclude")
+        if self.action not in self.ACTIONS:
+            raise ValueError(f"规则【{self.name}】的 action 只能是 include 或 exclude")
+        matcher = data.get("match", "keyword")
+        if matcher not in self.MATCHERS:
+            raise ValueError(f"规则【{self.name}】的 match 只能是 keyword、regex 或 glob")
+        self.msg_types = self._as_list(data.get("msg_type"))
+        self.patterns: Dict[str, re.Pattern] = {}
+        for field in self.FIELDS:
+            values = self._as_list(data.get(field))
+            if values:
+                self.patterns[field] = self._compile(matcher, values)
+        self.windows = [self._parse_window(value) for value in self._as_list(data.get("time"))]
+        self.hits = 0
+
+    def match(self, title: str, text: str, userid: str, now: dtime) -> bool:
+        if self.windows and not any(self._in_window(window, now) for window in self.windows):
+            return False
+        values = {"title": title, "text": text, "userid": userid}
+        return all(pattern.search(values[field]) for field, pattern in self.patterns.items())
+
+    def _compile(self, matcher: str, values: List[str]) -> re.Pattern:
+        try:
+            if matcher == "keyword":
+                return re.compile("|".join(re.escape(value) for value in values), re.IGNORECASE)
+            if matcher == "glob":
+                # 通配符匹配整个值，每个匹配值的首尾都需要锚定
+                return re.compile("|".join(rf"\A(?:{fnmatch.translate(value)})" for value in values),
+                                  re.IGNORECASE | re.DOTALL)
+            return re.compile("|".join(f"(?:{value})" for value in values))
+        except re.error as e:
+            raise ValueError(f"规则【{self.name}】的匹配值无效 - {e}")
+
+    def _parse_window(self, value: str) -> Tuple[dtime, dtime]:
+        """
+        解析时间段，格式 HH:MM-HH:MM，结束时间早于开始时间时表示跨越零点
+        """
+        try:
+            start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in value.split("-", 1))
+            return start, end
+        except (ValueError, AttributeError):
+            raise ValueError(f"规则【{self.name}】的时间段格式错误，应为 HH:MM-HH:MM - {value}")
+
+    @staticmethod
+    def _in_window(window: Tuple[dtime, dtime], now: dtime) -> bool:
+        start, end = window
+        if start <= end:
+            return start <= now < end
+        return now >= start or now < end
+
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        if value is None or value == "":
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(item) for item in value if item is not None and item != ""]
+        return [str(value)]
+
+
+class SmtpMsgRuleEngine:
+    """
+    消息过滤规则，按消息类型建立索引，发送前判断消息是否需要发送
+    先判断排除规则，命中任意一条即不发送；存在包含规则时，需要命中至少一条才发送
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        """
+        :raise ValueError: 规则格式错误
+        """
+        if not isinstance(rules, list):
+            raise ValueError("过滤规则必须是JSON数组")
+        self.rules = [SmtpMsgRule(data, index) for index, data in enumerate(rules)]
+        self._lock = threading.Lock()
+        # 消息类型 -> (排除规则, 包含规则)，不限类型的规则合并到每个类型中
+        self._index: Dict[str, Tuple[List[SmtpMsgRule], List[SmtpMsgRule]]] = {}
+        self._common = self._split([rule for rule in self.rules if not rule.msg_types])
+        for msg_type in {msg_type for rule in self.rules for msg_type in rule.msg_types}:
+            self._index[msg_type] = self._split(
+                [rule for rule in self.rules if not rule.msg_types or msg_type in rule.msg_types])
+
+    def check(self, title: Optional[str], text: Optional[str], msg_type: Optional[str],
+              userid: Optional[str], now: Optional[dtime] = None) -> Tuple[bool, Optional[str]]:
+        """
+        判断消息是否需要发送
+        :param msg_type: 消息类型名称
+        :return: 是否发送，以及决定结果的规则名称
+        """
+        excludes, includes = self._index.get(msg_type or "", self._common)
+        if not excludes and not includes:
+            return True, None
+        now = now or datetime.now().time()
+        title, text, userid = title or "", text or "", str(userid or "")
+        for rule in excludes:
+            if rule.match(title, text, userid, now):
+                self._hit(rule)
+                return False, rule.name
+        if not includes:
+            return True, None
+        for rule in includes:
+            if rule.match(title, text, userid, now):
+                self._hit(rule)
+                return True, rule.name
+        return False, None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"name": rule.name, "action": rule.action, "msg_type": rule.msg_types, "hits": rule.hits}
+                    for rule in self.rules]
+
+    def _hit(self, rule: SmtpMsgRule):
+        with self._lock:
+            rule.hits += 1
+
+    @staticmethod
+    def _split(rules: List[SmtpMsgRule]) -> Tuple[List[SmtpMsgRule], List[SmtpMsgRule]]:
+        return ([rule for rule in rules if rule.action == "exclude"],
+                [rule for rule in rules if rule.action == "include"])
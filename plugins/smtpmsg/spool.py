@@ -0,0 +1,130 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from app.log import logger
+
+
+class SmtpSpool:
+    """
+    发送失败消息的持久化队列，保存在 SQLite 中，插件重载与程序重启后继续重试
+    重试间隔按失败次数指数增长并加入随机抖动，超过最长保存时间的消息会被清理
+    """
+
+    def __init__(self, path: Path, max_count: int = 500, max_age: float = 86400,
+                 backoff_base: float = 60, backoff_max: float = 3600):
+        """
+        :param path: 数据库文件路径
+        :param max_count: 最多保存的消息数量，超过时清理最早的消息
+        :param max_age: 消息最长保存时间（秒）
+        :param backoff_base: 首次重试间隔（秒）
+        :param backoff_max: 最大重试间隔（秒）
+        """
+        self.path = path
+        self.max_count = max(int(max_count), 1)
+        self.max_age = max_age
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                next_attempt REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                payload TEXT NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_spool_next_attempt ON spool (next_attempt)")
+
+    def add(self, payload: Dict[str, Any], error: str = None) -> int:
+        """
+        保存发送失败的消息，首次重试按退避间隔延后
+        :return: 消息ID
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO spool (created_at, next_attempt, attempts, last_error, payload) VALUES (?, ?, 1, ?, ?)",
+                (now, now + self._backoff(1), error, json.dumps(payload, ensure_ascii=False)))
+            dropped = self._trim()
+        if dropped:
+            logger.warning(f"日志汇报 - 警告 - 重试队列已满，清理了{dropped}条最早的消息")
+        return cursor.lastrowid
+
+    def due(self, limit: int) -> List[Tuple[int, Dict[str, Any], int]]:
+        """
+        到达重试时间的消息，按重试时间排序
+        :return: [(消息ID, 消息内容, 已尝试次数)]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM spool WHERE next_attempt <= ? ORDER BY next_attempt LIMIT ?",
+                (time.time(), max(int(limit), 0))).fetchall()
+        items = []
+        for spool_id, payload, attempts in rows:
+            try:
+                items.append((spool_id, json.loads(payload), attempts))
+            except ValueError:
+                self.remove(spool_id)
+        return items
+
+    def remove(self, spool_id: int):
+        """
+        删除消息，用于发送成功后
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM spool WHERE id = ?", (spool_id,))
+
+    def failure(self, spool_id: int, attempts: int, error: str = None):
+        """
+        重试失败，按失败次数推迟下次重试
+        """
+        attempts += 1
+        with self._lock:
+            self._conn.execute("UPDATE spool SET attempts = ?, last_error = ?, next_attempt = ? WHERE id = ?",
+                               (attempts, error, time.time() + self._backoff(attempts), spool_id))
+
+    def purge_expired(self) -> int:
+        """
+        清理超过最长保存时间的消息
+        :return: 清理的数量
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM spool WHERE created_at < ?", (time.time() - self.max_age,))
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, oldest, next_attempt = self._conn.execute(
+                "SELECT COUNT(*), MIN(created_at), MIN(next_attempt) FROM spool").fetchone()
+        return {
+            "count": count,
+            "max_count": self.max_count,
+            "oldest_at": oldest,
+            "next_attempt_at": next_attempt,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _backoff(self, attempts: int) -> float:
+        """
+        指数退避，加入 50%~100% 的随机抖动，避免恢复后集中重试
+        """
+        delay = min(self.backoff_base * (2 ** max(attempts - 1, 0)), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _trim(self) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM spool WHERE id IN (SELECT id FROM spool ORDER BY id DESC LIMIT -1 OFFSET ?)",
+            (self.max_count,))
+        return cursor.rowcount
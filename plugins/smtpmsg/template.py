@@ -0,0 +1,116 @@
+import threading
+from pathlib import Path
+from string import Formatter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+class SmtpCompiledTemplate:
+    """
+    预编译的邮件模板，加载时拆分为文本片段与变量片段，并校验变量
+    """
+    _formatter = Formatter()
+
+    def __init__(self, content: str, fields: Iterable[str]):
+        """
+        :param content: 模板内容，语法与 str.format 一致
+        :param fields: 支持的变量名
+        :raise KeyError: 模板中使用了不被支持的变量
+        :raise ValueError: 模板语法错误
+        """
+        allowed = set(fields)
+        # (文本, 变量名, 是否为简单变量, 格式说明, 转换标记)
+        self._segments: List[Tuple[str, Optional[str], bool, str, Optional[str]]] = []
+        self.placeholders = set()
+        for literal, field, spec, conversion in self._formatter.parse(content):
+            if field is None:
+                self._segments.append((literal, None, True, "", None))
+                continue
+            if not field:
+                raise ValueError("不支持无名称的位置变量 {}")
+            root = field.split(".", 1)[0].split("[", 1)[0]
+            if root not in allowed:
+                raise KeyError(root)
+            if spec and "{" in spec:
+                raise ValueError(f"不支持嵌套的格式说明 - {{{field}:{spec}}}")
+            self.placeholders.add(root)
+            self._segments.append((literal, field, field == root, spec or "", conversion))
+
+    def render(self, **values) -> str:
+        """
+        导入变量，生成模板内容
+        """
+        parts = []
+        for literal, field, simple, spec, conversion in self._segments:
+            if literal:
+                parts.append(literal)
+            if field is None:
+                continue
+            value = values[field] if simple else self._formatter.get_field(field, (), values)[0]
+            if conversion:
+                value = self._formatter.convert_field(value, conversion)
+            parts.append(format(value, spec) if spec else str(value))
+        return "".join(parts)
+
+
+class SmtpTemplateCache:
+    """
+    模板缓存，按路径保存，文件修改时间或大小变化时重新读取与编译
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self._fields = tuple(fields)
+        self._lock = threading.Lock()
+        # 路径 -> ((修改时间, 大小), 模板内容, 编译结果或编译错误)
+        self._cache: Dict[Path, Tuple[Tuple[int, int], str, Union[SmtpCompiledTemplate, Exception, None]]] = {}
+
+    def get(self, path: Path) -> SmtpCompiledTemplate:
+        """
+        获取编译后的模板
+        :raise KeyError: 模板中使用了不被支持的变量
+        :raise ValueError: 模板语法错误
+        """
+        signature, content, compiled = self._load(path)
+        if compiled is None:
+            try:
+                compiled = SmtpCompiledTemplate(content, self._fields)
+            except (KeyError, ValueError) as e:
+                compiled = e
+            with self._lock:
+                entry = self._cache.get(path)
+                if entry and entry[0] == signature:
+                    self._cache[path] = (signature, content, compiled)
+        if isinstance(compiled, Exception):
+            raise compiled
+        return compiled
+
+    def read_text(self, path: Path, default: str = "") -> str:
+        """
+        读取模板内容，文件不存在时返回默认值
+        """
+        try:
+            return self._load(path)[1]
+        except FileNotFoundError:
+            return default
+
+    def invalidate(self, path: Optional[Path] = None):
+        """
+        清除缓存
+        """
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(path, None)
+
+    def _load(self, path: Path):
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._cache.get(path)
+        if entry and entry[0] == signature:
+            return entry
+        content = path.read_text(encoding="utf-8")
+        entry = (signature, content, None)
+        with self._lock:
+            self._cache[path] = entry
+        return entry
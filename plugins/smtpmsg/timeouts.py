@@ -0,0 +1,83 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class SmtpAdaptiveTimeout:
+    """
+    自适应超时时间，按服务器或图片域名记录最近的耗时，超时时间为 p99 乘以系数，并限制在最小值与最大值之间
+    样本不足时使用配置的超时时间；只记录成功请求的耗时，超时失败单独计数，不影响超时时间，
+    避免无响应的服务器把超时时间推高到上限，持续超时的服务器由熔断处理
+    """
+
+    def __init__(self, factor: float = 3, minimum: float = 2, maximum: float = 30,
+                 window: int = 200, min_samples: int = 20):
+        """
+        :param factor: p99 耗时的倍数
+        :param minimum: 超时时间下限（秒）
+        :param maximum: 超时时间上限（秒）
+        :param window: 每个目标保存的最近样本数量
+        :param min_samples: 启用自适应的最少样本数量
+        """
+        self.factor = factor
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self._window = max(int(window), 1)
+        self._min_samples = max(int(min_samples), 1)
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+
+    def observe(self, key: str, seconds: float):
+        """
+        记录一次耗时
+        """
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def observe_timeout(self, key: str):
+        """
+        记录一次超时，只计数，不作为耗时样本
+        """
+        with self._lock:
+            self._timeouts[key] = self._timeouts.get(key, 0) + 1
+
+    def timeout(self, key: str, default: float) -> float:
+        """
+        获取超时时间
+        :param default: 样本不足时使用的超时时间，同样限制在上限之内
+        """
+        with self._lock:
+            samples = self._samples.get(key)
+            values = sorted(samples) if samples and len(samples) >= self._min_samples else None
+        if values is None:
+            return min(default, self.maximum)
+        return min(max(self._p99(values) * self.factor, self.minimum), self.maximum)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+            timeouts = dict(self._timeouts)
+        stats = {}
+        for key in set(samples) | set(timeouts):
+            values = samples.get(key, [])
+            stats[key] = {
+                "samples": len(values),
+                "timeouts": timeouts.get(key, 0),
+                "p99_ms": round(self._p99(values) * 1000, 2) if values else None,
+                "timeout_s": (round(min(max(self._p99(values) * self.factor, self.minimum), self.maximum), 2)
+                              if len(values) >= self._min_samples else None),
+            }
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._timeouts.clear()
+
+    @staticmethod
+    def _p99(values) -> float:
+        return values[min(int(round(0.99 * (len(values) - 1))), len(values) - 1)]
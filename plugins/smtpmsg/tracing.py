@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SmtpTrace:
+    """
+    单次发送的各阶段耗时
+    """
+    __slots__ = ("started_at", "start", "stages", "closed")
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.start = time.monotonic()
+        # (阶段名称, 耗时秒数, 是否成功)
+        self.stages = []
+        # 已完成并保存，之后结束的后台阶段不再记录到该发送记录
+        self.closed = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "total_ms": round((time.monotonic() - self.start) * 1000, 2),
+            "stages": [{"stage": name, "ms": round(duration * 1000, 2), "success": success}
+                       for name, duration, success in self.stages],
+        }
+
+
+class SmtpTracer:
+    """
+    阶段耗时统计，最近的发送记录保存在有限长度的环形缓冲中，并按阶段统计分位数
+    同一线程中嵌套的阶段记录到同一个发送记录，创建发送记录的线程中最外层阶段结束时发送记录完成
+    嵌套层级按线程分别计算，传递到其他线程的后台任务不影响发送记录的完成时间，发送记录完成后结束的阶段只计入分位数统计
+    """
+
+    def __init__(self, max_traces: int = 100, max_samples: int = 500):
+        """
+        :param max_traces: 保存的发送记录数量
+        :param max_samples: 每个阶段保存的耗时样本数量
+        """
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._traces = deque(maxlen=max_traces)
+        self._samples: Dict[str, deque] = {}
+
+    def current(self) -> Optional[SmtpTrace]:
+        return getattr(self._local, "trace", None)
+
+    def bind(self, func: Callable) -> Callable:
+        """
+        将当前发送记录传递到其他线程中执行的方法，执行结束后恢复该线程原来的发送记录
+        """
+        trace = self.current()
+        if trace is None:
+            return func
+
+        def wrapper(*args, **kwargs):
+            previous = (self.current(), getattr(self._local, "depth", 0), getattr(self._local, "owner", False))
+            self._local.trace, self._local.depth, self._local.owner = trace, 0, False
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.trace, self._local.depth, self._local.owner = previous
+        return wrapper
+
+    def begin(self) -> float:
+        """
+        阶段开始，没有进行中的发送记录时创建
+        :return: 开始时间
+        """
+        if self.current() is None:
+            self._local.trace, self._local.depth, self._local.owner = SmtpTrace(), 0, True
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        return time.monotonic()
+
+    def end(self, stage: str, start: float, success: bool = True):
+        """
+        阶段结束，记录耗时
+        """
+        duration = time.monotonic() - start
+        trace = self.current()
+        self._local.depth = max(getattr(self._local, "depth", 1) - 1, 0)
+        finish = trace is not None and self._local.depth == 0 and getattr(self._local, "owner", False)
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self._max_samples)
+            samples.append(duration)
+            if trace is None or trace.closed:
+                return
+            trace.stages.append((stage, duration, success))
+            if finish:
+                trace.closed = True
+                self._traces.append(trace.to_dict())
+        if finish:
+            self._local.trace, self._local.owner = None, False
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        记录代码块的耗时
+        """
+        start = self.begin()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            self.end(name, start, success=success)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各阶段的耗时分位数（毫秒）
+        """
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+        return {stage: {
+            "count": len(values),
+            "p50_ms": self._percentile(values, 0.50),
+            "p95_ms": self._percentile(values, 0.95),
+            "p99_ms": self._percentile(values, 0.99),
+            "max_ms": round(values[-1] * 1000, 2),
+        } for stage, values in samples.items() if values}
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        最近的发送记录，新的在前
+        """
+        with self._lock:
+            traces = list(self._traces)
+        return traces[::-1][:max(int(limit), 0)]
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+            self._samples.clear()
+
+    @staticmethod
+    def _percentile(values: List[float], percent: float) -> float:
+        index = min(int(len(values) * percent), len(values) - 1)
+        return round(values[index] * 1000, 2)